@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming audit export: peak RSS while exporting synthetic
+AuditLog documents should stay flat as the export grows.
+
+Documents are generated on the fly and fed through the same cursor batching
+and rendering path the endpoint uses, so the numbers reflect the exporter
+rather than MongoDB.
+    python benchmarks/bench_audit_export.py [documents] [ndjson|csv] [gzip]
+"""
+import asyncio
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+
+from shared.audit.export import AUDIT_EXPORT_BATCH_SIZE, render_export
+
+START = datetime(2026, 1, 1)
+
+
+class SyntheticCursor:
+    """Yields documents in cursor-sized batches, like a Motor cursor does."""
+
+    def __init__(self, count, batch_size=AUDIT_EXPORT_BATCH_SIZE):
+        self.count = count
+        self.batch_size = batch_size
+
+    async def __aiter__(self):
+        for start in range(0, self.count, self.batch_size):
+            batch = [
+                {
+                    "_id": ObjectId(),
+                    "tenant_id": "bench-tenant",
+                    "user_id": "bench-user",
+                    "action": "CreateTenant",
+                    "details": {"school_name": f"School {n}", "tenant_id": f"t-{n}"},
+                    "created_at": START + timedelta(seconds=n),
+                }
+                for n in range(start, min(start + self.batch_size, self.count))
+            ]
+            await asyncio.sleep(0)
+            for doc in batch:
+                yield doc
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main(count, format, compress):
+    checkpoints = {count // 10, count // 2, count}
+    print(f"Exporting {count:,} documents as {format}{' (gzip)' if compress else ''}")
+    print(f"peak RSS before export: {peak_rss_mb():.1f} MB")
+    exported = total_bytes = 0
+    started = time.perf_counter()
+    async for chunk in render_export(_counting(SyntheticCursor(count), checkpoints), format, compress):
+        total_bytes += len(chunk)
+    elapsed = time.perf_counter() - started
+    print(f"{total_bytes / 1e6:,.1f} MB written in {elapsed:.1f}s ({count / elapsed:,.0f} docs/s)")
+
+
+async def _counting(docs, checkpoints):
+    seen = 0
+    async for doc in docs:
+        yield doc
+        seen += 1
+        if seen in checkpoints:
+            print(f"  after {seen:>10,} docs: peak RSS {peak_rss_mb():.1f} MB")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    format = sys.argv[2] if len(sys.argv) > 2 else "ndjson"
+    compress = len(sys.argv) > 3 and sys.argv[3] == "gzip"
+    asyncio.run(main(count, format, compress))
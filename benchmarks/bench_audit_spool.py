@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark the durable audit spool: enqueue latency on the request path and
+drain throughput into MongoDB.
+
+Uses mongomock when installed, otherwise the MongoDB at MONGODB_URL.
+    python benchmarks/bench_audit_spool.py [records] [concurrency]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.audit.spool import AuditSpool, SpooledAuditSink
+from shared.models.audit_log import AuditLog
+
+
+class AsyncMongomockCollection:
+    """Async facade over a mongomock collection, close enough to Motor for the drainer."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def insert_one(self, doc):
+        return self.collection.insert_one(doc)
+
+    async def insert_many(self, docs, ordered=True):
+        return self.collection.insert_many(docs, ordered=ordered)
+
+    async def count_documents(self, query):
+        return self.collection.count_documents(query)
+
+    async def drop(self):
+        self.collection.drop()
+
+
+def get_collection():
+    try:
+        import mongomock
+        print("Backend: mongomock")
+        return AsyncMongomockCollection(mongomock.MongoClient().bench.audit_logs)
+    except ImportError:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+        print(f"Backend: {url}")
+        return AsyncIOMotorClient(url).zubaschool_bench.audit_logs
+
+
+def make_log(n):
+    return AuditLog(
+        tenant_id="t1", user_id="u1", action="CreateTenant",
+        details={"school_name": f"School {n}"}, created_at=datetime.utcnow(),
+    )
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+async def timed(coro, latencies):
+    started = time.perf_counter()
+    await coro
+    latencies.append(time.perf_counter() - started)
+
+
+async def run_batches(factory, records, concurrency, latencies):
+    for start in range(0, records, concurrency):
+        await asyncio.gather(*[
+            timed(factory(n), latencies) for n in range(start, min(start + concurrency, records))
+        ])
+
+
+async def main(records, concurrency):
+    collection = get_collection()
+    await collection.drop()
+
+    direct = []
+    started = time.perf_counter()
+    await run_batches(lambda n: collection.insert_one(make_log(n).dict()), records, concurrency, direct)
+    direct_wall = time.perf_counter() - started
+    await collection.drop()
+
+    with tempfile.TemporaryDirectory() as spool_dir:
+        sink = SpooledAuditSink(AuditSpool(spool_dir), collection, drain_interval=60)
+        spooled = []
+        started = time.perf_counter()
+        await run_batches(lambda n: sink.enqueue(make_log(n)), records, concurrency, spooled)
+        enqueue_wall = time.perf_counter() - started
+        sink._task.cancel()
+
+        started = time.perf_counter()
+        await sink.drain()
+        drain_wall = time.perf_counter() - started
+        fsyncs = sink.spool.fsyncs
+        sink.spool.close()
+
+    count = await collection.count_documents({})
+    print(f"{records} records, {concurrency} concurrent requests")
+    print(f"insert_one per request: p50 {percentile(direct, .5) * 1e3:.3f} ms  p99 {percentile(direct, .99) * 1e3:.3f} ms  {records / direct_wall:,.0f}/s")
+    print(f"spool enqueue:          p50 {percentile(spooled, .5) * 1e3:.3f} ms  p99 {percentile(spooled, .99) * 1e3:.3f} ms  {records / enqueue_wall:,.0f}/s  ({fsyncs} fsyncs)")
+    print(f"spool drain:            {records / drain_wall:,.0f} records/s  ({count} documents in collection)")
+
+
+if __name__ == "__main__":
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(main(records, concurrency))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for get_current_user: per-call cost of authenticating the
+same bearer token with the verified-token cache disabled and enabled.
+    python benchmarks/bench_auth.py [iterations]
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-jwt-secret-at-least-32-bytes")
+
+import jwt
+
+from shared.auth import dependencies
+from shared.config import get_settings
+from shared.auth.token_cache import TokenCache
+
+
+async def run(iterations, header):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await dependencies.get_current_user(header)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    token = jwt.encode(
+        {"sub": str(uuid.uuid4()), "role": "sysadmin", "email": "admin@zuba.school", "exp": int(time.time()) + 3600},
+        get_settings().supabase_jwt_secret,
+    )
+    header = f"Bearer {token}"
+
+    results = {}
+    for label, cache in (("uncached", TokenCache(maxsize=0)), ("cached", TokenCache())):
+        dependencies.token_cache = cache
+        results[label] = asyncio.run(run(iterations, header))
+        print(f"{label:>9}: {results[label] * 1e6:7.2f} us/call  {cache.stats()}")
+    print(f"  speedup: {results['uncached'] / results['cached']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
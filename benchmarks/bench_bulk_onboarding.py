@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk tenant onboarding against looping over POST /tenants.
+
+Runs the user management app in-process against the stub PostgREST server
+from the test suite, with a fixed per-request latency standing in for the
+Supabase round trip. Audit logs go to an in-memory collection.
+    python benchmarks/bench_bulk_onboarding.py [tenants] [latency_ms]
+"""
+import asyncio
+import dataclasses
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from conftest import FakeCollection, StubPostgrestHandler  # noqa: E402  (also sets test env defaults)
+
+import httpx  # noqa: E402
+import jwt  # noqa: E402
+
+import shared.audit.sink  # noqa: E402
+import shared.config  # noqa: E402
+import shared.database.postgrest  # noqa: E402
+from services.user_management.main import app  # noqa: E402
+
+
+def start_stub(latency):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubPostgrestHandler)
+    server.daemon_threads = True
+    server.delay = latency
+    server.tables = {}
+    server.requests = []
+    server.reject = lambda row: False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def payload(n):
+    return {
+        "school_name": f"School {n}",
+        "address": None,
+        "contact_email": f"head{n}@district.school",
+        "contact_phone": None,
+        "principal_name": None,
+        "subscription_plan_id": str(uuid.uuid4()),
+        "branding_config": {},
+    }
+
+
+async def main(count, latency):
+    server = start_stub(latency)
+    shared.config._settings = dataclasses.replace(
+        shared.config.get_settings(), supabase_url=f"http://127.0.0.1:{server.server_port}"
+    )
+    shared.audit.sink._sink = shared.audit.sink.AuditSink(FakeCollection())
+    token = jwt.encode({"sub": str(uuid.uuid4()), "role": "sysadmin"}, os.environ["SUPABASE_JWT_SECRET"])
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        started = time.perf_counter()
+        for n in range(count):
+            response = await client.post("/tenants", json=payload(n), headers=headers)
+            assert response.status_code == 200, response.text
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = await client.post("/tenants/bulk", json=[payload(n) for n in range(count)], headers=headers)
+        bulk = time.perf_counter() - started
+        assert response.json()["created"] == count, response.text
+
+    await shared.database.postgrest.close_async_postgrest()
+    await shared.audit.sink.close_audit_sink()
+    server.shutdown()
+    print(f"{count} tenants, {latency * 1e3:.0f} ms simulated Supabase latency")
+    print(f"POST /tenants in a loop: {single:.2f}s")
+    print(f"POST /tenants/bulk:      {bulk:.2f}s  ({single / bulk:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    latency = float(sys.argv[2]) / 1e3 if len(sys.argv) > 2 else 0.01
+    asyncio.run(main(count, latency))
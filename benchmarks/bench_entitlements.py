@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for feature checks: the cost of the require_feature
+dependency (engine lookup plus bit test, no database) and of a bare
+EntitlementEngine lookup, over a synthetic set of plans and tenants.
+    python benchmarks/bench_entitlements.py [tenants] [checks]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+
+from shared.entitlements import engine as entitlements
+from shared.entitlements.dependencies import require_feature
+
+FEATURES = [f"feature_{n}" for n in range(40)]
+
+
+def make_snapshot(tenants, rng):
+    plans = [
+        {"plan_id": str(uuid.uuid4()), "features": [{"name": f} for f in rng.sample(FEATURES, 20)],
+         "max_users": 100 * n, "max_storage_mb": 1024 * n}
+        for n in range(1, 9)
+    ]
+    rows = [
+        {"tenant_id": str(uuid.uuid4()), "subscription_plan_id": rng.choice(plans)["plan_id"], "status": "Active"}
+        for _ in range(tenants)
+    ]
+    return plans, rows
+
+
+async def run_dependency(check, tenant_ids):
+    denied = 0
+    start = time.perf_counter()
+    for tenant_id in tenant_ids:
+        try:
+            await check(tenant_id, None)
+        except HTTPException:
+            denied += 1
+    return time.perf_counter() - start, denied
+
+
+def main():
+    tenants = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    checks = int(sys.argv[2]) if len(sys.argv) > 2 else 500000
+    rng = random.Random(7)
+    plans, rows = make_snapshot(tenants, rng)
+
+    engine = entitlements._engine = entitlements.EntitlementEngine(refresh_seconds=3600)
+    start = time.perf_counter()
+    engine.sync(plans, rows)
+    print(f"   compile: {(time.perf_counter() - start) * 1e3:7.1f} ms for {len(plans)} plans, {tenants} tenants")
+
+    tenant_ids = [rng.choice(rows)["tenant_id"] for _ in range(checks)]
+    bit = entitlements.feature_bit("feature_3")
+    start = time.perf_counter()
+    allowed = sum(1 for tenant_id in tenant_ids if engine.get(tenant_id).features & bit)
+    elapsed = time.perf_counter() - start
+    print(f"    lookup: {elapsed / checks * 1e6:7.3f} us/check  {checks / elapsed:>12,.0f} checks/s  ({allowed} allowed)")
+
+    elapsed, denied = asyncio.run(run_dependency(require_feature("feature_3"), tenant_ids))
+    print(f"dependency: {elapsed / checks * 1e6:7.3f} us/check  {checks / elapsed:>12,.0f} checks/s  ({denied} denied)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of each service's app module, python -X importtime
+style: total import time, the most expensive top-level packages, and the
+time spent in the repo's own modules. Each import runs in a fresh
+interpreter with no database settings, like a cold pod start.
+    python benchmarks/bench_import_time.py [runs]
+"""
+import os
+import statistics
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from test_import_time import APPS, import_profile  # noqa: E402
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for app in APPS:
+        profiles = [import_profile(app)[0] for _ in range(runs)]
+        totals = [profile[app][1] for profile in profiles]
+        own = [sum(s for name, (s, _) in profile.items() if name.startswith(("shared", "services"))) for profile in profiles]
+        print(f"{app}: median {statistics.median(totals) * 1000:.0f}ms over {runs} runs "
+              f"(own modules {statistics.median(own) * 1000:.1f}ms self time)")
+        last = profiles[-1]
+        top = sorted(((c, name) for name, (_, c) in last.items() if "." not in name), reverse=True)[:8]
+        for cumulative, name in top:
+            print(f"  {cumulative * 1000:8.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
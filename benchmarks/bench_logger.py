@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Per-call cost of logging on the request path: a plain synchronous
+FileHandler writing JSON lines versus the queue-backed pipeline in
+shared.utils.logger, which only filters and enqueues on the calling thread.
+Also times the cost of a suppressed duplicate error. Caller CPU time
+excludes the listener thread's formatting and writing, which in a server
+happens off the event loop.
+    python benchmarks/bench_logger.py [calls]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.utils.logger import JsonFormatter, LogPipeline, default_handlers
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(f"bench.{name}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def per_call(logger, calls, level=logging.INFO):
+    """Wall time and calling-thread CPU time per call, in seconds."""
+    wall, cpu = time.perf_counter(), time.thread_time()
+    for n in range(calls):
+        logger.log(level, "Tenant %s onboarded", n, extra={"tenant_id": n})
+    return (time.perf_counter() - wall) / calls, (time.thread_time() - cpu) / calls
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as directory:
+        sync_handler = logging.FileHandler(os.path.join(directory, "sync.log"))
+        sync_handler.setFormatter(JsonFormatter())
+        sync = per_call(make_logger("sync", sync_handler), calls)
+        sync_handler.close()
+
+        handlers = [h for h in default_handlers(directory) if isinstance(h, logging.FileHandler)]
+        pipeline = LogPipeline(handlers, queue_size=calls * 2)
+        queued_logger = make_logger("queued", pipeline.handler)
+        queued = per_call(queued_logger, calls)
+        pipeline.stop()
+
+        pipeline = LogPipeline(handlers, queue_size=calls * 2)
+        suppressed = per_call(make_logger("storm", pipeline.handler), calls, logging.ERROR)
+        pipeline.stop()
+
+    print("                          wall us/call   caller CPU us/call")
+    for label, (wall, cpu) in (("synchronous FileHandler", sync), ("queued pipeline", queued),
+                               ("suppressed duplicate", suppressed)):
+        print(f"{label:<24}  {wall * 1e6:12.2f}   {cpu * 1e6:18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Measure the per-request overhead of MetricsMiddleware by driving a trivial
+ASGI app directly, with and without the middleware in front of it.
+    python benchmarks/bench_metrics.py [requests]
+"""
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.metrics.middleware import MetricsMiddleware
+
+ROUTE = SimpleNamespace(path="/plans/{plan_id}")
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = ROUTE
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/plans/1"}, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    bare = asyncio.run(run(endpoint, requests))
+    wrapped = asyncio.run(run(MetricsMiddleware(endpoint), requests))
+    print(f"   bare: {bare * 1e6:6.2f} us/request")
+    print(f"metrics: {wrapped * 1e6:6.2f} us/request")
+    print(f"overhead: {(wrapped - bare) * 1e6:6.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
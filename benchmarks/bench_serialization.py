@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for response serialization: per-response cost of building a
+TenantResponse from a row and having FastAPI validate and serialize it again
+through response_model into a JSONResponse, against the FAST_SERIALIZATION
+path (one validation, rendered by pydantic-core), for a small and a large
+branding_config.
+    python benchmarks/bench_serialization.py [responses]
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from services.user_management.main import app
+from services.user_management.models.tenant import TenantResponse
+from shared.utils import serialization
+
+
+def make_row(branding_config):
+    return {
+        "tenant_id": str(uuid.uuid4()),
+        "school_name": "Kibera Primary",
+        "address": "Nairobi",
+        "contact_email": "head@kibera.school",
+        "contact_phone": None,
+        "principal_name": "A. Otieno",
+        "subscription_plan_id": str(uuid.uuid4()),
+        "branding_config": branding_config,
+        "status": "Active",
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+
+BRANDING = {
+    "small": {"color": "#123456"},
+    "large": {
+        "theme": {f"palette_{n}": {"primary": f"#{n:06x}", "weights": list(range(20))} for n in range(200)},
+        "pages": [{"title": f"Page {n}", "blocks": ["Elimu ni ufunguo wa maisha"] * 10} for n in range(50)],
+    },
+}
+
+
+async def model_path(field, row):
+    content = await serialize_response(field=field, response_content=TenantResponse(**row))
+    return JSONResponse(content).body
+
+
+async def fast_path(field, row):
+    return serialization.respond(TenantResponse, row).body
+
+
+async def measure(path, field, row, responses):
+    start = time.perf_counter()
+    for _ in range(responses):
+        body = await path(field, row)
+    return (time.perf_counter() - start) / responses, len(body)
+
+
+def main():
+    responses = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    route = next(r for r in app.routes if getattr(r, "path", None) == "/tenants" and "POST" in r.methods)
+    serialization.FAST_SERIALIZATION = True
+    for size, branding in BRANDING.items():
+        row = make_row(branding)
+        slow, length = asyncio.run(measure(model_path, route.response_field, row, responses))
+        fast, _ = asyncio.run(measure(fast_path, route.response_field, row, responses))
+        print(f"{size:>5} ({length:>7,} bytes): response_model {slow * 1e6:9.1f} us   "
+              f"fast {fast * 1e6:9.1f} us   {slow / fast:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
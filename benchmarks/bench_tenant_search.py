@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the tenant search index: per-query latency of type-ahead
+queries (1 to 6 characters typed, infix and multi-term) over a synthetic
+directory of schools, plus the cost of building the index and of a refresh
+that finds nothing changed.
+    python benchmarks/bench_tenant_search.py [tenants] [queries]
+"""
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.user_management.search import TenantSearchIndex
+
+PLACES = ["Kibera", "Nakuru", "Kisumu", "Mombasa", "Eldoret", "Thika", "Nyeri", "Machakos", "Malindi",
+          "Garissa", "Kitale", "Kericho", "Naivasha", "Embu", "Meru", "Lamu", "Voi", "Narok", "Bungoma"]
+KINDS = ["Primary", "Secondary", "Academy", "Girls", "Boys", "Mixed", "High", "Day", "Boarding", "Junior"]
+NAMES = ["Otieno", "Wanjiru", "Kamau", "Achieng", "Mwangi", "Njeri", "Odhiambo", "Chebet", "Kiprono", "Atieno"]
+QUERIES = ["k", "ki", "kib", "kibe", "kiber", "kibera", "bera", "nakuru gir", "otieno", "achieng",
+           "mombasa acad", "st", "school", "zzz", "embu da"]
+
+
+def make_rows(n, rng):
+    return [
+        {
+            "tenant_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "school_name": f"{rng.choice(PLACES)} {rng.choice(['St.', 'Hill', 'Valley', 'Central', ''])} "
+                           f"{rng.choice(KINDS)} School {i}",
+            "principal_name": f"{rng.choice('ABCDEFGHJK')}. {rng.choice(NAMES)}",
+            "contact_email": f"office{i}@{rng.choice(PLACES).lower()}.sc.ke",
+            "subscription_plan_id": None,
+            "status": "Active",
+            "created_at": "2026-01-01T00:00:00",
+        }
+        for i in range(n)
+    ]
+
+
+def main():
+    tenants = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rows = make_rows(tenants, random.Random(42))
+
+    index = TenantSearchIndex()
+    start = time.perf_counter()
+    index.sync(rows)
+    print(f"   build: {(time.perf_counter() - start) * 1e3:7.1f} ms for {tenants} tenants  {index.stats()}")
+    start = time.perf_counter()
+    index.sync(rows)
+    print(f" resync: {(time.perf_counter() - start) * 1e3:7.1f} ms (no changes)")
+
+    worst = 0.0
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            hits = index.search(query, 20)
+        per_query = (time.perf_counter() - start) / iterations
+        worst = max(worst, per_query)
+        print(f"{query!r:>16}: {per_query * 1e6:8.1f} us/query  {len(hits)} hits")
+    print(f"   worst: {worst * 1e6:8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,11 @@ CREATE TABLE public.tenants (
     status VARCHAR(20) DEFAULT 'Active'
 );
 
+-- Keyset pagination for GET /tenants: newest first, optionally filtered
+CREATE INDEX tenants_created_keyset ON public.tenants (created_at DESC, tenant_id DESC);
+CREATE INDEX tenants_status_created ON public.tenants (status, created_at DESC, tenant_id DESC);
+CREATE INDEX tenants_plan_created ON public.tenants (subscription_plan_id, created_at DESC, tenant_id DESC);
+
 -- Enable RLS
 ALTER TABLE public.tenants ENABLE ROW LEVEL SECURITY;
 CREATE POLICY sysadmin_access ON public.tenants
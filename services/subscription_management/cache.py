@@ -0,0 +1,15 @@
+from typing import Optional
+from shared.utils.cache import TTLCache
+import os
+
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", "300"))
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "256"))
+
+# Keyed by plan_id, plus ALL_PLANS for the full listing.
+plan_cache = TTLCache(maxsize=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL, name="plans")
+ALL_PLANS = "*"
+
+
+def drop_plans(plan_id: Optional[str], plan: Optional[dict]) -> None:
+    """Invalidation bus handler: a plan changed on another worker."""
+    plan_cache.invalidate()
\ No newline at end of file
@@ -1,9 +1,68 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from .routes import plans
+from .cache import drop_plans
+from shared.database.postgrest import get_async_postgrest, close_async_postgrest
+from shared.database.mongodb import close_mongo_client
+from shared.audit.sink import get_audit_sink, close_audit_sink
+from shared.jobs.queue import get_job_queue, close_job_queue
+from shared.jobs.routes import router as jobs_router
+from shared.entitlements.engine import rebind_plan, rebind_tenant
+from shared.idempotency.manager import get_idempotency, close_idempotency
+from shared.invalidation.bus import PLANS, TENANTS, get_invalidation_bus, close_invalidation_bus
+from shared.idempotency.middleware import IdempotencyMiddleware
+from shared.metrics.middleware import MetricsMiddleware
+from shared.ratelimit.limiter import get_rate_limiter, close_rate_limiter
+from shared.ratelimit.middleware import AdmissionMiddleware, RateLimitMiddleware
+from shared.metrics.profiler import close_profiler
+from shared.metrics.timing import ServerTimingMiddleware
+from shared.metrics.routes import router as metrics_router
+from shared.health.routes import router as health_router
+from shared.utils.logger import RequestIdMiddleware, log_system_event, stop_logging
 
-app = FastAPI(title="ZubaSchool Subscription Management Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Clients are created here rather than at import, and their pools are
+    drained and closed on shutdown once the background workers have stopped.
+    """
+    get_async_postgrest()
+    get_audit_sink().start()
+    await get_job_queue().store.ensure_indexes()
+    get_job_queue().start()
+    await get_idempotency().store.ensure_indexes()
+    await get_rate_limiter().store.ensure_indexes()
+    bus = get_invalidation_bus()
+    bus.subscribe(PLANS, drop_plans)
+    bus.subscribe(PLANS, rebind_plan)
+    bus.subscribe(TENANTS, rebind_tenant)
+    await bus.transport.ensure_collection()
+    bus.start()
+    log_system_event("STARTUP", f"{app.title} started")
+    yield
+    await close_job_queue()
+    await close_invalidation_bus()
+    close_idempotency()
+    close_rate_limiter()
+    await close_audit_sink()
+    await close_async_postgrest()
+    close_mongo_client()
+    close_profiler()
+    log_system_event("SHUTDOWN", f"{app.title} stopped")
+    stop_logging()
+
+app = FastAPI(title="ZubaSchool Subscription Management Service", lifespan=lifespan)
+app.add_middleware(IdempotencyMiddleware, paths=("/plans",))
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(plans.router, prefix="/plans")
+app.include_router(jobs_router, prefix="/jobs")
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,37 @@
+from pydantic import BaseModel, UUID4
+from typing import Optional, List
+from datetime import datetime
+
+class Feature(BaseModel):
+    name: str
+    description: Optional[str] = None
+    enabled: bool = True
+
+class SubscriptionPlanCreate(BaseModel):
+    name: str
+    description: Optional[str]
+    price_monthly: float
+    price_yearly: Optional[float]
+    features: List[Feature]
+    max_users: int
+    max_storage_mb: int
+
+class SubscriptionPlanResponse(BaseModel):
+    plan_id: UUID4
+    name: str
+    description: Optional[str]
+    price_monthly: float
+    price_yearly: Optional[float]
+    features: List[Feature]
+    max_users: int
+    max_storage_mb: int
+    created_at: datetime
+
+class SubscriptionPlanUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price_monthly: Optional[float] = None
+    price_yearly: Optional[float] = None
+    features: Optional[List[Feature]] = None
+    max_users: Optional[int] = None
+    max_storage_mb: Optional[int] = None
\ No newline at end of file
@@ -1,26 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import BaseModel, UUID4
 from typing import List
 import uuid
 from datetime import datetime
-from shared.database.supabase import get_supabase_client
-from shared.database.mongodb import db
+from shared.database.postgrest import get_postgrest, PostgrestSession
+from shared.audit.sink import get_audit_sink
 from shared.models.audit_log import AuditLog
 from shared.auth.dependencies import get_current_user
-from ..models.plan import SubscriptionPlanCreate, SubscriptionPlanResponse, Feature
-from supabase import Client
+from shared.entitlements.engine import get_entitlement_engine
+from shared.invalidation.bus import PLANS, get_invalidation_bus
+from shared.utils.cache import etag_matches
+from shared.utils.serialization import respond
+from ..models.plan import SubscriptionPlanCreate, SubscriptionPlanResponse, SubscriptionPlanUpdate, Feature
+from ..cache import plan_cache, ALL_PLANS
+from shared.metrics.timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("", response_model=SubscriptionPlanResponse)
 async def create_subscription_plan(
     plan: SubscriptionPlanCreate,
     user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client)
+    postgrest: PostgrestSession = Depends(get_postgrest)
 ):
     """
     Create a subscription plan (system admin only).
-    Stores plan in Supabase public.subscription_plans and logs action in MongoDB.
+    Stores plan in Supabase public.subscription_plans and queues an audit log for MongoDB.
     """
     plan_id = uuid.uuid4()
     data = {
@@ -35,18 +40,99 @@ async def create_subscription_plan(
         "created_at": datetime.utcnow().isoformat()
     }
     
-    response = supabase.table("subscription_plans").insert(data).execute()
+    response = await postgrest.table("subscription_plans").insert(data).execute()
     
     if not response.data:
         raise HTTPException(status_code=400, detail="Failed to create plan")
+    plan_cache.invalidate()
+    get_entitlement_engine().set_plan(response.data[0])
+    await get_invalidation_bus().publish(PLANS, str(plan_id), response.data[0])
     
     audit_log = AuditLog(
         tenant_id=None,
-        user_id=uuid.UUID(user["id"]),
+        user_id=str(uuid.UUID(user["id"])),
         action="CreateSubscriptionPlan",
         details={"plan_id": str(plan_id), "name": plan.name},
         created_at=datetime.utcnow()
     )
-    await db.audit_logs.insert_one(audit_log.dict())
+    await get_audit_sink().enqueue(audit_log)
     
-    return SubscriptionPlanResponse(**response.data[0])
\ No newline at end of file
+    return respond(SubscriptionPlanResponse, response.data[0])
+
+@router.patch("/{plan_id}", response_model=SubscriptionPlanResponse)
+async def update_subscription_plan(
+    plan_id: UUID4,
+    plan: SubscriptionPlanUpdate,
+    user: dict = Depends(get_current_user),
+    postgrest: PostgrestSession = Depends(get_postgrest)
+):
+    """
+    Update a subscription plan (system admin only) and invalidate cached plans.
+    """
+    data = plan.dict(exclude_unset=True)
+    if not data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    
+    response = await postgrest.table("subscription_plans").update(data).eq("plan_id", str(plan_id)).execute()
+    
+    if not response.data:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    plan_cache.invalidate()
+    get_entitlement_engine().set_plan(response.data[0])
+    await get_invalidation_bus().publish(PLANS, str(plan_id), response.data[0])
+    
+    audit_log = AuditLog(
+        tenant_id=None,
+        user_id=str(uuid.UUID(user["id"])),
+        action="UpdateSubscriptionPlan",
+        details={"plan_id": str(plan_id), "fields": sorted(data)},
+        created_at=datetime.utcnow()
+    )
+    await get_audit_sink().enqueue(audit_log)
+    
+    return respond(SubscriptionPlanResponse, response.data[0])
+
+@router.get("", response_model=List[SubscriptionPlanResponse])
+async def list_subscription_plans(
+    request: Request,
+    response: Response,
+    user: dict = Depends(get_current_user),
+    postgrest: PostgrestSession = Depends(get_postgrest)
+):
+    """
+    List subscription plans from the in-process cache, loading from Supabase on a miss.
+    Honours If-None-Match with 304 Not Modified.
+    """
+    async def load():
+        result = await postgrest.table("subscription_plans").select("*").order("name").execute()
+        return result.data
+    
+    plans, etag = await plan_cache.get_or_load(ALL_PLANS, load)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return respond(List[SubscriptionPlanResponse], plans, headers={"ETag": etag})
+
+@router.get("/{plan_id}", response_model=SubscriptionPlanResponse)
+async def get_subscription_plan(
+    plan_id: UUID4,
+    request: Request,
+    response: Response,
+    user: dict = Depends(get_current_user),
+    postgrest: PostgrestSession = Depends(get_postgrest)
+):
+    """
+    Fetch one subscription plan from the in-process cache, loading from Supabase on a miss.
+    Honours If-None-Match with 304 Not Modified.
+    """
+    async def load():
+        result = await postgrest.table("subscription_plans").select("*").eq("plan_id", str(plan_id)).execute()
+        return result.data[0] if result.data else None
+    
+    plan, etag = await plan_cache.get_or_load(str(plan_id), load)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return respond(SubscriptionPlanResponse, plan, headers={"ETag": etag})
\ No newline at end of file
@@ -1,9 +1,93 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from .routes.tenants import router as tenants_router
+from .search import reindex_tenant
+from shared.database.postgrest import get_async_postgrest, close_async_postgrest
+from shared.database.mongodb import close_mongo_client
+from shared.audit.sink import get_audit_sink, close_audit_sink
+from shared.jobs.queue import get_job_queue, close_job_queue
+from shared.jobs.routes import router as jobs_router
+from shared.entitlements.engine import rebind_plan, rebind_tenant
+from shared.idempotency.manager import get_idempotency, close_idempotency
+from shared.invalidation.bus import PLANS, TENANTS, get_invalidation_bus, close_invalidation_bus
+from shared.idempotency.middleware import IdempotencyMiddleware
+from shared.metrics.middleware import MetricsMiddleware
+from shared.ratelimit.limiter import get_rate_limiter, close_rate_limiter
+from shared.ratelimit.middleware import AdmissionMiddleware, RateLimitMiddleware
+from shared.metrics.profiler import close_profiler
+from shared.metrics.timing import ServerTimingMiddleware
+from shared.metrics.routes import router as metrics_router
+from shared.health.routes import router as health_router
+from shared.utils.logger import RequestIdMiddleware, log_system_event, stop_logging
+from shared.audit.query import ensure_audit_indexes
+from shared.audit.rollup import get_audit_rollup, close_audit_rollup
+from shared.audit.archive import get_audit_archive, close_audit_archive
+from shared.audit.chain import get_audit_chain, close_audit_chain
+from shared.audit.verify import get_audit_verifier, close_audit_verifier
+from shared.audit.routes import router as audit_router, get_audit_collection
+from shared.metering.meter import get_usage_meter, close_usage_meter
+from shared.metering.routes import router as usage_router
 
-app = FastAPI(title="ZubaSchool User Management Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Clients are created here rather than at import, and their pools are
+    drained and closed on shutdown once the background workers have stopped.
+    """
+    get_async_postgrest()
+    get_audit_sink().start()
+    await get_job_queue().store.ensure_indexes()
+    get_job_queue().start()
+    await get_idempotency().store.ensure_indexes()
+    await get_rate_limiter().store.ensure_indexes()
+    bus = get_invalidation_bus()
+    bus.subscribe(TENANTS, reindex_tenant)
+    bus.subscribe(TENANTS, rebind_tenant)
+    bus.subscribe(PLANS, rebind_plan)
+    await bus.transport.ensure_collection()
+    bus.start()
+    await ensure_audit_indexes(get_audit_collection())
+    await get_audit_rollup().ensure_indexes()
+    get_audit_rollup().start()
+    await get_audit_chain().ensure_indexes()
+    get_audit_chain().start()
+    await get_audit_verifier().ensure_indexes()
+    get_audit_verifier().start()
+    if get_audit_archive() is not None:
+        get_audit_archive().start()
+    await get_usage_meter().start()
+    log_system_event("STARTUP", f"{app.title} started")
+    yield
+    await close_job_queue()
+    await close_invalidation_bus()
+    await close_usage_meter()
+    await close_audit_rollup()
+    await close_audit_archive()
+    await close_audit_chain()
+    await close_audit_verifier()
+    close_idempotency()
+    close_rate_limiter()
+    await close_audit_sink()
+    await close_async_postgrest()
+    close_mongo_client()
+    close_profiler()
+    log_system_event("SHUTDOWN", f"{app.title} stopped")
+    stop_logging()
+
+app = FastAPI(title="ZubaSchool User Management Service", lifespan=lifespan)
+app.add_middleware(IdempotencyMiddleware, paths=("/tenants", "/tenants/bulk", "/tenants/import"))
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(tenants_router, prefix="/tenants")
+app.include_router(audit_router, prefix="/audit-logs")
+app.include_router(jobs_router, prefix="/jobs")
+app.include_router(usage_router, prefix="/usage")
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 @app.get("/health")
 async def health_check():
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, UUID4
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Literal
 from datetime import datetime
 
 class TenantCreate(BaseModel):
@@ -21,4 +21,38 @@ class TenantResponse(BaseModel):
     subscription_plan_id: UUID4
     branding_config: Dict
     created_at: datetime
-    status: str
\ No newline at end of file
+    status: str
+
+class BulkTenantResult(BaseModel):
+    index: int
+    status: Literal["created", "invalid", "failed"]
+    tenant_id: Optional[UUID4] = None
+    error: Optional[str] = None
+
+class BulkTenantResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkTenantResult]
+
+class TenantPage(BaseModel):
+    items: List[TenantResponse]
+    next_cursor: Optional[str] = None
+
+class TenantSummary(BaseModel):
+    tenant_id: UUID4
+    school_name: str
+    principal_name: Optional[str] = None
+    contact_email: Optional[str] = None
+    subscription_plan_id: Optional[UUID4] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class TenantSearchResponse(BaseModel):
+    items: List[TenantSummary]
+
+class TenantEntitlements(BaseModel):
+    tenant_id: UUID4
+    plan_id: Optional[UUID4] = None
+    features: List[str]
+    max_users: Optional[int] = None
+    max_storage_mb: Optional[int] = None
\ No newline at end of file
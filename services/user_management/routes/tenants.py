@@ -1,29 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel, EmailStr, ValidationError
+from postgrest.exceptions import APIError
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+import asyncio
+import base64
+import httpx
+import json
+import os
 import uuid
 from datetime import datetime
-from shared.database.supabase import get_supabase_client
-from shared.database.mongodb import db
+from shared.database.postgrest import get_postgrest, get_async_postgrest, PoolExhaustedError, PostgrestSession
+from shared.audit.sink import get_audit_sink
 from shared.models.audit_log import AuditLog
 from shared.auth.dependencies import get_current_user
-from ..models.tenant import TenantCreate, TenantResponse
-from supabase import Client
+from shared.entitlements.dependencies import get_tenant_entitlements
+from shared.entitlements.engine import get_entitlement_engine
+from shared.jobs.queue import JobContext, get_job_queue, job_handler
+from shared.models.job import Job
+from ..models.tenant import TenantCreate, TenantResponse, BulkTenantResult, BulkTenantResponse, TenantPage, TenantSearchResponse, TenantSummary, TenantEntitlements
+from ..search import get_tenant_index
+from shared.invalidation.bus import TENANTS, get_invalidation_bus
+from shared.metrics.timing import TimedRoute
+from shared.utils.serialization import respond
 
-router = APIRouter()
+TENANT_BULK_MAX_ITEMS = int(os.getenv("TENANT_BULK_MAX_ITEMS", "5000"))
+TENANT_BULK_CHUNK_SIZE = int(os.getenv("TENANT_BULK_CHUNK_SIZE", "250"))
+# Import payloads are stored in a single job document (16MB BSON limit).
+TENANT_IMPORT_MAX_BYTES = int(os.getenv("TENANT_IMPORT_MAX_BYTES", str(8 * 1024 * 1024)))
 
-@router.post("", response_model=TenantResponse)
-async def create_tenant(
-    tenant: TenantCreate,
-    user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client)
-):
-    """
-    Create a new tenant (school) in Supabase public.tenants table.
-    Requires sysadmin role.
-    """
-    tenant_id = uuid.uuid4()
-    data = {
+router = APIRouter(route_class=TimedRoute)
+
+def tenant_row(tenant: TenantCreate, tenant_id: uuid.UUID) -> dict:
+    return {
         "tenant_id": str(tenant_id),
         "school_name": tenant.school_name,
         "address": tenant.address,
@@ -35,19 +43,275 @@ async def create_tenant(
         "status": "Active",
         "created_at": datetime.utcnow().isoformat()
     }
+
+def create_tenant_audit_log(user: dict, tenant: TenantCreate, tenant_id: uuid.UUID) -> AuditLog:
+    return AuditLog(
+        tenant_id=str(tenant_id),
+        user_id=str(uuid.UUID(user["id"])),
+        action="CreateTenant",
+        details={"school_name": tenant.school_name, "tenant_id": str(tenant_id)},
+        created_at=datetime.utcnow()
+    )
+
+@router.post("", response_model=TenantResponse)
+async def create_tenant(
+    tenant: TenantCreate,
+    user: dict = Depends(get_current_user),
+    postgrest: PostgrestSession = Depends(get_postgrest)
+):
+    """
+    Create a new tenant (school) in Supabase public.tenants table.
+    Requires sysadmin role.
+    """
+    tenant_id = uuid.uuid4()
+    data = tenant_row(tenant, tenant_id)
     
-    response = supabase.table("tenants").insert(data).execute()
+    response = await postgrest.table("tenants").insert(data).execute()
     
     if not response.data:
         raise HTTPException(status_code=400, detail="Failed to create tenant")
     
-    audit_log = AuditLog(
+    await get_audit_sink().enqueue(create_tenant_audit_log(user, tenant, tenant_id))
+    get_tenant_index().upsert(response.data[0])
+    get_entitlement_engine().set_tenant(response.data[0])
+    await get_invalidation_bus().publish(TENANTS, str(tenant_id), response.data[0])
+    
+    return respond(TenantResponse, response.data[0])
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps({"t": row["created_at"], "id": row["tenant_id"]})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode and validate a cursor; both values end up inside a PostgREST filter."""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        datetime.fromisoformat(position["t"])
+        return position["t"], str(uuid.UUID(position["id"]))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+@router.get("", response_model=TenantPage)
+async def list_tenants(
+    status: Optional[str] = None,
+    subscription_plan_id: Optional[uuid.UUID] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    user: dict = Depends(get_current_user),
+    postgrest: PostgrestSession = Depends(get_postgrest)
+):
+    """
+    List tenants, newest first, with keyset pagination (system admin only).
+    Pages are keyed on (created_at, tenant_id), so every page is an index
+    seek on tenants_created_keyset however deep it is.
+    """
+    query = postgrest.table("tenants").select("*")
+    if status is not None:
+        query = query.eq("status", status)
+    if subscription_plan_id is not None:
+        query = query.eq("subscription_plan_id", str(subscription_plan_id))
+    if cursor is not None:
+        created_at, tenant_id = decode_cursor(cursor)
+        query.params = query.params.add(
+            "or", f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",tenant_id.lt.{tenant_id}))'
+        )
+    query.params = query.params.add("order", "created_at.desc,tenant_id.desc")
+    rows = (await query.limit(limit + 1).execute()).data
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return respond(TenantPage, {"items": rows[:limit], "next_cursor": next_cursor})
+
+@router.get("/search", response_model=TenantSearchResponse)
+async def search_tenants(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    user: dict = Depends(get_current_user),
+    postgrest: PostgrestSession = Depends(get_postgrest)
+):
+    """
+    Type-ahead search over school name, principal and contact email
+    (system admin only). Answered from the in-process index; the first
+    search loads it from Supabase and later ones refresh it in the
+    background once it is older than TENANT_SEARCH_REFRESH_SECONDS.
+    """
+    index = get_tenant_index()
+    await index.ensure_fresh(postgrest)
+    return TenantSearchResponse(items=[TenantSummary(**doc) for doc in index.search(q, limit)])
+
+async def _bulk_items(request: Request) -> AsyncIterator[object]:
+    """Yield raw items from a JSON array body or, line by line, from an NDJSON stream."""
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+        if buffer.strip():
+            yield json.loads(buffer)
+        return
+    items = json.loads(await request.body())
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array of tenants")
+    for item in items:
+        yield item
+
+def _validate_item(item: object, results: List[BulkTenantResult], valid: List[Tuple[int, TenantCreate, uuid.UUID]],
+                   tenant_id: Optional[uuid.UUID] = None) -> None:
+    index = len(results)
+    try:
+        if not isinstance(item, dict):
+            raise ValueError("Expected a JSON object")
+        tenant = TenantCreate(**item)
+    except (ValidationError, ValueError) as e:
+        results.append(BulkTenantResult(index=index, status="invalid", error=str(e)))
+        return
+    tenant_id = tenant_id or uuid.uuid4()
+    results.append(BulkTenantResult(index=index, status="created", tenant_id=tenant_id))
+    valid.append((index, tenant, tenant_id))
+
+async def insert_tenants(
+    postgrest: PostgrestSession,
+    user: dict,
+    results: List[BulkTenantResult],
+    valid: List[Tuple[int, TenantCreate, uuid.UUID]],
+    progress: Optional[Callable[[int], Awaitable[None]]] = None
+) -> int:
+    """
+    Insert validated tenants in concurrent multi-row chunks, marking the items
+    of any chunk that fails in ``results``. Queues one audit log per created
+    tenant and returns how many were created.
+    """
+    done = 0
+
+    async def insert_chunk(chunk):
+        nonlocal done
+        try:
+            response = await postgrest.table("tenants").insert([tenant_row(t, tid) for _, t, tid in chunk]).execute()
+            if len(response.data) != len(chunk):
+                raise APIError({"message": "Insert returned an unexpected number of rows"})
+            for row in response.data:
+                get_tenant_index().upsert(row)
+                get_entitlement_engine().set_tenant(row)
+            # One message per chunk; other workers reload rather than apply each row.
+            await get_invalidation_bus().publish(TENANTS)
+        except (APIError, httpx.HTTPError, PoolExhaustedError) as e:
+            error = e.message if isinstance(e, APIError) else str(e)
+            for index, _, _ in chunk:
+                results[index] = BulkTenantResult(index=index, status="failed", error=error or repr(e))
+            chunk = []
+        done += 1
+        if progress is not None:
+            await progress(done)
+        return chunk
+
+    chunks = [valid[i:i + TENANT_BULK_CHUNK_SIZE] for i in range(0, len(valid), TENANT_BULK_CHUNK_SIZE)]
+    inserted = [entry for chunk in await asyncio.gather(*map(insert_chunk, chunks)) for entry in chunk]
+
+    await get_audit_sink().enqueue_many([create_tenant_audit_log(user, t, tid) for _, t, tid in inserted])
+    return len(inserted)
+
+@router.get("/{tenant_id}/entitlements", response_model=TenantEntitlements)
+async def read_tenant_entitlements(
+    tenant_id: uuid.UUID,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Features and quotas the tenant's plan grants, as enforced by
+    require_feature (system admin only).
+    """
+    entitlements = await get_tenant_entitlements(str(tenant_id))
+    return TenantEntitlements(
         tenant_id=tenant_id,
-        user_id=uuid.UUID(user["id"]),
-        action="CreateTenant",
-        details={"school_name": tenant.school_name, "tenant_id": str(tenant_id)},
-        created_at=datetime.utcnow()
+        plan_id=entitlements.plan_id,
+        features=sorted(entitlements.feature_names),
+        max_users=entitlements.max_users,
+        max_storage_mb=entitlements.max_storage_mb
     )
-    await db.audit_logs.insert_one(audit_log.dict())
-    
-    return TenantResponse(**response.data[0])
\ No newline at end of file
+
+@router.post("/bulk", response_model=BulkTenantResponse)
+async def create_tenants_bulk(
+    request: Request,
+    user: dict = Depends(get_current_user),
+    postgrest: PostgrestSession = Depends(get_postgrest)
+):
+    """
+    Create many tenants in one call from a JSON array or an NDJSON stream
+    (Content-Type: application/x-ndjson). Requires sysadmin role.
+    Valid items are inserted in chunked multi-row inserts; each item gets its
+    own result, so invalid items and failed chunks don't sink the rest.
+    """
+    results: List[BulkTenantResult] = []
+    valid: List[Tuple[int, TenantCreate, uuid.UUID]] = []
+    try:
+        async for item in _bulk_items(request):
+            if len(results) >= TENANT_BULK_MAX_ITEMS:
+                raise HTTPException(status_code=413, detail=f"At most {TENANT_BULK_MAX_ITEMS} tenants per request")
+            _validate_item(item, results, valid)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed request body: {e}")
+
+    created = await insert_tenants(postgrest, user, results, valid)
+
+    return BulkTenantResponse(
+        created=created,
+        failed=len(results) - created,
+        results=results
+    )
+
+@router.post("/import", response_model=Job, status_code=202)
+async def import_tenants(
+    request: Request,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Queue a tenant import as a background job and return it immediately.
+    Accepts the same bodies as /tenants/bulk, with the same item limit;
+    poll /jobs/{id} for progress. Requires sysadmin role.
+    """
+    if int(request.headers.get("content-length") or 0) > TENANT_IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Import bodies are limited to {TENANT_IMPORT_MAX_BYTES} bytes")
+    items = []
+    try:
+        async for item in _bulk_items(request):
+            if len(items) >= TENANT_BULK_MAX_ITEMS:
+                raise HTTPException(status_code=413, detail=f"At most {TENANT_BULK_MAX_ITEMS} tenants per request")
+            items.append(item)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed request body: {e}")
+    # Ids are fixed here so a retried job inserts the same tenants, not new ones.
+    payload = {"items": items, "tenant_ids": [str(uuid.uuid4()) for _ in items], "user": user}
+    return await get_job_queue().enqueue("tenants.import", payload, created_by=user["id"])
+
+async def _existing_tenant_ids(postgrest: PostgrestSession, tenant_ids: List[str]) -> set:
+    existing = set()
+    for start in range(0, len(tenant_ids), TENANT_BULK_CHUNK_SIZE):
+        chunk = tenant_ids[start:start + TENANT_BULK_CHUNK_SIZE]
+        rows = (await postgrest.table("tenants").select("tenant_id").in_("tenant_id", chunk).execute()).data
+        existing.update(str(row["tenant_id"]) for row in rows)
+    return existing
+
+@job_handler("tenants.import", max_attempts=3, concurrency=2)
+async def run_tenant_import(payload: dict, ctx: JobContext) -> dict:
+    results: List[BulkTenantResult] = []
+    valid: List[Tuple[int, TenantCreate, uuid.UUID]] = []
+    for item, tenant_id in zip(payload["items"], payload["tenant_ids"]):
+        _validate_item(item, results, valid, uuid.UUID(tenant_id))
+    postgrest = get_async_postgrest().for_user()
+    inserted = 0
+    if ctx.job.attempts > 1:
+        # An earlier attempt may have inserted some chunks already.
+        existing = await _existing_tenant_ids(postgrest, [str(tenant_id) for _, _, tenant_id in valid])
+        valid = [entry for entry in valid if str(entry[2]) not in existing]
+        inserted = len(existing)
+    chunks = max(1, -(-len(valid) // TENANT_BULK_CHUNK_SIZE))
+
+    async def progress(done: int) -> None:
+        await ctx.progress(done / chunks, f"{done}/{chunks} chunks inserted")
+
+    created = inserted + await insert_tenants(postgrest, payload["user"], results, valid, progress)
+    return {
+        "created": created,
+        "failed": len(results) - created,
+        "errors": [{"index": r.index, "status": r.status, "error": r.error} for r in results if r.status != "created"]
+    }
\ No newline at end of file
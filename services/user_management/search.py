@@ -0,0 +1,328 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from bisect import bisect_left, insort
+import asyncio
+import logging
+import os
+import re
+import time
+import unicodedata
+from shared.database.postgrest import fetch_all
+
+TENANT_SEARCH_REFRESH_SECONDS = float(os.getenv("TENANT_SEARCH_REFRESH_SECONDS", "60"))
+TENANT_SEARCH_PAGE_SIZE = int(os.getenv("TENANT_SEARCH_PAGE_SIZE", "1000"))
+
+# Fields searched, in ranking order: a school name hit beats a principal hit
+# beats an email hit.
+SEARCH_FIELDS = ("school_name", "principal_name", "contact_email")
+SUMMARY_COLUMNS = ("tenant_id", "school_name", "principal_name", "contact_email",
+                   "subscription_plan_id", "status", "created_at")
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents, so "Ecole" finds "École"."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(normalize(text)) if text else []
+
+
+def trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class TenantSearchIndex:
+    """
+    In-memory type-ahead index over tenant names, principals and emails.
+
+    Every field is split into tokens and each token keeps one posting set
+    of tenants per field. A sorted vocabulary answers prefix lookups with
+    two bisects, and trigram postings over the vocabulary answer infix
+    lookups ("bera" finds "Kibera"). A query matches a tenant when each of
+    its terms is a prefix of, or for terms of three or more characters
+    occurs inside, one of the tenant's tokens.
+
+    Results are ranked by how the longest term matched: field first (school
+    name, principal, email), then exact token, prefix, infix; ties go
+    alphabetically by school name. Tenants are numbered internally so every
+    step is a set operation, and each rank level is only computed if the
+    better ones didn't fill the page.
+
+    ``upsert`` and ``remove`` keep the index current as tenants are written
+    locally; ``sync`` diffs a full snapshot from Supabase against it so
+    changes made elsewhere show up after at most ``refresh_seconds``.
+    """
+
+    def __init__(self, refresh_seconds: float = TENANT_SEARCH_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.docs: Dict[str, dict] = {}
+        self._numbers: Dict[str, int] = {}
+        self._summaries: Dict[int, dict] = {}
+        self._doc_tokens: Dict[int, Dict[str, int]] = {}
+        self._order_keys: Dict[int, Tuple[str, int]] = {}
+        self._order: List[Tuple[str, int]] = []
+        self._next_number = 0
+        self._versions: Dict[str, int] = {}
+        self.version = 0
+        self._postings: Dict[str, Tuple[Set[int], ...]] = {}
+        self._vocabulary: List[str] = []
+        self._grams: Dict[str, Set[str]] = {}
+        self._bulk = False
+        self.refreshed_at: Optional[float] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.queries = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _add_token(self, token: str, doc: int, rank: int) -> None:
+        postings = self._postings.get(token)
+        if postings is None:
+            postings = self._postings[token] = tuple(set() for _ in SEARCH_FIELDS)
+            if not self._bulk:
+                insort(self._vocabulary, token)
+            for gram in trigrams(token):
+                self._grams.setdefault(gram, set()).add(token)
+        postings[rank].add(doc)
+
+    def _remove_token(self, token: str, doc: int, rank: int) -> None:
+        postings = self._postings[token]
+        postings[rank].discard(doc)
+        if not any(postings):
+            del self._postings[token]
+            if not self._bulk:
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+            for gram in trigrams(token):
+                tokens = self._grams[gram]
+                tokens.discard(token)
+                if not tokens:
+                    del self._grams[gram]
+
+    def _set_order_key(self, doc: int, key: Optional[Tuple[str, int]]) -> None:
+        old = self._order_keys.pop(doc, None)
+        if not self._bulk and old is not None:
+            del self._order[bisect_left(self._order, old)]
+        if key is not None:
+            self._order_keys[doc] = key
+            if not self._bulk:
+                insort(self._order, key)
+
+    def upsert(self, row: dict) -> bool:
+        """Add a tenant, or re-index it if it changed. Returns whether anything changed."""
+        tenant_id = str(row["tenant_id"])
+        current = self.docs.get(tenant_id)
+        if current == row:
+            return False
+        summary = {column: row.get(column) for column in SUMMARY_COLUMNS}
+        summary["tenant_id"] = tenant_id
+        if current == summary:
+            return False
+        doc = self._numbers.get(tenant_id)
+        if doc is None:
+            doc = self._numbers[tenant_id] = self._next_number
+            self._next_number += 1
+        tokens: Dict[str, int] = {}
+        for rank, field in enumerate(SEARCH_FIELDS):
+            for token in tokenize(summary[field]):
+                tokens.setdefault(token, rank)
+        old = self._doc_tokens.get(doc, {})
+        for token, rank in old.items():
+            if tokens.get(token) != rank:
+                self._remove_token(token, doc, rank)
+        for token, rank in tokens.items():
+            if old.get(token) != rank:
+                self._add_token(token, doc, rank)
+        self.docs[tenant_id] = self._summaries[doc] = summary
+        self._doc_tokens[doc] = tokens
+        self._set_order_key(doc, (normalize(summary["school_name"] or ""), doc))
+        self.version += 1
+        self._versions[tenant_id] = self.version
+        return True
+
+    def remove(self, tenant_id: str) -> None:
+        tenant_id = str(tenant_id)
+        if self.docs.pop(tenant_id, None) is None:
+            return
+        doc = self._numbers.pop(tenant_id)
+        for token, rank in self._doc_tokens.pop(doc).items():
+            self._remove_token(token, doc, rank)
+        del self._summaries[doc]
+        del self._versions[tenant_id]
+        self._set_order_key(doc, None)
+
+    def sync(self, rows: Iterable[dict], since: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Bring the index in line with a full snapshot of the tenants table.
+        Only rows that changed are re-indexed. Tenants upserted after
+        ``version`` was ``since`` are newer than the snapshot and are kept
+        even if it lacks them. Returns ``(upserted, removed)``.
+        """
+        seen: Set[str] = set()
+        upserted, gone, complete = 0, [], False
+        # Sorted structures are rebuilt once at the end rather than kept
+        # sorted through thousands of inserts.
+        self._bulk = True
+        try:
+            for row in rows:
+                seen.add(str(row["tenant_id"]))
+                upserted += self.upsert(row)
+            gone = [
+                tenant_id for tenant_id in self.docs.keys() - seen
+                if since is None or self._versions[tenant_id] <= since
+            ]
+            for tenant_id in gone:
+                self.remove(tenant_id)
+            complete = True
+        finally:
+            self._bulk = False
+            if upserted or gone or not complete:
+                self._vocabulary = sorted(self._postings)
+                self._order = sorted(self._order_keys.values())
+        self.refreshed_at = time.monotonic()
+        self.refreshes += 1
+        return upserted, len(gone)
+
+    def _tokens(self, term: str) -> Tuple[List[str], List[str], List[str]]:
+        """Vocabulary tokens equal to, starting with, and containing ``term``."""
+        start = bisect_left(self._vocabulary, term)
+        end = bisect_left(self._vocabulary, term + "\uffff", start)
+        prefixed = self._vocabulary[start:end]
+        exact = prefixed[:1] if prefixed and prefixed[0] == term else []
+        infix: List[str] = []
+        if len(term) >= 3:
+            grams = sorted((self._grams.get(g, ()) for g in trigrams(term)), key=len)
+            infix = [t for t in set(grams[0]).intersection(*grams[1:]) if term in t and not t.startswith(term)]
+        return exact, prefixed[len(exact):], infix
+
+    def _levels(self, term: str) -> Iterator[Set[int]]:
+        """Tenants matching ``term``, one set per rank level, best level first."""
+        groups = self._tokens(term)
+        for rank in range(len(SEARCH_FIELDS)):
+            for tokens in groups:
+                if tokens:
+                    yield set().union(*[self._postings[token][rank] for token in tokens])
+
+    def _all_matches(self, term: str) -> Set[int]:
+        return set().union(*[postings for group in self._tokens(term) for token in group
+                             for postings in self._postings[token]])
+
+    def _first_in_order(self, docs: Set[int], count: int) -> List[int]:
+        if len(docs) * 16 >= len(self._order):
+            # Dense: walking the alphabetical order finds ``count`` quickly.
+            found = []
+            for _, doc in self._order:
+                if doc in docs:
+                    found.append(doc)
+                    if len(found) == count:
+                        break
+            return found
+        return sorted(docs, key=self._order_keys.__getitem__)[:count]
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        """Tenants matching every term of ``query``, best first (see the class docstring)."""
+        self.queries += 1
+        terms = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not terms:
+            return []
+        candidates = None
+        for term in terms[1:]:
+            matches = self._all_matches(term)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+        found: List[int] = []
+        taken: Set[int] = set()
+        for level in self._levels(terms[0]):
+            level -= taken
+            if candidates is not None:
+                level &= candidates
+            if not level:
+                continue
+            docs = self._first_in_order(level, limit - len(found))
+            found.extend(docs)
+            if len(found) >= limit:
+                break
+            taken |= level
+        return [self._summaries[doc] for doc in found]
+
+    @property
+    def stale(self) -> bool:
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at >= self.refresh_seconds
+
+    def expire(self) -> None:
+        """Make the next search start a background reload."""
+        if self.refreshed_at is not None:
+            self.refreshed_at = time.monotonic() - self.refresh_seconds
+
+    async def refresh(self, postgrest) -> None:
+        """
+        Reload the index from Supabase through ``postgrest`` (a session
+        carrying a sysadmin JWT, as RLS requires). Concurrent callers share
+        one reload.
+        """
+        if self._refreshing is None:
+            self._refreshing = asyncio.get_running_loop().create_task(self._refresh(postgrest))
+        await asyncio.shield(self._refreshing)
+
+    async def _refresh(self, postgrest) -> None:
+        try:
+            since = self.version
+            rows = await fetch_all(postgrest, "tenants", ",".join(SUMMARY_COLUMNS), "tenant_id", TENANT_SEARCH_PAGE_SIZE)
+            upserted, removed = self.sync(rows, since)
+            logger.info("Tenant search index refreshed: %d tenants, %d upserted, %d removed",
+                        len(self.docs), upserted, removed)
+        finally:
+            self._refreshing = None
+
+    async def ensure_fresh(self, postgrest) -> None:
+        """
+        Load the index on first use. Once loaded, a stale index keeps
+        answering while a reload runs in the background.
+        """
+        if self.refreshed_at is None:
+            await self.refresh(postgrest)
+        elif self.stale and self._refreshing is None:
+            self._refreshing = asyncio.get_running_loop().create_task(self._refresh(postgrest))
+            self._refreshing.add_done_callback(_log_refresh_failure)
+
+    def stats(self) -> dict:
+        return {
+            "tenants": len(self.docs),
+            "tokens": len(self._vocabulary),
+            "trigrams": len(self._grams),
+            "refreshes": self.refreshes,
+            "queries": self.queries,
+            "age_seconds": None if self.refreshed_at is None else round(time.monotonic() - self.refreshed_at, 3),
+        }
+
+
+def _log_refresh_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Tenant search index refresh failed", exc_info=task.exception())
+
+
+_index: Optional[TenantSearchIndex] = None
+
+
+def get_tenant_index() -> TenantSearchIndex:
+    """Return the process-wide tenant search index."""
+    global _index
+    if _index is None:
+        _index = TenantSearchIndex()
+    return _index
+
+
+def reindex_tenant(tenant_id: Optional[str], row: Optional[dict]) -> None:
+    """Invalidation bus handler for tenants written by another worker."""
+    if row is not None:
+        get_tenant_index().upsert(row)
+    else:
+        get_tenant_index().expire()
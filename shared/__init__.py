@@ -0,0 +1,5 @@
+# Modules read their tunables from the environment at import, so .env has
+# to be loaded before any of them is.
+from .config import load_env
+
+load_env()
@@ -0,0 +1,294 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import quote
+from bson import json_util
+import asyncio
+import gzip
+import json
+import logging
+import os
+import uuid
+from .chain import CHAIN_PENDING
+from .lease import claim_lease
+from .rollup import ROLLUP_PENDING
+
+AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR")
+AUDIT_ARCHIVE_AFTER_DAYS = float(os.getenv("AUDIT_ARCHIVE_AFTER_DAYS", "90"))
+AUDIT_ARCHIVE_INTERVAL = float(os.getenv("AUDIT_ARCHIVE_INTERVAL", "3600"))
+AUDIT_ARCHIVE_PART_SIZE = int(os.getenv("AUDIT_ARCHIVE_PART_SIZE", "50000"))
+AUDIT_ARCHIVE_LEASE_SECONDS = float(os.getenv("AUDIT_ARCHIVE_LEASE_SECONDS", "600"))
+
+STATE_ID = "audit_archive"
+NO_TENANT = "_none"
+DATA_SUFFIX = ".ndjson.gz"
+INDEX_SUFFIX = ".index.json"
+# Same order as the audit_logs tenant_created index.
+DAY_SORT = [("tenant_id", 1), ("created_at", -1), ("_id", -1)]
+
+logger = logging.getLogger(__name__)
+
+
+class LocalArchiveStorage:
+    """
+    Archive files under a local directory. Keys are ``/``-separated paths;
+    an object-store backend provides the same ``put``/``get``/``list``.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def get(self, key: str) -> bytes:
+        return (self.root / key).read_bytes()
+
+    def list(self, prefix: str = "") -> List[str]:
+        """Names directly under ``prefix`` (one level, like a delimited object listing)."""
+        path = self.root / prefix
+        if not path.is_dir():
+            return []
+        return sorted(entry.name for entry in path.iterdir() if not entry.name.endswith(".tmp"))
+
+
+def _tenant_dir(tenant_id: Optional[str]) -> str:
+    return "tenant=" + (quote(tenant_id, safe="") if tenant_id is not None else NO_TENANT)
+
+
+def partition(day: date, tenant_id: Optional[str]) -> str:
+    return f"date={day.isoformat()}/{_tenant_dir(tenant_id)}/"
+
+
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+
+def _matches(doc: dict, tenant_id, user_id, action, since, until, position) -> bool:
+    if tenant_id is not None and doc.get("tenant_id") != tenant_id:
+        return False
+    if user_id is not None and doc.get("user_id") != user_id:
+        return False
+    if action is not None and doc.get("action") != action:
+        return False
+    if since is not None and doc["created_at"] < since:
+        return False
+    if until is not None and doc["created_at"] >= until:
+        return False
+    if position is not None and (doc["created_at"], doc["_id"]) >= position:
+        return False
+    return True
+
+
+class AuditArchive:
+    """
+    Moves audit logs older than ``after_days`` out of MongoDB into
+    gzip-compressed NDJSON files partitioned by day and tenant
+    (``date=2026-01-31/tenant=<id>/part-<n>.ndjson.gz``), and reads them back
+    for queries.
+
+    Each part of at most ``part_size`` logs has a JSON sidecar with its count,
+    time range, actions and users. The sidecar is written after the data and
+    is what makes a part visible, and logs are deleted from MongoDB only
+    once both are stored. A crash in between leaves the logs in both
+    places; queries drop the duplicates by ``_id``. Queries skip date and
+    tenant partitions outside their filters, then parts whose sidecar rules
+    them out, so only the matching files are decompressed.
+
+    Logs not yet counted by the rollup job or linked into the audit chain
+    are left in MongoDB until they are; archived logs keep their chain
+    fields. One worker at a time archives, through a lease.
+    """
+
+    def __init__(
+        self,
+        logs,
+        storage,
+        state,
+        after_days: float = AUDIT_ARCHIVE_AFTER_DAYS,
+        interval: float = AUDIT_ARCHIVE_INTERVAL,
+        part_size: int = AUDIT_ARCHIVE_PART_SIZE,
+        lease_seconds: float = AUDIT_ARCHIVE_LEASE_SECONDS,
+    ):
+        self.logs = logs
+        self.storage = storage
+        self.state = state
+        self.after_days = after_days
+        self.interval = interval
+        self.part_size = part_size
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self.archived = 0
+        self.parts = 0
+        self.failures = 0
+
+    # Writing
+
+    def _eligible(self, cutoff: datetime) -> dict:
+        return {"created_at": {"$lt": cutoff}, ROLLUP_PENDING: {"$ne": True}, CHAIN_PENDING: {"$ne": True}}
+
+    async def archive(self, now: Optional[datetime] = None) -> int:
+        """Archive every eligible log, oldest day first. Returns how many were moved."""
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.after_days)
+        total = 0
+        while await claim_lease(self.state, STATE_ID, self.owner, self.lease_seconds) is not None:
+            oldest = await self.logs.find(self._eligible(cutoff)).sort([("created_at", 1)]).limit(1).to_list(1)
+            if not oldest:
+                break
+            total += await self._archive_day(oldest[0]["created_at"].date(), cutoff)
+        return total
+
+    async def _archive_day(self, day: date, cutoff: datetime) -> int:
+        start = _day_start(day)
+        query = self._eligible(min(cutoff, start + timedelta(days=1)))
+        query["created_at"]["$gte"] = start
+        cursor = self.logs.find(query).sort(DAY_SORT).batch_size(1000)
+        archived, part, tenant_id = 0, [], None
+        async for doc in cursor:
+            if part and (doc.get("tenant_id") != tenant_id or len(part) >= self.part_size):
+                archived += await self._write_part(day, tenant_id, part)
+                part = []
+            tenant_id = doc.get("tenant_id")
+            part.append(doc)
+        if part:
+            archived += await self._write_part(day, tenant_id, part)
+        return archived
+
+    async def _write_part(self, day: date, tenant_id: Optional[str], docs: List[dict]) -> int:
+        key = partition(day, tenant_id) + f"part-{uuid.uuid4().hex}"
+        data = gzip.compress("".join(json_util.dumps(doc) + "\n" for doc in docs).encode(), compresslevel=6)
+        index = {
+            "count": len(docs),
+            "min_created_at": min(doc["created_at"] for doc in docs).isoformat(),
+            "max_created_at": max(doc["created_at"] for doc in docs).isoformat(),
+            "actions": sorted({doc["action"] for doc in docs}),
+            "user_ids": sorted({doc["user_id"] for doc in docs}),
+        }
+        await asyncio.to_thread(self.storage.put, key + DATA_SUFFIX, data)
+        await asyncio.to_thread(self.storage.put, key + INDEX_SUFFIX, json.dumps(index).encode())
+        await self.logs.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        self.parts += 1
+        self.archived += len(docs)
+        return len(docs)
+
+    # Reading
+
+    def _read_partition(self, prefix: str, user_id, action, since, upper) -> List[dict]:
+        docs = []
+        for name in self.storage.list(prefix):
+            if not name.endswith(INDEX_SUFFIX):
+                continue
+            index = json.loads(self.storage.get(prefix + name))
+            if action is not None and action not in index["actions"]:
+                continue
+            if user_id is not None and user_id not in index["user_ids"]:
+                continue
+            if since is not None and datetime.fromisoformat(index["max_created_at"]) < since:
+                continue
+            if upper is not None and datetime.fromisoformat(index["min_created_at"]) > upper:
+                continue
+            data = gzip.decompress(self.storage.get(prefix + name[:-len(INDEX_SUFFIX)] + DATA_SUFFIX))
+            docs.extend(json_util.loads(line) for line in data.splitlines())
+        return docs
+
+    def _query(self, tenant_id, user_id, action, since, until, position, limit, floor) -> List[dict]:
+        upper = min((t for t in (until, position[0] if position else None) if t is not None), default=None)
+        found: Dict[object, dict] = {}
+        for date_name in reversed(self.storage.list()):
+            day = date.fromisoformat(date_name.split("=", 1)[1])
+            start, end = _day_start(day), _day_start(day) + timedelta(days=1)
+            if upper is not None and start > upper:
+                continue
+            if (since is not None and end <= since) or (floor is not None and end <= floor) or len(found) >= limit:
+                break
+            tenants = [_tenant_dir(tenant_id)] if tenant_id is not None else self.storage.list(date_name)
+            for tenant_name in tenants:
+                prefix = f"{date_name}/{tenant_name}/"
+                for doc in self._read_partition(prefix, user_id, action, since, upper):
+                    if _matches(doc, tenant_id, user_id, action, since, until, position):
+                        found[doc["_id"]] = doc
+        docs = sorted(found.values(), key=lambda d: (d["created_at"], d["_id"]), reverse=True)
+        return docs[:limit]
+
+    async def query(
+        self,
+        tenant_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        action: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        position: Optional[Tuple[datetime, object]] = None,
+        limit: int = 50,
+        floor: Optional[datetime] = None,
+    ) -> List[dict]:
+        """
+        Up to ``limit`` archived logs matching the filters, newest first,
+        strictly after ``position`` (a ``(created_at, _id)`` keyset cursor).
+        Days that end at or before ``floor`` are not read: the caller already
+        has ``limit`` newer logs.
+        """
+        return await asyncio.to_thread(self._query, tenant_id, user_id, action, since, until, position, limit, floor)
+
+    # Background job
+
+    def start(self) -> None:
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await self.archive()
+            except Exception:
+                self.failures += 1
+                logger.exception("Audit archiving failed; it resumes on the next run")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"archived": self.archived, "parts": self.parts, "failures": self.failures}
+
+
+_archive: Optional[AuditArchive] = None
+
+
+def get_audit_archive() -> Optional[AuditArchive]:
+    """Return the process-wide archive under ``AUDIT_ARCHIVE_DIR``, or ``None`` if archiving is off."""
+    global _archive
+    if _archive is None and AUDIT_ARCHIVE_DIR:
+        from shared.database.mongodb import get_database
+        db = get_database()
+        _archive = AuditArchive(db.audit_logs, LocalArchiveStorage(AUDIT_ARCHIVE_DIR), db.audit_archive_state)
+    return _archive
+
+
+async def close_audit_archive() -> None:
+    global _archive
+    if _archive is not None:
+        await _archive.stop()
+        _archive = None
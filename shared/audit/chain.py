@@ -0,0 +1,224 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from bson import json_util
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from .lease import claim_lease
+
+AUDIT_CHAIN_INTERVAL = float(os.getenv("AUDIT_CHAIN_INTERVAL", "10"))
+AUDIT_CHAIN_BATCH_SIZE = int(os.getenv("AUDIT_CHAIN_BATCH_SIZE", "5000"))
+AUDIT_CHAIN_LEASE_SECONDS = float(os.getenv("AUDIT_CHAIN_LEASE_SECONDS", "120"))
+
+# Set on every audit log as it is written and removed once the log is
+# linked into its tenant's chain.
+CHAIN_PENDING = "chain_pending"
+STATE_ID = "audit_chain"
+GENESIS = "0" * 64
+# The fields a log's hash covers. Bookkeeping such as the rollup flag is
+# left out so it can change without breaking the chain.
+CONTENT_FIELDS = ("tenant_id", "user_id", "action", "details", "created_at")
+
+AUDIT_CHAIN_INDEXES = [
+    IndexModel(
+        [("created_at", ASCENDING), ("_id", ASCENDING)],
+        name="chain_pending",
+        partialFilterExpression={CHAIN_PENDING: True},
+    ),
+    IndexModel(
+        [("tenant_id", ASCENDING), ("seq", DESCENDING)],
+        name="tenant_seq",
+        unique=True,
+        partialFilterExpression={"seq": {"$exists": True}},
+    ),
+]
+
+logger = logging.getLogger(__name__)
+
+
+def entry_hash(doc: dict, seq: int, prev_hash: str) -> str:
+    """SHA-256 of a log's content fields, its position in the chain and the previous hash."""
+    content = {field: doc.get(field) for field in CONTENT_FIELDS}
+    content.update(seq=seq, prev_hash=prev_hash)
+    encoded = json_util.dumps(
+        content, json_options=json_util.CANONICAL_JSON_OPTIONS, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def head_id(tenant_id: Optional[str]) -> str:
+    return f"head|{tenant_id or ''}"
+
+
+def link(docs: List[dict], seq: int, prev_hash: str) -> List[Tuple[dict, int, str, str]]:
+    """``(doc, seq, prev_hash, hash)`` for ``docs`` appended after ``(seq, prev_hash)``."""
+    linked = []
+    for doc in docs:
+        seq += 1
+        digest = entry_hash(doc, seq, prev_hash)
+        linked.append((doc, seq, prev_hash, digest))
+        prev_hash = digest
+    return linked
+
+
+class AuditChain:
+    """
+    Links each tenant's audit logs into a hash chain: every log gets a
+    per-tenant ``seq``, the ``prev_hash`` of the log before it and its own
+    ``hash`` over its content, ``seq`` and ``prev_hash``. Editing, removing
+    or reordering a linked log breaks every hash after it.
+
+    Sinks mark new logs ``chain_pending`` and this job links them every
+    ``interval`` seconds, oldest first. Each log is linked with one write
+    in ``seq`` order and each chain's head is then saved in the state
+    collection. The head is the later of that record and the highest
+    ``seq`` still in ``audit_logs``: the record survives the archiver
+    removing a tenant's logs, and the logs cover a run that died before
+    saving it. One worker at a time links, through a lease, and the unique
+    ``(tenant_id, seq)`` index stops a second writer from forking a chain.
+    The first run marks logs written before chaining existed.
+
+    Verification and signed checkpoints live in ``shared.audit.verify``.
+    """
+
+    def __init__(
+        self,
+        logs,
+        state,
+        interval: float = AUDIT_CHAIN_INTERVAL,
+        batch_size: int = AUDIT_CHAIN_BATCH_SIZE,
+        lease_seconds: float = AUDIT_CHAIN_LEASE_SECONDS,
+    ):
+        self.logs = logs
+        self.state = state
+        self.interval = interval
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self.batches = 0
+        self.linked = 0
+        self.failures = 0
+
+    async def ensure_indexes(self) -> None:
+        try:
+            await self.logs.create_indexes(AUDIT_CHAIN_INDEXES)
+        except Exception:
+            logger.exception("Failed to create audit chain indexes")
+
+    async def head(self, tenant_id: Optional[str]) -> Tuple[int, str]:
+        """``(seq, hash)`` of the last linked log of a tenant's chain."""
+        saved = await self.state.find_one({"_id": head_id(tenant_id)})
+        last = await self.logs.find_one(
+            {"tenant_id": tenant_id, "seq": {"$exists": True}}, {"seq": 1, "hash": 1}, sort=[("seq", DESCENDING)]
+        )
+        return max(((doc["seq"], doc["hash"]) for doc in (saved, last) if doc), default=(0, GENESIS))
+
+    async def run_once(self) -> int:
+        """Link one batch of pending logs. Returns how many were linked (0 if none or not leased)."""
+        state = await claim_lease(self.state, STATE_ID, self.owner, self.lease_seconds)
+        if state is None:
+            return 0
+        if not state.get("backfilled"):
+            await self.logs.update_many(
+                {CHAIN_PENDING: {"$exists": False}, "seq": {"$exists": False}}, {"$set": {CHAIN_PENDING: True}}
+            )
+            await self.state.update_one({"_id": STATE_ID}, {"$set": {"backfilled": True}})
+
+        docs = await self.logs.find({CHAIN_PENDING: True}).sort(
+            [("created_at", ASCENDING), ("_id", ASCENDING)]
+        ).limit(self.batch_size).to_list(None)
+        if not docs:
+            return 0
+        by_tenant: Dict[Optional[str], List[dict]] = {}
+        for doc in docs:
+            by_tenant.setdefault(doc.get("tenant_id"), []).append(doc)
+
+        operations, heads = [], []
+        for tenant_id, tenant_docs in by_tenant.items():
+            seq, prev_hash = await self.head(tenant_id)
+            linked = link(tenant_docs, seq, prev_hash)
+            operations += [
+                UpdateOne(
+                    {"_id": doc["_id"], CHAIN_PENDING: True},
+                    {"$set": {"seq": seq, "prev_hash": prev, "hash": digest}, "$unset": {CHAIN_PENDING: ""}},
+                )
+                for doc, seq, prev, digest in linked
+            ]
+            _, seq, _, digest = linked[-1]
+            heads.append(UpdateOne(
+                {"_id": head_id(tenant_id)},
+                {"$set": {"tenant_id": tenant_id, "seq": seq, "hash": digest}},
+                upsert=True,
+            ))
+        await self.logs.bulk_write(operations, ordered=True)
+        await self.state.bulk_write(heads, ordered=False)
+        self.batches += 1
+        self.linked += len(docs)
+        return len(docs)
+
+    async def catch_up(self) -> int:
+        """Link every pending log. Returns how many were linked."""
+        total = 0
+        while True:
+            linked = await self.run_once()
+            if not linked:
+                return total
+            total += linked
+
+    def start(self) -> None:
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await self.catch_up()
+            except Exception:
+                self.failures += 1
+                logger.exception("Audit chain linking failed; it resumes from the stored heads")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "linked": self.linked, "failures": self.failures}
+
+
+_chain: Optional[AuditChain] = None
+
+
+def get_audit_chain() -> AuditChain:
+    """Return the process-wide chain linker over ``audit_logs``."""
+    global _chain
+    if _chain is None:
+        from shared.database.mongodb import get_database
+        db = get_database()
+        _chain = AuditChain(db.audit_logs, db.audit_chain_state)
+    return _chain
+
+
+async def close_audit_chain() -> None:
+    global _chain
+    if _chain is not None:
+        await _chain.stop()
+        _chain = None
@@ -0,0 +1,104 @@
+from typing import AsyncIterable, AsyncIterator, Optional
+from datetime import datetime
+from urllib.parse import quote
+import csv
+import io
+import json
+import os
+import re
+import zlib
+from .query import build_filter
+
+AUDIT_EXPORT_BATCH_SIZE = int(os.getenv("AUDIT_EXPORT_BATCH_SIZE", "1000"))
+AUDIT_EXPORT_CHUNK_BYTES = int(os.getenv("AUDIT_EXPORT_CHUNK_BYTES", str(64 * 1024)))
+
+CSV_COLUMNS = ["id", "tenant_id", "user_id", "action", "created_at", "details"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def content_disposition(filename: str) -> str:
+    """
+    An attachment header for ``filename``: an ASCII fallback with anything
+    outside ``[A-Za-z0-9._-]`` replaced, and the exact name as RFC 5987
+    ``filename*``, so no value can break out of the header parameter.
+    """
+    fallback = re.sub(r"[^A-Za-z0-9._-]", "_", filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def export_row(doc: dict) -> dict:
+    return {
+        "id": str(doc["_id"]),
+        "tenant_id": doc.get("tenant_id"),
+        "user_id": doc.get("user_id"),
+        "action": doc.get("action"),
+        "created_at": doc["created_at"].isoformat(),
+        "details": doc.get("details"),
+    }
+
+
+def export_cursor(collection, tenant_id: str, action: Optional[str] = None,
+                  since: Optional[datetime] = None, until: Optional[datetime] = None,
+                  batch_size: int = AUDIT_EXPORT_BATCH_SIZE):
+    """Oldest-first cursor over one tenant's audit logs, fetched ``batch_size`` at a time."""
+    query = build_filter(tenant_id=tenant_id, action=action, since=since, until=until)
+    return collection.find(query).sort([("created_at", 1), ("_id", 1)]).batch_size(batch_size)
+
+
+async def iter_ndjson(docs: AsyncIterable[dict]) -> AsyncIterator[str]:
+    async for doc in docs:
+        yield json.dumps(export_row(doc), default=_json_default) + "\n"
+
+
+async def iter_csv(docs: AsyncIterable[dict]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    async for doc in docs:
+        row = export_row(doc)
+        row["details"] = json.dumps(row["details"], default=_json_default)
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def iter_chunks(lines: AsyncIterable[str], compress: bool = False,
+                      chunk_bytes: int = AUDIT_EXPORT_CHUNK_BYTES) -> AsyncIterator[bytes]:
+    """
+    Coalesce rendered lines into chunks of roughly ``chunk_bytes``,
+    optionally gzip-compressed, so the response is written in a few large
+    writes and only one chunk is held in memory at a time.
+    """
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending, size = [], 0
+    async for line in lines:
+        data = line.encode()
+        pending.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            chunk = b"".join(pending)
+            pending, size = [], 0
+            if gzip is not None:
+                chunk = gzip.compress(chunk)
+            if chunk:
+                yield chunk
+    chunk = b"".join(pending)
+    if gzip is not None:
+        chunk = gzip.compress(chunk) + gzip.flush()
+    if chunk:
+        yield chunk
+
+
+def render_export(docs: AsyncIterable[dict], format: str = "ndjson", compress: bool = False) -> AsyncIterator[bytes]:
+    lines = iter_csv(docs) if format == "csv" else iter_ndjson(docs)
+    return iter_chunks(lines, compress)
@@ -0,0 +1,22 @@
+from typing import Optional
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+async def claim_lease(state, lease_id: str, owner: str, seconds: float) -> Optional[dict]:
+    """
+    Take or renew ``owner``'s lease on the ``lease_id`` document in ``state``
+    for ``seconds``. Returns the document, or ``None`` while another owner's
+    lease is still running.
+    """
+    now = datetime.utcnow()
+    try:
+        return await state.find_one_and_update(
+            {"_id": lease_id, "$or": [{"owner": owner}, {"locked_until": {"$lt": now}}]},
+            {"$set": {"owner": owner, "locked_until": now + timedelta(seconds=seconds)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        return None
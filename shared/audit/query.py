@@ -0,0 +1,130 @@
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone
+from bson import ObjectId, json_util
+from pymongo import ASCENDING, DESCENDING, IndexModel
+import base64
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Every index ends in (created_at, _id) so each filter combination the API
+# accepts can walk an index in keyset order without an in-memory sort.
+AUDIT_LOG_INDEXES = [
+    IndexModel([("tenant_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="tenant_created"),
+    IndexModel(
+        [("tenant_id", ASCENDING), ("action", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="tenant_action_created",
+    ),
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_created"),
+    IndexModel([("action", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="action_created"),
+    IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created"),
+]
+
+SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+async def ensure_audit_indexes(collection) -> None:
+    """Create the audit_logs indexes; failures are logged so startup is not blocked."""
+    try:
+        await collection.create_indexes(AUDIT_LOG_INDEXES)
+    except Exception:
+        logger.exception("Failed to create audit_logs indexes")
+
+
+def encode_cursor(doc: dict) -> str:
+    raw = json_util.dumps({"t": doc["created_at"], "id": doc["_id"]})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Decode and validate a cursor; both values end up inside a Mongo filter."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json_util.loads(raw)
+        created_at, log_id = position["t"], position["id"]
+    except Exception:
+        raise InvalidCursor("Invalid cursor") from None
+    if not isinstance(created_at, datetime) or not isinstance(log_id, ObjectId):
+        raise InvalidCursor("Invalid cursor")
+    return naive_utc(created_at), log_id
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Audit times are stored as naive UTC; convert aware query bounds to match."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def build_filter(
+    tenant_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict:
+    query: dict = {}
+    if tenant_id is not None:
+        query["tenant_id"] = tenant_id
+    if user_id is not None:
+        query["user_id"] = user_id
+    if action is not None:
+        query["action"] = action
+    if since is not None or until is not None:
+        query["created_at"] = {}
+        if since is not None:
+            query["created_at"]["$gte"] = since
+        if until is not None:
+            query["created_at"]["$lt"] = until
+    return query
+
+
+async def query_audit_logs(
+    collection,
+    tenant_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    archive=None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Return one page of audit logs, newest first, and the cursor for the next
+    page (``None`` on the last page). Pages are keyed on ``(created_at, _id)``
+    so each one is an index seek, however deep into the collection it is.
+
+    With an ``archive`` (see ``shared.audit.archive``), archived logs are
+    merged into the page; archive days older than a full page from MongoDB
+    are not read.
+    """
+    since, until = naive_utc(since), naive_utc(until)
+    query = build_filter(tenant_id, user_id, action, since, until)
+    position = None
+    if cursor is not None:
+        created_at, last_id = decode_cursor(cursor)
+        position = (created_at, last_id)
+        query = {
+            "$and": [
+                query,
+                {"$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "_id": {"$lt": last_id}},
+                ]},
+            ]
+        }
+    docs = await collection.find(query).sort(SORT).limit(limit + 1).to_list(limit + 1)
+    if archive is not None:
+        floor = docs[limit]["created_at"] if len(docs) > limit else None
+        archived = await archive.query(tenant_id, user_id, action, since, until, position, limit + 1, floor)
+        # A log caught between being archived and deleted is in both.
+        merged = {doc["_id"]: doc for doc in archived}
+        merged.update((doc["_id"], doc) for doc in docs)
+        docs = sorted(merged.values(), key=lambda doc: (doc["created_at"], doc["_id"]), reverse=True)[:limit + 1]
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
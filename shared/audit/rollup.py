@@ -0,0 +1,241 @@
+from typing import Dict, List, Optional, Tuple
+from collections import Counter
+from datetime import datetime
+import asyncio
+import logging
+import os
+import uuid
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
+from .lease import claim_lease
+
+AUDIT_ROLLUP_INTERVAL = float(os.getenv("AUDIT_ROLLUP_INTERVAL", "30"))
+AUDIT_ROLLUP_BATCH_SIZE = int(os.getenv("AUDIT_ROLLUP_BATCH_SIZE", "5000"))
+AUDIT_ROLLUP_LEASE_SECONDS = float(os.getenv("AUDIT_ROLLUP_LEASE_SECONDS", "120"))
+
+# Set on every audit log as it is written and removed once the log has been
+# counted; the partial index keeps finding the backlog cheap.
+ROLLUP_PENDING = "rollup_pending"
+GRANULARITIES = ("hour", "day")
+STATE_ID = "audit_rollup"
+DUPLICATE_KEY = 11000
+
+PENDING_INDEX = IndexModel(
+    [(ROLLUP_PENDING, ASCENDING)], name="rollup_pending", partialFilterExpression={ROLLUP_PENDING: True}
+)
+AUDIT_ROLLUP_INDEXES = [
+    IndexModel([("granularity", ASCENDING), ("tenant_id", ASCENDING), ("bucket", ASCENDING)], name="tenant_bucket"),
+    IndexModel([("granularity", ASCENDING), ("bucket", ASCENDING)], name="bucket"),
+]
+
+logger = logging.getLogger(__name__)
+
+
+def bucket_start(created_at: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return created_at.replace(minute=0, second=0, microsecond=0)
+    return created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def count_buckets(docs: List[dict]) -> Dict[Tuple[str, Optional[str], str, datetime], int]:
+    """Log counts per (granularity, tenant_id, action, bucket start)."""
+    counts: Counter = Counter()
+    for doc in docs:
+        for granularity in GRANULARITIES:
+            counts[granularity, doc.get("tenant_id"), doc["action"], bucket_start(doc["created_at"], granularity)] += 1
+    return counts
+
+
+def rollup_id(granularity: str, tenant_id: Optional[str], action: str, bucket: datetime) -> str:
+    return f"{granularity}|{tenant_id or ''}|{action}|{bucket.isoformat()}"
+
+
+class AuditRollup:
+    """
+    Hourly and daily audit log counts per ``(tenant_id, action)``, kept in
+    the ``audit_rollups`` collection by a periodic catch-up job.
+
+    Audit sinks mark each log ``rollup_pending``. Every ``interval`` seconds
+    the job takes up to ``batch_size`` pending logs, adds them to their
+    buckets and clears the mark. The batch (its id and log ids) is saved as
+    the checkpoint before any counter changes and cleared after the marks,
+    so a run that dies midway resumes the same batch, and each counter
+    remembers the last batch applied to it, so resuming never counts a log
+    twice. One worker at a time holds the job through a lease on the
+    checkpoint document. The first run marks logs written before rollups
+    existed, so history is backfilled.
+
+    Marking by flag rather than by ``_id`` or ``created_at`` position means
+    logs replayed late from a spool are still counted. An ``interval`` of 0
+    disables the background job; ``catch_up`` can still be called.
+    """
+
+    def __init__(
+        self,
+        logs,
+        rollups,
+        state,
+        interval: float = AUDIT_ROLLUP_INTERVAL,
+        batch_size: int = AUDIT_ROLLUP_BATCH_SIZE,
+        lease_seconds: float = AUDIT_ROLLUP_LEASE_SECONDS,
+    ):
+        self.logs = logs
+        self.rollups = rollups
+        self.state = state
+        self.interval = interval
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self.batches = 0
+        self.counted = 0
+        self.failures = 0
+
+    async def ensure_indexes(self) -> None:
+        try:
+            await self.logs.create_indexes([PENDING_INDEX])
+            await self.rollups.create_indexes(AUDIT_ROLLUP_INDEXES)
+        except Exception:
+            logger.exception("Failed to create audit rollup indexes")
+
+    async def run_once(self) -> int:
+        """Count one batch of pending logs. Returns how many were counted (0 if none or not leased)."""
+        checkpoint = await claim_lease(self.state, STATE_ID, self.owner, self.lease_seconds)
+        if checkpoint is None:
+            return 0
+        if not checkpoint.get("backfilled"):
+            await self.logs.update_many({ROLLUP_PENDING: {"$exists": False}}, {"$set": {ROLLUP_PENDING: True}})
+            await self.state.update_one({"_id": STATE_ID}, {"$set": {"backfilled": True}})
+
+        projection = {"tenant_id": 1, "action": 1, "created_at": 1}
+        batch = checkpoint.get("batch")
+        if batch is None:
+            docs = await self.logs.find({ROLLUP_PENDING: True}, projection).limit(self.batch_size).to_list(None)
+            if not docs:
+                return 0
+            batch = {"id": uuid.uuid4().hex, "log_ids": [doc["_id"] for doc in docs]}
+            await self.state.update_one({"_id": STATE_ID, "owner": self.owner}, {"$set": {"batch": batch}})
+        else:
+            docs = await self.logs.find({"_id": {"$in": batch["log_ids"]}}, projection).to_list(None)
+
+        await self._apply(batch["id"], count_buckets(docs))
+        await self.logs.update_many({"_id": {"$in": batch["log_ids"]}}, {"$unset": {ROLLUP_PENDING: ""}})
+        await self.state.update_one(
+            {"_id": STATE_ID, "owner": self.owner},
+            {"$unset": {"batch": ""}, "$set": {"updated_at": datetime.utcnow()}},
+        )
+        self.batches += 1
+        self.counted += len(docs)
+        return len(docs)
+
+    async def _apply(self, batch_id: str, counts: Dict[Tuple[str, Optional[str], str, datetime], int]) -> None:
+        if not counts:
+            return
+        operations = [
+            UpdateOne(
+                {"_id": rollup_id(granularity, tenant_id, action, bucket), "last_batch": {"$ne": batch_id}},
+                {
+                    "$inc": {"count": count},
+                    "$set": {"last_batch": batch_id},
+                    "$setOnInsert": {"granularity": granularity, "tenant_id": tenant_id,
+                                     "action": action, "bucket": bucket},
+                },
+                upsert=True,
+            )
+            for (granularity, tenant_id, action, bucket), count in counts.items()
+        ]
+        try:
+            await self.rollups.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # A counter that already has this batch fails its filter and the
+            # upsert collides with it: that part of the batch is done.
+            if any(error.get("code") != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+                raise
+
+    async def catch_up(self) -> int:
+        """Count every pending log. Returns how many were counted."""
+        total = 0
+        while True:
+            counted = await self.run_once()
+            if not counted:
+                return total
+            total += counted
+
+    def start(self) -> None:
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await self.catch_up()
+            except Exception:
+                self.failures += 1
+                logger.exception("Audit rollup catch-up failed; it resumes from its checkpoint")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "counted": self.counted, "failures": self.failures}
+
+
+async def query_rollups(
+    collection,
+    granularity: str,
+    tenant_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 1000,
+) -> List[dict]:
+    """Counters for ``granularity`` in bucket order, one index range scan."""
+    query: dict = {"granularity": granularity}
+    if tenant_id is not None:
+        query["tenant_id"] = tenant_id
+    if action is not None:
+        query["action"] = action
+    if since is not None or until is not None:
+        query["bucket"] = {}
+        if since is not None:
+            query["bucket"]["$gte"] = bucket_start(since, granularity)
+        if until is not None:
+            query["bucket"]["$lt"] = until
+    projection = {"_id": 0, "tenant_id": 1, "action": 1, "bucket": 1, "count": 1}
+    return await collection.find(query, projection).sort([("bucket", ASCENDING)]).limit(limit).to_list(limit)
+
+
+_rollup: Optional[AuditRollup] = None
+
+
+def get_audit_rollup() -> AuditRollup:
+    """Return the process-wide rollup job over ``audit_logs``."""
+    global _rollup
+    if _rollup is None:
+        from shared.database.mongodb import get_database
+        db = get_database()
+        _rollup = AuditRollup(db.audit_logs, db.audit_rollups, db.audit_rollup_state)
+    return _rollup
+
+
+async def close_audit_rollup() -> None:
+    global _rollup
+    if _rollup is not None:
+        await _rollup.stop()
+        _rollup = None
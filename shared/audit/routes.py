@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
+from datetime import datetime
+from shared.auth.dependencies import get_current_user
+from shared.models.audit_log import AuditLogEntry, AuditLogPage, AuditRollup
+from .query import InvalidCursor, query_audit_logs
+from .rollup import query_rollups
+from .archive import get_audit_archive
+from .export import MEDIA_TYPES, content_disposition, export_cursor, render_export
+from shared.metrics.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def get_audit_collection():
+    from shared.database.mongodb import get_database
+    return get_database().audit_logs
+
+
+def get_rollup_collection():
+    from shared.database.mongodb import get_database
+    return get_database().audit_rollups
+
+
+@router.get("", response_model=AuditLogPage)
+async def list_audit_logs(
+    tenant_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    until: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    user: dict = Depends(get_current_user),
+    collection=Depends(get_audit_collection),
+    archive=Depends(get_audit_archive),
+):
+    """
+    Query audit logs, newest first, with keyset pagination (system admin only).
+    Logs moved to the archive are included.
+    """
+    try:
+        docs, next_cursor = await query_audit_logs(
+            collection, tenant_id, user_id, action, since, until, cursor, limit, archive
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = [AuditLogEntry(id=str(doc.pop("_id")), **doc) for doc in docs]
+    return AuditLogPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/export")
+async def export_audit_logs(
+    tenant_id: str,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    action: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    until: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    user: dict = Depends(get_current_user),
+    collection=Depends(get_audit_collection),
+):
+    """
+    Stream a tenant's audit logs, oldest first, as NDJSON or CSV (system admin only).
+    Memory use is bounded by the cursor batch and one output chunk.
+    """
+    cursor = export_cursor(collection, tenant_id, action, since, until)
+    filename = f"audit-{tenant_id}.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else MEDIA_TYPES[format]
+    return StreamingResponse(
+        render_export(cursor, format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": content_disposition(filename)},
+    )
+
+
+@router.get("/rollups", response_model=List[AuditRollup])
+async def list_audit_rollups(
+    granularity: Literal["hour", "day"] = "day",
+    tenant_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Start of the first bucket included"),
+    until: Optional[datetime] = Query(None, description="Exclusive upper bound on bucket start"),
+    limit: int = Query(1000, ge=1, le=10000),
+    user: dict = Depends(get_current_user),
+    collection=Depends(get_rollup_collection),
+):
+    """
+    Audit log counts per tenant and action, by hour or day, oldest bucket
+    first (system admin only). Counts lag the logs by up to one rollup
+    interval.
+    """
+    return await query_rollups(collection, granularity, tenant_id, action, since, until, limit)
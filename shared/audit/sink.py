@@ -0,0 +1,211 @@
+from typing import Deque, List, Optional
+from collections import deque
+import asyncio
+import logging
+import os
+from bson import ObjectId
+from shared.metrics.timing import span
+from shared.models.audit_log import AuditLog
+from .chain import CHAIN_PENDING
+from .rollup import ROLLUP_PENDING
+from .spool import AUDIT_SPOOL_DIR, SpooledAuditSink, insert_idempotent, open_worker_spool
+
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_MAX_QUEUE = int(os.getenv("AUDIT_MAX_QUEUE", "10000"))
+AUDIT_OVERFLOW_POLICY = os.getenv("AUDIT_OVERFLOW_POLICY", "block")
+
+OVERFLOW_POLICIES = ("block", "drop_newest", "drop_oldest", "raise")
+
+logger = logging.getLogger(__name__)
+
+
+class AuditQueueFull(RuntimeError):
+    """Raised by ``enqueue`` under the ``raise`` overflow policy."""
+
+
+class AuditSink:
+    """
+    In-memory buffer in front of the ``audit_logs`` collection.
+
+    Routes enqueue ``AuditLog`` records and return immediately; a background
+    task writes them with ``insert_many`` once ``batch_size`` records are
+    queued or ``flush_interval`` seconds have passed. The queue is bounded by
+    ``max_queue`` and ``overflow`` decides what happens when it is full:
+
+    - ``block``: wait for the flusher to make room
+    - ``drop_newest``: discard the record being enqueued
+    - ``drop_oldest``: discard the oldest queued record
+    - ``raise``: raise ``AuditQueueFull``
+
+    The batch being written counts against ``max_queue`` until it is
+    stored. A batch that fails goes back to the front of the queue; records
+    get their ``_id`` when queued, so retrying one that was partly written
+    does not duplicate it. If ``drop_oldest`` let newer records take the
+    room meanwhile, the oldest of the batch are dropped.
+    """
+
+    def __init__(
+        self,
+        collection,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+        max_queue: int = AUDIT_MAX_QUEUE,
+        overflow: str = AUDIT_OVERFLOW_POLICY,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self._queue: Deque[dict] = deque()
+        self._in_flight = 0
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def enqueue(self, audit_log: AuditLog) -> bool:
+        """Queue a record for writing. Returns False if it was dropped."""
+        with span("audit"):
+            return await self._enqueue(audit_log)
+
+    async def _enqueue(self, audit_log: AuditLog) -> bool:
+        self.start()
+        if self._backlog() >= self.max_queue:
+            if self.overflow == "raise":
+                raise AuditQueueFull("Audit queue is full")
+            if self.overflow == "drop_newest":
+                self.dropped += 1
+                return False
+            if self.overflow == "drop_oldest":
+                # The oldest records may be in flight; if their write fails
+                # the requeue drops them instead.
+                if len(self._queue) >= self.max_queue:
+                    self._queue.popleft()
+                    self.dropped += 1
+            else:
+                async with self._space:
+                    self._wakeup.set()
+                    await self._space.wait_for(lambda: self._backlog() < self.max_queue)
+        self._queue.append({**audit_log.dict(), "_id": ObjectId(), ROLLUP_PENDING: True, CHAIN_PENDING: True})
+        self.enqueued += 1
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def enqueue_many(self, audit_logs: List[AuditLog]) -> int:
+        """Queue several records; returns how many were accepted."""
+        accepted = 0
+        for audit_log in audit_logs:
+            accepted += await self.enqueue(audit_log)
+        return accepted
+
+    async def flush(self) -> None:
+        """Write everything queued so far."""
+        async with self._flush_lock:
+            while self._queue:
+                batch = self._take_batch()
+                self._in_flight = len(batch)
+                try:
+                    self.written += await insert_idempotent(self.collection, batch)
+                except BaseException as e:
+                    # Also on cancellation: records carry their _id, so a
+                    # batch that was partly written is safe to retry.
+                    if isinstance(e, Exception):
+                        self.failures += 1
+                    self._requeue(batch)
+                    raise
+                finally:
+                    self._in_flight = 0
+                self.batches += 1
+                async with self._space:
+                    self._space.notify_all()
+
+    def _backlog(self) -> int:
+        return len(self._queue) + self._in_flight
+
+    def _requeue(self, batch: List[dict]) -> None:
+        excess = min(len(self._queue) + len(batch) - self.max_queue, len(batch))
+        if excess > 0:
+            self.dropped += excess
+            batch = batch[excess:]
+        self._queue.extendleft(reversed(batch))
+
+    def _take_batch(self) -> List[dict]:
+        count = min(self.batch_size, len(self._queue))
+        return [self._queue.popleft() for _ in range(count)]
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to write %d queued audit logs", len(self._queue))
+
+    async def stop(self) -> None:
+        """Stop the background flusher and write whatever is still queued."""
+        if self._task is not None:
+            # Not cancelled: a write in progress is let finish, then the
+            # loop sees the flag.
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "failures": self.failures,
+        }
+
+
+_sink = None
+
+
+def get_audit_sink():
+    """
+    Return the process-wide audit sink, creating it on first use. With
+    ``AUDIT_SPOOL_DIR`` set, records are spooled to disk before MongoDB, in
+    a subdirectory of it this process holds.
+    """
+    global _sink
+    if _sink is None:
+        from shared.database.mongodb import get_database
+        if AUDIT_SPOOL_DIR:
+            _sink = SpooledAuditSink(open_worker_spool(AUDIT_SPOOL_DIR), get_database().audit_logs)
+        else:
+            _sink = AuditSink(get_database().audit_logs)
+    return _sink
+
+
+async def close_audit_sink() -> None:
+    global _sink
+    if _sink is not None:
+        await _sink.stop()
+        _sink = None
@@ -0,0 +1,386 @@
+from typing import List, Optional, Tuple
+from pathlib import Path
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError
+import asyncio
+import fcntl
+import logging
+import os
+from shared.metrics.timing import span
+from shared.models.audit_log import AuditLog
+from .chain import CHAIN_PENDING
+from .rollup import ROLLUP_PENDING
+
+AUDIT_SPOOL_DIR = os.getenv("AUDIT_SPOOL_DIR")
+AUDIT_SPOOL_SEGMENT_BYTES = int(os.getenv("AUDIT_SPOOL_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+AUDIT_SPOOL_FSYNC_INTERVAL = float(os.getenv("AUDIT_SPOOL_FSYNC_INTERVAL", "0.002"))
+AUDIT_DRAIN_BATCH_SIZE = int(os.getenv("AUDIT_DRAIN_BATCH_SIZE", "500"))
+AUDIT_DRAIN_INTERVAL = float(os.getenv("AUDIT_DRAIN_INTERVAL", "0.5"))
+AUDIT_DRAIN_MAX_BACKOFF = float(os.getenv("AUDIT_DRAIN_MAX_BACKOFF", "30"))
+
+DUPLICATE_KEY = 11000
+SEGMENT_SUFFIX = ".seg"
+
+logger = logging.getLogger(__name__)
+
+
+class SpoolLocked(Exception):
+    """The spool directory is held by another process."""
+
+
+def fsync_directory(directory: Path) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class AuditSpool:
+    """
+    Append-only, segmented on-disk log of audit documents.
+
+    Each line is ``<seq>\\t<extended JSON>``. Segments are named after the
+    first sequence number they hold and rolled over at ``segment_bytes``.
+    ``append`` returns once the record is fsynced; concurrent appends within
+    ``fsync_interval`` share a single fsync (group commit). The ``checkpoint``
+    file records the highest sequence number acknowledged by the drainer;
+    segments entirely below it are deleted.
+
+    A spool holds an exclusive ``flock`` on its directory until it is
+    closed; opening one that another process holds raises ``SpoolLocked``.
+    """
+
+    def __init__(
+        self,
+        directory,
+        segment_bytes: int = AUDIT_SPOOL_SEGMENT_BYTES,
+        fsync_interval: float = AUDIT_SPOOL_FSYNC_INTERVAL,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = open(self.directory / "lock", "a")
+        try:
+            fcntl.flock(self._lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock.close()
+            raise SpoolLocked(f"Audit spool {self.directory} is in use by another process")
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self._checkpoint_path = self.directory / "checkpoint"
+        self._syncing: Optional[asyncio.Task] = None
+        self.fsyncs = 0
+        self._recover()
+
+    def _segment_path(self, first_seq: int) -> Path:
+        return self.directory / f"{first_seq:020d}{SEGMENT_SUFFIX}"
+
+    def _segments(self) -> List[Tuple[int, Path]]:
+        return sorted((int(p.stem), p) for p in self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+
+    def _recover(self) -> None:
+        """Load the checkpoint, drop any torn tail write and reopen for appends."""
+        self.acked = int(self._checkpoint_path.read_text()) if self._checkpoint_path.exists() else 0
+        last_seq = self.acked
+        segments = self._segments()
+        if segments:
+            first_seq, path = segments[-1]
+            last_seq = max(last_seq, first_seq - 1)
+            good = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("partial line")
+                        seq, payload = line.split(b"\t", 1)
+                        json_util.loads(payload)
+                    except ValueError:
+                        break
+                    last_seq = int(seq)
+                    good += len(line)
+            if good < path.stat().st_size:
+                logger.warning("Truncating torn audit spool tail in %s at byte %d", path.name, good)
+                with open(path, "r+b") as f:
+                    f.truncate(good)
+                    os.fsync(f.fileno())
+        self.next_seq = last_seq + 1
+        self.synced_seq = last_seq
+        if segments and segments[-1][1].stat().st_size < self.segment_bytes:
+            self._segment_first, path = segments[-1]
+        else:
+            self._segment_first, path = self.next_seq, self._segment_path(self.next_seq)
+        self._file = open(path, "ab")
+        self.rewind()
+
+    def write(self, doc: dict) -> int:
+        """Buffer a document in the current segment; not durable until synced."""
+        seq = self.next_seq
+        self._file.write(b"%d\t%s\n" % (seq, json_util.dumps(doc).encode()))
+        self.next_seq += 1
+        return seq
+
+    async def append(self, doc: dict) -> int:
+        """Write a document and wait until it is on disk."""
+        seq = self.write(doc)
+        await self.sync(seq)
+        return seq
+
+    async def sync(self, seq: Optional[int] = None) -> None:
+        seq = self.next_seq - 1 if seq is None else seq
+        while self.synced_seq < seq:
+            if self._syncing is None:
+                self._syncing = asyncio.get_running_loop().create_task(self._group_commit())
+            await asyncio.shield(self._syncing)
+
+    async def _group_commit(self) -> None:
+        try:
+            await asyncio.sleep(self.fsync_interval)
+            target = self.next_seq - 1
+            self._file.flush()
+            await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._file.fileno())
+            self.fsyncs += 1
+            self.synced_seq = target
+            if self._file.tell() >= self.segment_bytes:
+                await self._rotate()
+        finally:
+            self._syncing = None
+
+    async def _rotate(self) -> None:
+        # Appends made while the old file is synced already go to the new one.
+        loop = asyncio.get_running_loop()
+        old, target = self._file, self.next_seq - 1
+        self._segment_first = self.next_seq
+        self._file = open(self._segment_path(self._segment_first), "ab")
+        try:
+            if target > self.synced_seq:
+                old.flush()
+                await loop.run_in_executor(None, os.fsync, old.fileno())
+                self.synced_seq = target
+        finally:
+            old.close()
+        await loop.run_in_executor(None, fsync_directory, self.directory)
+
+    def rewind(self) -> None:
+        """Move the read position back to the last acknowledged record."""
+        self._read_seq = self.acked
+        self._read_segment: Optional[Path] = None
+        self._read_offset = 0
+
+    def read_batch(self, limit: int) -> List[Tuple[int, dict]]:
+        """Return up to ``limit`` durable records after the current read position."""
+        records: List[Tuple[int, dict]] = []
+        segments = self._segments()
+        for i, (first_seq, path) in enumerate(segments):
+            next_first = segments[i + 1][0] if i + 1 < len(segments) else None
+            if next_first is not None and next_first <= self._read_seq + 1:
+                continue
+            if path != self._read_segment:
+                self._read_segment, self._read_offset = path, 0
+            with open(path, "rb") as f:
+                f.seek(self._read_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    seq, payload = line.split(b"\t", 1)
+                    seq = int(seq)
+                    if seq > self.synced_seq:
+                        return records
+                    self._read_offset += len(line)
+                    if seq <= self._read_seq:
+                        continue
+                    records.append((seq, json_util.loads(payload)))
+                    self._read_seq = seq
+                    if len(records) >= limit:
+                        return records
+        return records
+
+    def ack(self, seq: int) -> None:
+        """Persist ``seq`` as drained and delete segments that are fully drained."""
+        tmp = self._checkpoint_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            f.write(str(seq))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._checkpoint_path)
+        self.acked = seq
+        segments = self._segments()
+        for (first_seq, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first - 1 <= seq and first_seq != self._segment_first:
+                path.unlink()
+
+    @property
+    def pending(self) -> int:
+        return self.next_seq - 1 - self.acked
+
+    def close(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.synced_seq = self.next_seq - 1
+        self._file.close()
+        self._lock.close()
+
+
+def open_worker_spool(root) -> AuditSpool:
+    """
+    Open the first spool under ``root`` (``root/0``, ``root/1``, ...) not
+    held by another process, so workers sharing ``AUDIT_SPOOL_DIR`` never
+    append to the same segments and a restarted worker takes over what the
+    one before it left undrained.
+    """
+    n = 0
+    while True:
+        try:
+            return AuditSpool(Path(root) / str(n))
+        except SpoolLocked:
+            n += 1
+
+
+async def insert_idempotent(collection, docs: List[dict]) -> int:
+    """
+    Insert documents that carry their own ``_id``; documents already present
+    (from a replay after a crash) are skipped. Returns the number inserted.
+    """
+    try:
+        result = await collection.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != DUPLICATE_KEY for err in errors):
+            raise
+        return e.details.get("nInserted", 0)
+
+
+class SpooledAuditSink:
+    """
+    Audit sink that writes each record to an ``AuditSpool`` before returning
+    and replays the spool into MongoDB from a background drainer. Request
+    latency is one group-committed fsync, whatever state MongoDB is in, and
+    records survive restarts until they are acknowledged.
+
+    Records are given their ``_id`` when spooled, so replaying a batch that
+    was written but not acknowledged before a crash is a no-op.
+    """
+
+    def __init__(
+        self,
+        spool: AuditSpool,
+        collection,
+        batch_size: int = AUDIT_DRAIN_BATCH_SIZE,
+        drain_interval: float = AUDIT_DRAIN_INTERVAL,
+        max_backoff: float = AUDIT_DRAIN_MAX_BACKOFF,
+    ):
+        self.spool = spool
+        self.collection = collection
+        self.batch_size = batch_size
+        self.drain_interval = drain_interval
+        self.max_backoff = max_backoff
+        self._wakeup = asyncio.Event()
+        self._drain_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def enqueue(self, audit_log: AuditLog) -> bool:
+        return await self.enqueue_many([audit_log]) == 1
+
+    async def enqueue_many(self, audit_logs: List[AuditLog]) -> int:
+        """Spool several records behind a single fsync."""
+        self.start()
+        with span("audit"):
+            for audit_log in audit_logs:
+                doc = audit_log.dict()
+                doc["_id"] = ObjectId()
+                doc[ROLLUP_PENDING] = True
+                doc[CHAIN_PENDING] = True
+                self.spool.write(doc)
+            await self.spool.sync()
+        self.enqueued += len(audit_logs)
+        if self.spool.pending >= self.batch_size:
+            self._wakeup.set()
+        return len(audit_logs)
+
+    async def _in_thread(self, fn, *args):
+        future = asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Let the thread finish with the spool's read state before unwinding.
+            await asyncio.wait([future])
+            raise
+
+    async def drain(self) -> int:
+        """Replay everything currently spooled. Returns the number of records drained."""
+        drained = 0
+        async with self._drain_lock:
+            try:
+                while True:
+                    batch = await self._in_thread(self.spool.read_batch, self.batch_size)
+                    if not batch:
+                        return drained
+                    try:
+                        self.written += await insert_idempotent(self.collection, [doc for _, doc in batch])
+                    except Exception:
+                        self.failures += 1
+                        raise
+                    await self._in_thread(self.spool.ack, batch[-1][0])
+                    self.batches += 1
+                    drained += len(batch)
+            except BaseException:
+                self.spool.rewind()
+                raise
+
+    async def _run(self) -> None:
+        backoff = self.drain_interval
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            try:
+                await self.drain()
+                backoff = self.drain_interval
+            except Exception:
+                logger.exception("Failed to drain audit spool; %d records pending", self.spool.pending)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    async def stop(self) -> None:
+        """Stop the drainer, make one last attempt to drain, and close the spool."""
+        if self._task is not None:
+            # wait_for() can swallow a cancel that races with the wakeup,
+            # so the loop also checks the flag.
+            self._stopping = True
+            self._wakeup.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.spool.sync()
+        try:
+            await self.drain()
+        except Exception:
+            logger.exception("Audit spool left with %d undrained records", self.spool.pending)
+        self.spool.close()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.spool.pending,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "fsyncs": self.spool.fsyncs,
+            "segments": len(self.spool._segments()),
+        }
@@ -0,0 +1,259 @@
+from typing import List, NamedTuple, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+import asyncio
+import hashlib
+import hmac
+import logging
+import multiprocessing
+import os
+import uuid
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from .chain import CONTENT_FIELDS, GENESIS, entry_hash
+from .lease import claim_lease
+
+AUDIT_CHECKPOINT_KEY = os.getenv("AUDIT_CHECKPOINT_KEY")
+AUDIT_VERIFY_INTERVAL = float(os.getenv("AUDIT_VERIFY_INTERVAL", "3600"))
+AUDIT_VERIFY_PROCESSES = int(os.getenv("AUDIT_VERIFY_PROCESSES", str(os.cpu_count() or 1)))
+AUDIT_VERIFY_CHUNK_SIZE = int(os.getenv("AUDIT_VERIFY_CHUNK_SIZE", "10000"))
+AUDIT_VERIFY_LEASE_SECONDS = float(os.getenv("AUDIT_VERIFY_LEASE_SECONDS", "600"))
+
+STATE_ID = "audit_verify"
+CHECKPOINT_INDEXES = [
+    IndexModel([("tenant_id", ASCENDING), ("seq", DESCENDING)], name="tenant_seq"),
+]
+
+logger = logging.getLogger(__name__)
+
+
+class Segment(NamedTuple):
+    """What a worker found in a run of consecutive logs of one chain."""
+
+    first_seq: int
+    first_prev_hash: str
+    last_seq: int
+    last_hash: str
+    error: Optional[str]
+
+
+def verify_segment(docs: List[dict]) -> Segment:
+    """
+    Recompute the hash of each log in ``docs`` (sorted by ``seq``) and check
+    they link to one another. Runs in a worker process; linking the segment
+    to the one before it is left to the caller.
+    """
+    first, error = docs[0], None
+    prev_seq, prev_hash = first["seq"] - 1, first["prev_hash"]
+    for doc in docs:
+        if doc["seq"] != prev_seq + 1:
+            error = f"seq {prev_seq + 1} is missing"
+        elif doc["prev_hash"] != prev_hash:
+            error = f"seq {doc['seq']} does not link to seq {prev_seq}"
+        elif entry_hash(doc, doc["seq"], doc["prev_hash"]) != doc["hash"]:
+            error = f"seq {doc['seq']} was modified"
+        if error:
+            break
+        prev_seq, prev_hash = doc["seq"], doc["hash"]
+    return Segment(first["seq"], first["prev_hash"], prev_seq, prev_hash, error)
+
+
+def sign_checkpoint(key: bytes, tenant_id: Optional[str], seq: int, digest: str, created_at: datetime) -> str:
+    message = f"{tenant_id or ''}|{seq}|{digest}|{created_at.isoformat()}"
+    return hmac.new(key, message.encode(), hashlib.sha256).hexdigest()
+
+
+class AuditVerifier:
+    """
+    Checks the audit chains built by ``shared.audit.chain`` and records a
+    signed checkpoint of each chain head it has verified.
+
+    A checkpoint holds a tenant's verified ``seq`` and ``hash``, signed with
+    HMAC-SHA256 under ``AUDIT_CHECKPOINT_KEY``, and is kept in its own
+    collection. Each run starts every tenant from its last checkpoint, so
+    its cost follows the logs added since the previous run rather than the
+    whole history; logs behind a checkpoint are not read again. Tenants'
+    new logs are split into chunks of ``chunk_size`` and hashed in a process
+    pool of ``processes`` workers, and the chunk edges are linked up here.
+
+    A chain that fails is reported and gets no new checkpoint, so the next
+    run checks it again from the same place. Removing logs after the last
+    checkpoint shows up as a gap, which is why verification must run more
+    often than logs are archived.
+    """
+
+    def __init__(
+        self,
+        logs,
+        checkpoints,
+        state,
+        key: Optional[str] = AUDIT_CHECKPOINT_KEY,
+        processes: int = AUDIT_VERIFY_PROCESSES,
+        chunk_size: int = AUDIT_VERIFY_CHUNK_SIZE,
+        interval: float = AUDIT_VERIFY_INTERVAL,
+        lease_seconds: float = AUDIT_VERIFY_LEASE_SECONDS,
+    ):
+        if key is None:
+            from shared.config import get_settings
+            key = get_settings().secret_key
+        self.logs = logs
+        self.checkpoints = checkpoints
+        self.state = state
+        self.key = key.encode()
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self._pool: Optional[Executor] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self.runs = 0
+        self.verified = 0
+        self.failures = 0
+
+    async def ensure_indexes(self) -> None:
+        try:
+            await self.checkpoints.create_indexes(CHECKPOINT_INDEXES)
+        except Exception:
+            logger.exception("Failed to create audit checkpoint indexes")
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            # Workers only hash; spawning keeps them clear of the parent's threads.
+            self._pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def last_checkpoint(self, tenant_id: Optional[str]) -> Optional[dict]:
+        return await self.checkpoints.find_one({"tenant_id": tenant_id}, sort=[("seq", DESCENDING)])
+
+    async def verify(self) -> List[dict]:
+        """
+        Verify every chain from its last checkpoint. Returns one result per
+        tenant: ``tenant_id``, ``verified`` (logs checked), ``seq`` (the
+        verified head) and ``error`` (``None`` when the chain is intact).
+        Returns an empty list if another worker holds the verification lease.
+        """
+        if await claim_lease(self.state, STATE_ID, self.owner, self.lease_seconds) is None:
+            return []
+        tenants = await self.logs.distinct("tenant_id", {"seq": {"$exists": True}})
+        limit = asyncio.Semaphore(max(self.processes, 1) * 2)
+
+        async def verify_tenant(tenant_id):
+            async with limit:
+                return await self.verify_tenant(tenant_id)
+
+        results = await asyncio.gather(*(verify_tenant(tenant_id) for tenant_id in tenants))
+        self.runs += 1
+        for result in results:
+            self.verified += result["verified"]
+            if result["error"]:
+                self.failures += 1
+                logger.error("Audit chain of tenant %s failed verification: %s", result["tenant_id"], result["error"])
+        return results
+
+    async def verify_tenant(self, tenant_id: Optional[str]) -> dict:
+        result = {"tenant_id": tenant_id, "verified": 0, "seq": 0, "error": None}
+        checkpoint = await self.last_checkpoint(tenant_id)
+        seq, digest = 0, GENESIS
+        if checkpoint is not None:
+            signature = sign_checkpoint(self.key, tenant_id, checkpoint["seq"], checkpoint["hash"], checkpoint["created_at"])
+            if not hmac.compare_digest(signature, checkpoint.get("signature", "")):
+                result["error"] = f"checkpoint at seq {checkpoint['seq']} has a bad signature"
+                return result
+            seq, digest = checkpoint["seq"], checkpoint["hash"]
+        result["seq"] = seq
+
+        loop = asyncio.get_running_loop()
+        projection = {field: 1 for field in CONTENT_FIELDS + ("seq", "prev_hash", "hash")}
+        cursor = self.logs.find({"tenant_id": tenant_id, "seq": {"$gt": seq}}, projection).sort(
+            [("seq", ASCENDING)]
+        ).batch_size(self.chunk_size)
+        segments, chunk = [], []
+        async for doc in cursor:
+            chunk.append(doc)
+            if len(chunk) >= self.chunk_size:
+                segments.append(loop.run_in_executor(self._executor(), verify_segment, chunk))
+                chunk = []
+        if chunk:
+            segments.append(loop.run_in_executor(self._executor(), verify_segment, chunk))
+        if not segments:
+            return result
+
+        for segment in await asyncio.gather(*segments):
+            if segment.first_seq != seq + 1:
+                result["error"] = f"seq {seq + 1} is missing"
+            elif segment.first_prev_hash != digest:
+                result["error"] = f"seq {segment.first_seq} does not link to seq {seq}"
+            else:
+                result["error"] = segment.error
+                result["verified"] += segment.last_seq - seq
+                seq, digest = segment.last_seq, segment.last_hash
+            if result["error"]:
+                break
+        if seq > result["seq"]:
+            # Checkpoint whatever verified, even short of an error.
+            created_at = datetime.utcnow().replace(microsecond=0)
+            await self.checkpoints.insert_one({
+                "tenant_id": tenant_id,
+                "seq": seq,
+                "hash": digest,
+                "created_at": created_at,
+                "signature": sign_checkpoint(self.key, tenant_id, seq, digest, created_at),
+            })
+            result["seq"] = seq
+        return result
+
+    def start(self) -> None:
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await self.verify()
+            except Exception:
+                logger.exception("Audit chain verification failed to run")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {"runs": self.runs, "verified": self.verified, "failures": self.failures}
+
+
+_verifier: Optional[AuditVerifier] = None
+
+
+def get_audit_verifier() -> AuditVerifier:
+    """Return the process-wide verifier over ``audit_logs`` and ``audit_checkpoints``."""
+    global _verifier
+    if _verifier is None:
+        from shared.database.mongodb import get_database
+        db = get_database()
+        _verifier = AuditVerifier(db.audit_logs, db.audit_checkpoints, db.audit_chain_state)
+    return _verifier
+
+
+async def close_audit_verifier() -> None:
+    global _verifier
+    if _verifier is not None:
+        await _verifier.stop()
+        _verifier = None
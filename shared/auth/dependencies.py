@@ -1,33 +1,73 @@
-from fastapi import Header, HTTPException, Depends
-from supabase import Client
+from typing import Optional
+import uuid
+from fastapi import Depends, Header, HTTPException
 import jwt
-import os
-from .supabase import get_supabase_client
+from shared.config import get_settings
+from shared.metrics.timing import span
+from .token_cache import token_cache
 
-SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
-
-async def get_current_user(authorization: str = Header(...), supabase: Client = Depends(get_supabase_client)):
+def verify_token(token: str) -> dict:
     """
-    Validate JWT and return user data with role.
+    Return the principal (``id``, ``email``, ``role``, ``tenant_id``) for a
+    bearer token, from the cache or by verifying its signature. The tenant
+    comes from a ``tenant_id`` claim or Supabase's ``app_metadata``. Raises ``HTTPException``
+    (401) for a token without a subject or role, and ``jwt`` errors for an
+    invalid or expired one.
     """
-    try:
-        if not authorization.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Invalid token format")
-        
-        token = authorization.replace("Bearer ", "")
-        decoded = jwt.decode(token, SUPABASE_JWT_SECRET, algorithms=["HS256"])
-        
+    principal = token_cache.get(token)
+    if principal is None:
+        decoded = jwt.decode(token, get_settings().supabase_jwt_secret, algorithms=["HS256"])
+
         user_id = decoded.get("sub")
         role = decoded.get("role")
-        
+
         if not user_id or not role:
             raise HTTPException(status_code=401, detail="Invalid token payload")
-        
-        if role != "sysadmin":
-            raise HTTPException(status_code=403, detail="System admin access required")
-        
-        return {"id": user_id, "email": decoded.get("email"), "role": role}
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
+
+        tenant_id = decoded.get("tenant_id") or (decoded.get("app_metadata") or {}).get("tenant_id")
+        principal = {"id": user_id, "email": decoded.get("email"), "role": role, "tenant_id": tenant_id}
+        token_cache.set(token, principal, decoded.get("exp"))
+    return principal
+
+async def get_principal(authorization: str = Header(...)) -> dict:
+    """
+    Validate JWT and return the caller, whatever their role.
+    Verified tokens are cached until they expire, so repeat requests skip
+    signature verification.
+    """
+    with span("auth"):
+        try:
+            if not authorization.startswith("Bearer "):
+                raise HTTPException(status_code=401, detail="Invalid token format")
+            return dict(verify_token(authorization[len("Bearer "):]))
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token expired")
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+async def get_current_user(authorization: str = Header(...)):
+    """
+    Validate JWT and return user data with role (system admins only).
+    """
+    principal = await get_principal(authorization)
+    if principal["role"] != "sysadmin":
+        raise HTTPException(status_code=403, detail="System admin access required")
+    return principal
+
+async def get_tenant_id(
+    x_tenant_id: Optional[uuid.UUID] = Header(None),
+    principal: dict = Depends(get_principal)
+) -> str:
+    """
+    The tenant a request acts for: the one in the caller's token. System
+    admins belong to no tenant and name one with ``X-Tenant-ID``; anyone
+    else sending a different one is refused with 403.
+    """
+    if principal["role"] == "sysadmin" and x_tenant_id is not None:
+        return str(x_tenant_id)
+    tenant_id = principal.get("tenant_id")
+    if not tenant_id:
+        raise HTTPException(status_code=403, detail="The token is not bound to a tenant")
+    if x_tenant_id is not None and str(x_tenant_id) != str(tenant_id).lower():
+        raise HTTPException(status_code=403, detail="X-Tenant-ID does not match the token's tenant")
+    return str(tenant_id)
\ No newline at end of file
@@ -0,0 +1,68 @@
+from typing import Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import os
+import time
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+
+
+class TokenCache:
+    """
+    Bounded LRU of already-verified JWTs, keyed by a SHA-256 of the token so
+    raw credentials are never held in memory. An entry lives until the
+    token's ``exp`` (or ``ttl`` seconds for tokens without one, whichever is
+    sooner), after which the token is verified again and rejected as expired.
+    A ``maxsize`` of 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = AUTH_TOKEN_CACHE_SIZE, ttl: float = AUTH_TOKEN_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, principal = entry
+            if expires > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return principal
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, token: str, principal: dict, exp: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        expires = time.time() + self.ttl
+        if exp is not None:
+            expires = min(expires, float(exp))
+        key = self._key(token)
+        self._entries[key] = (expires, principal)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+token_cache = TokenCache()
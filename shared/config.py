@@ -1,24 +1,104 @@
-import os
+from dataclasses import dataclass
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import Mapping, Optional
+import os
+
+ENV_PATH = Path(os.getenv("ENV_FILE") or Path(__file__).parent.parent / '.env')
+
+_env_loaded = False
+
+
+def load_env() -> None:
+    """
+    Load ``.env`` into the environment once, never overriding variables
+    that are already set. Called when the ``shared`` package is imported,
+    before any module reads its tunables; python-dotenv is only imported if
+    the file exists.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        _env_loaded = True
+        if ENV_PATH.is_file():
+            from dotenv import load_dotenv
+            load_dotenv(ENV_PATH)
+
+
+def _first(environ: Mapping[str, str], *names: str, default: Optional[str] = None) -> Optional[str]:
+    for name in names:
+        value = environ.get(name)
+        if value:
+            return value
+    return default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Connection and identity settings shared by every service.
+
+    Built once from the environment, with ``.env`` already loaded by
+    ``load_env``, by ``get_settings``. Feature tunables
+    such as batch sizes stay next to the code that uses them.
+    """
+
+    # Supabase
+    supabase_url: Optional[str] = None
+    supabase_key: Optional[str] = None
+    supabase_service_key: Optional[str] = None
+    supabase_jwt_secret: Optional[str] = None
+    supabase_pool_size: int = 10
+    supabase_pool_timeout: float = 10.0
+    supabase_max_in_flight: int = 20
+
+    # MongoDB
+    mongodb_url: str = "mongodb://localhost:27017"
+    mongodb_db_name: str = "zubaschool"
+    mongodb_server_selection_timeout_ms: int = 2000
+    mongodb_timeout_ms: Optional[int] = None
+
+    # JWT
+    secret_key: str = "your-secret-key-change-this-in-production"
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = 30
+
+    # Environment
+    environment: str = "development"
 
-# Load environment variables from .env file
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(env_path)
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "Settings":
+        """
+        Read settings from ``environ``. ``MONGODB_URI`` and ``MONGODB_DB``
+        are accepted as fallbacks for ``MONGODB_URL`` and ``MONGODB_DB_NAME``.
+        """
+        pool_size = int(environ.get("SUPABASE_POOL_SIZE", cls.supabase_pool_size))
+        return cls(
+            supabase_url=environ.get("SUPABASE_URL"),
+            supabase_key=environ.get("SUPABASE_KEY"),
+            supabase_service_key=environ.get("SUPABASE_SERVICE_KEY"),
+            supabase_jwt_secret=environ.get("SUPABASE_JWT_SECRET"),
+            supabase_pool_size=pool_size,
+            supabase_pool_timeout=float(environ.get("SUPABASE_POOL_TIMEOUT", cls.supabase_pool_timeout)),
+            supabase_max_in_flight=int(environ.get("SUPABASE_MAX_IN_FLIGHT", pool_size * 2)),
+            mongodb_url=_first(environ, "MONGODB_URL", "MONGODB_URI", default=cls.mongodb_url),
+            mongodb_db_name=_first(environ, "MONGODB_DB_NAME", "MONGODB_DB", default=cls.mongodb_db_name),
+            mongodb_server_selection_timeout_ms=int(
+                environ.get("MONGODB_SERVER_SELECTION_TIMEOUT_MS", cls.mongodb_server_selection_timeout_ms)
+            ),
+            mongodb_timeout_ms=int(environ["MONGODB_TIMEOUT_MS"]) if environ.get("MONGODB_TIMEOUT_MS") else None,
+            secret_key=environ.get("SECRET_KEY", cls.secret_key),
+            algorithm=environ.get("ALGORITHM", cls.algorithm),
+            access_token_expire_minutes=int(environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", cls.access_token_expire_minutes)),
+            environment=environ.get("ENVIRONMENT", cls.environment),
+        )
 
-# Supabase Configuration
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
-# MongoDB Configuration
-MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "zubaschool")
+_settings: Optional[Settings] = None
 
-# JWT Configuration
-SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-# Environment
-ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
\ No newline at end of file
+def get_settings() -> Settings:
+    """Return the process-wide settings, reading the environment on first use."""
+    global _settings
+    if _settings is None:
+        load_env()
+        _settings = Settings.from_env()
+    return _settings
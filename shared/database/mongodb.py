@@ -1,7 +1,55 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from typing import Optional
+from shared.config import get_settings
+from shared.metrics.mongo import CommandTimer, PoolTracker
 
-MONGODB_URI = os.getenv("MONGODB_URI")
-MONGODB_DB = os.getenv("MONGODB_DB", "zubaschool")
-mongo_client = AsyncIOMotorClient(MONGODB_URI)
-db = mongo_client[MONGODB_DB]
\ No newline at end of file
+pool_tracker = PoolTracker()
+_client = None
+_db = None
+
+
+def get_mongo_client():
+    """
+    Return the process-wide Motor client, creating it on first use. Creating
+    it starts the driver's monitoring threads, so nothing does so at import.
+    Operations give up after ``mongodb_server_selection_timeout_ms`` when
+    no server is reachable, instead of the driver's 30 seconds.
+    ``mongodb_timeout_ms`` bounds every operation, including the lifetime
+    of a cursor, so it is off unless set: exports and archiving iterate
+    cursors for longer than a request should take.
+    """
+    global _client
+    if _client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        settings = get_settings()
+        _client = AsyncIOMotorClient(
+            settings.mongodb_url,
+            serverSelectionTimeoutMS=settings.mongodb_server_selection_timeout_ms,
+            timeoutMS=settings.mongodb_timeout_ms,
+            event_listeners=[CommandTimer(), pool_tracker],
+        )
+    return _client
+
+
+def get_database():
+    global _db
+    if _db is None:
+        _db = get_mongo_client()[get_settings().mongodb_db_name]
+    return _db
+
+
+def close_mongo_client() -> None:
+    """Close the client's connection pool and monitors."""
+    global _client, _db
+    if _client is not None:
+        _client.close()
+        _client = None
+        _db = None
+
+
+def __getattr__(name: str):
+    # Keeps ``from shared.database.mongodb import db, mongo_client`` working.
+    if name == "db":
+        return get_database()
+    if name == "mongo_client":
+        return get_mongo_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
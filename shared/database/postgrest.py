@@ -0,0 +1,185 @@
+from postgrest import AsyncRequestBuilder
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from postgrest.utils import AsyncClient
+from fastapi import Header
+from typing import List, Optional
+import asyncio
+import httpx
+from time import perf_counter
+from shared.metrics.registry import SUPABASE_POOL_WAITS, SUPABASE_REQUEST_DURATION, SUPABASE_REQUESTS_IN_FLIGHT
+from shared.metrics.timing import record_span
+from shared.config import get_settings
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no PostgREST slot becomes free within the acquire timeout."""
+
+
+class AsyncPostgrest:
+    """
+    Native async PostgREST access for route handlers.
+
+    One ``httpx.AsyncClient`` (and so one connection pool) is shared by the
+    whole process. In-flight queries are bounded by a semaphore; callers
+    beyond the bound queue on the event loop rather than piling onto the
+    connection pool, and give up with ``PoolExhaustedError`` after
+    ``acquire_timeout`` seconds.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_connections: int = 10,
+        max_in_flight: int = 20,
+        acquire_timeout: float = 10,
+        schema: str = "public",
+    ):
+        self.key = key
+        self.max_connections = max_connections
+        self.max_in_flight = max_in_flight
+        self.acquire_timeout = acquire_timeout
+        self.session = AsyncClient(
+            base_url=f"{url}/rest/v1",
+            headers={
+                **DEFAULT_POSTGREST_CLIENT_HEADERS,
+                "apiKey": key,
+                "Authorization": f"Bearer {key}",
+                "Accept-Profile": schema,
+                "Content-Profile": schema,
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+        )
+        self._limiter = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.waits = 0
+
+    async def request(self, method: str, url: str, *, jwt: Optional[str] = None, headers=None, **kwargs) -> httpx.Response:
+        headers = httpx.Headers(headers)
+        if jwt:
+            headers["Authorization"] = f"Bearer {jwt}"
+        if self._limiter.locked():
+            self.waits += 1
+            SUPABASE_POOL_WAITS.inc()
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._limiter.acquire(), timeout=self.acquire_timeout)
+            except asyncio.TimeoutError:
+                raise PoolExhaustedError("Timed out waiting for a PostgREST slot") from None
+            finally:
+                self.waiting -= 1
+        else:
+            # Uncontended acquire completes without yielding to the loop
+            await self._limiter.acquire()
+        self.in_flight += 1
+        self.requests += 1
+        SUPABASE_REQUESTS_IN_FLIGHT.inc()
+        status = "error"
+        start = perf_counter()
+        try:
+            response = await self.session.request(method, url, headers=headers, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = perf_counter() - start
+            SUPABASE_REQUEST_DURATION.observe((method, url.lstrip("/").split("?", 1)[0], status), elapsed)
+            record_span("supabase", elapsed)
+            SUPABASE_REQUESTS_IN_FLIGHT.dec()
+            self.in_flight -= 1
+            self._limiter.release()
+
+    def for_user(self, jwt: Optional[str] = None) -> "PostgrestSession":
+        return PostgrestSession(self, jwt)
+
+    def table(self, table_name: str) -> AsyncRequestBuilder:
+        return self.for_user().table(table_name)
+
+    def stats(self) -> dict:
+        return {
+            "max_connections": self.max_connections,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "waits": self.waits,
+        }
+
+    async def aclose(self) -> None:
+        await self.session.aclose()
+
+
+class PostgrestSession:
+    """
+    Request-scoped view of ``AsyncPostgrest`` carrying the caller's JWT.
+    Quacks like the session postgrest's request builders expect.
+    """
+
+    def __init__(self, postgrest: AsyncPostgrest, jwt: Optional[str] = None):
+        self.postgrest = postgrest
+        self.jwt = jwt
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self.postgrest.request(method, url, jwt=self.jwt, **kwargs)
+
+    def table(self, table_name: str) -> AsyncRequestBuilder:
+        return AsyncRequestBuilder(self, f"/{table_name}")
+
+
+async def fetch_all(postgrest, table: str, columns: str, key: str, page_size: int = 1000) -> List[dict]:
+    """Every row of ``table``, read in keyset pages of ``page_size`` ordered by the unique ``key``."""
+    rows: List[dict] = []
+    last = None
+    while True:
+        query = postgrest.table(table).select(columns).order(key).limit(page_size)
+        if last is not None:
+            query = query.gt(key, last)
+        page = (await query.execute()).data
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        last = page[-1][key]
+
+
+_postgrest: Optional[AsyncPostgrest] = None
+
+
+def get_async_postgrest() -> AsyncPostgrest:
+    """Return the process-wide async PostgREST client, creating it on first use."""
+    global _postgrest
+    if _postgrest is None:
+        settings = get_settings()
+        _postgrest = AsyncPostgrest(
+            settings.supabase_url,
+            settings.supabase_key,
+            max_connections=settings.supabase_pool_size,
+            max_in_flight=settings.supabase_max_in_flight,
+            acquire_timeout=settings.supabase_pool_timeout,
+        )
+    return _postgrest
+
+
+def postgrest_backlog() -> int:
+    """Queries in flight or queued on the process-wide client; 0 before it is created."""
+    return 0 if _postgrest is None else _postgrest.in_flight + _postgrest.waiting
+
+
+async def close_async_postgrest() -> None:
+    global _postgrest
+    if _postgrest is not None:
+        await _postgrest.aclose()
+        _postgrest = None
+
+
+async def get_postgrest(authorization: Optional[str] = Header(None)) -> PostgrestSession:
+    """
+    FastAPI dependency yielding a PostgREST session for the caller.
+    The caller's bearer token, if any, is forwarded so RLS applies.
+    """
+    jwt = None
+    if authorization and authorization.startswith("Bearer "):
+        jwt = authorization.replace("Bearer ", "")
+    return get_async_postgrest().for_user(jwt)
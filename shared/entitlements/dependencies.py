@@ -0,0 +1,41 @@
+from fastapi import Depends, HTTPException
+from shared.auth.dependencies import get_tenant_id
+from shared.database.postgrest import get_async_postgrest
+from .engine import Entitlements, feature_bit, get_entitlement_engine
+
+
+async def get_tenant_entitlements(tenant_id: str) -> Entitlements:
+    """
+    The tenant's entitlements, or 404 if there is no such tenant. The
+    database is only read the first time the engine or a tenant is seen,
+    with the service session: the engine's snapshot is shared by every
+    caller, so it must not be filtered by one caller's RLS.
+    """
+    engine = get_entitlement_engine()
+    postgrest = get_async_postgrest().for_user()
+    entitlements = engine.get(tenant_id)
+    if entitlements is None:
+        entitlements = await engine.resolve(tenant_id, postgrest)
+        if entitlements is None:
+            raise HTTPException(status_code=404, detail="Tenant not found")
+    elif engine.stale:
+        engine.refresh_in_background(postgrest)
+    return entitlements
+
+
+def require_feature(feature: str):
+    """
+    FastAPI dependency factory: ``Depends(require_feature("analytics"))``
+    rejects requests for the caller's tenant (see ``get_tenant_id``) whose
+    plan doesn't include ``feature`` with 403, and otherwise yields the
+    tenant's ``Entitlements``. The check is a dict lookup and a bitwise AND.
+    """
+    bit = feature_bit(feature)
+
+    async def check_feature(tenant_id: str = Depends(get_tenant_id)) -> Entitlements:
+        entitlements = await get_tenant_entitlements(tenant_id)
+        if not entitlements.features & bit:
+            raise HTTPException(status_code=403, detail=f"Feature '{feature}' is not included in the tenant's plan")
+        return entitlements
+
+    return check_feature
@@ -0,0 +1,252 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from dataclasses import dataclass, replace
+import asyncio
+import logging
+import os
+import time
+from shared.database.postgrest import fetch_all
+
+ENTITLEMENT_REFRESH_SECONDS = float(os.getenv("ENTITLEMENT_REFRESH_SECONDS", "60"))
+ENTITLEMENT_MISSING_TTL = float(os.getenv("ENTITLEMENT_MISSING_TTL", "30"))
+
+# Tenants in any other status keep their plan's limits but lose its features.
+ACTIVE_STATUS = "Active"
+
+logger = logging.getLogger(__name__)
+
+_feature_bits: Dict[str, int] = {}
+
+
+def feature_bit(name: str) -> int:
+    """The bit standing for feature ``name``; bits are handed out on first use."""
+    bit = _feature_bits.get(name)
+    if bit is None:
+        bit = _feature_bits.setdefault(name, 1 << len(_feature_bits))
+    return bit
+
+
+@dataclass(frozen=True)
+class Entitlements:
+    """A plan compiled for lookups: enabled features as a bitset, plus its quotas."""
+
+    plan_id: Optional[str]
+    features: int
+    feature_names: FrozenSet[str]
+    max_users: Optional[int]
+    max_storage_mb: Optional[int]
+
+    def has(self, feature: str) -> bool:
+        return bool(self.features & feature_bit(feature))
+
+
+NO_ENTITLEMENTS = Entitlements(None, 0, frozenset(), None, None)
+
+
+def compile_plan(plan: dict) -> Entitlements:
+    """Compile a ``subscription_plans`` row; features are ``{name, enabled}`` objects."""
+    names = frozenset(
+        feature["name"] for feature in plan.get("features") or ()
+        if feature.get("enabled", True)
+    )
+    bits = 0
+    for name in names:
+        bits |= feature_bit(name)
+    return Entitlements(str(plan["plan_id"]), bits, names, plan.get("max_users"), plan.get("max_storage_mb"))
+
+
+class EntitlementEngine:
+    """
+    Per-tenant entitlements resolved ahead of time.
+
+    Plans are compiled once into ``Entitlements``, and every tenant is bound
+    to its plan's compiled object, so a check is a dict lookup and a bitwise
+    AND. ``set_plan`` and ``set_tenant`` apply local writes immediately
+    (rebinding every tenant on a changed plan); everything is reloaded from
+    Supabase in the background once older than ``refresh_seconds``, which
+    picks up changes made by other processes. Tenants created since the last
+    load are fetched individually on a miss, and unknown IDs are remembered
+    for ``missing_ttl`` seconds so bad IDs cannot turn into a query per
+    request.
+    """
+
+    def __init__(self, refresh_seconds: float = ENTITLEMENT_REFRESH_SECONDS,
+                 missing_ttl: float = ENTITLEMENT_MISSING_TTL):
+        self.refresh_seconds = refresh_seconds
+        self.missing_ttl = missing_ttl
+        self._plans: Dict[str, Entitlements] = {}
+        self._tenants: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self._tenants_by_plan: Dict[Optional[str], Set[str]] = {}
+        self._by_tenant: Dict[str, Entitlements] = {}
+        self._missing: Dict[str, float] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._writes: Optional[List[Tuple[str, dict]]] = None
+        self.loaded_at: Optional[float] = None
+        self.loads = 0
+        self.lookups = 0
+
+    def _bind(self, tenant_id: str) -> None:
+        plan_id, status = self._tenants[tenant_id]
+        entitlements = NO_ENTITLEMENTS if plan_id is None else self._plans.get(plan_id)
+        if entitlements is None:
+            # Plan not seen yet: leave the tenant to the slow path, which fetches it.
+            self._by_tenant.pop(tenant_id, None)
+            return
+        if status != ACTIVE_STATUS and entitlements.features:
+            entitlements = replace(entitlements, features=0, feature_names=frozenset())
+        self._by_tenant[tenant_id] = entitlements
+
+    def set_plan(self, plan: dict) -> None:
+        """Recompile a created or updated plan and rebind the tenants on it."""
+        if self._writes is not None:
+            self._writes.append(("plan", plan))
+        plan_id = str(plan["plan_id"])
+        self._plans[plan_id] = compile_plan(plan)
+        for tenant_id in self._tenants_by_plan.get(plan_id, ()):
+            self._bind(tenant_id)
+
+    def set_tenant(self, tenant: dict) -> None:
+        """Bind a created or updated tenant to its plan."""
+        if self._writes is not None:
+            self._writes.append(("tenant", tenant))
+        tenant_id = str(tenant["tenant_id"])
+        plan_id = tenant.get("subscription_plan_id")
+        plan_id = str(plan_id) if plan_id is not None else None
+        previous = self._tenants.get(tenant_id)
+        if previous is not None:
+            self._tenants_by_plan.get(previous[0], set()).discard(tenant_id)
+        self._tenants[tenant_id] = (plan_id, tenant.get("status", ACTIVE_STATUS))
+        self._tenants_by_plan.setdefault(plan_id, set()).add(tenant_id)
+        self._bind(tenant_id)
+        self._missing.pop(tenant_id, None)
+
+    def sync(self, plans: Iterable[dict], tenants: Iterable[dict]) -> None:
+        """Replace everything with a full snapshot of plans and tenants."""
+        self._plans = {str(plan["plan_id"]): compile_plan(plan) for plan in plans}
+        self._tenants, self._tenants_by_plan, self._by_tenant = {}, {}, {}
+        for tenant in tenants:
+            self.set_tenant(tenant)
+        self._missing.clear()
+        self.loaded_at = time.monotonic()
+        self.loads += 1
+
+    @property
+    def stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.refresh_seconds
+
+    def expire(self) -> None:
+        """Make the next lookup start a background reload."""
+        if self.loaded_at is not None:
+            self.loaded_at = time.monotonic() - self.refresh_seconds
+
+    def tenant_ids(self) -> List[str]:
+        return list(self._tenants)
+
+    def get(self, tenant_id: str) -> Optional[Entitlements]:
+        """The tenant's entitlements if already known; never touches the database."""
+        self.lookups += 1
+        return self._by_tenant.get(tenant_id)
+
+    def _single_flight(self, key: str, coro) -> "asyncio.Future":
+        task = self._loading.get(key)
+        if task is None:
+            task = self._loading[key] = asyncio.get_running_loop().create_task(coro)
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        else:
+            coro.close()
+        return asyncio.shield(task)
+
+    async def _load(self, postgrest) -> None:
+        # Local writes made while the snapshot is read may be missing from
+        # it; they are replayed on top.
+        self._writes = []
+        try:
+            plans = await fetch_all(postgrest, "subscription_plans", "plan_id,features,max_users,max_storage_mb", "plan_id")
+            tenants = await fetch_all(postgrest, "tenants", "tenant_id,subscription_plan_id,status", "tenant_id")
+        except BaseException:
+            self._writes = None
+            raise
+        writes, self._writes = self._writes, None
+        self.sync(plans, tenants)
+        for kind, row in writes:
+            (self.set_plan if kind == "plan" else self.set_tenant)(row)
+        logger.info("Entitlements loaded: %d plans, %d tenants", len(self._plans), len(self._tenants))
+
+    async def _load_tenant(self, tenant_id: str, postgrest) -> None:
+        rows = (await postgrest.table("tenants").select("tenant_id,subscription_plan_id,status")
+                .eq("tenant_id", tenant_id).execute()).data
+        if not rows:
+            self._missing[tenant_id] = time.monotonic() + self.missing_ttl
+            return
+        plan_id = rows[0].get("subscription_plan_id")
+        if plan_id is not None and str(plan_id) not in self._plans:
+            plans = (await postgrest.table("subscription_plans").select("plan_id,features,max_users,max_storage_mb")
+                     .eq("plan_id", str(plan_id)).execute()).data
+            for plan in plans:
+                self.set_plan(plan)
+        self.set_tenant(rows[0])
+
+    async def ensure_loaded(self, postgrest) -> None:
+        """Load on first use; afterwards only start a background reload when stale."""
+        if self.loaded_at is None:
+            await self._single_flight("*", self._load(postgrest))
+        else:
+            self.refresh_in_background(postgrest)
+
+    async def resolve(self, tenant_id: str, postgrest) -> Optional[Entitlements]:
+        """
+        Slow path for ``get``: load everything on first use, or fetch a
+        tenant the engine hasn't seen yet. Concurrent callers share one load.
+        """
+        if self.loaded_at is None:
+            await self._single_flight("*", self._load(postgrest))
+        entitlements = self._by_tenant.get(tenant_id)
+        if entitlements is None and self._missing.get(tenant_id, 0) <= time.monotonic():
+            await self._single_flight(tenant_id, self._load_tenant(tenant_id, postgrest))
+            entitlements = self._by_tenant.get(tenant_id)
+        return entitlements
+
+    def refresh_in_background(self, postgrest) -> None:
+        if self.stale and "*" not in self._loading:
+            self._single_flight("*", self._load(postgrest)).add_done_callback(_log_load_failure)
+
+    def stats(self) -> dict:
+        return {
+            "plans": len(self._plans),
+            "tenants": len(self._tenants),
+            "features": len(_feature_bits),
+            "loads": self.loads,
+            "lookups": self.lookups,
+            "age_seconds": None if self.loaded_at is None else round(time.monotonic() - self.loaded_at, 3),
+        }
+
+
+def _log_load_failure(future: "asyncio.Future") -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Entitlement refresh failed", exc_info=future.exception())
+
+
+_engine: Optional[EntitlementEngine] = None
+
+
+def get_entitlement_engine() -> EntitlementEngine:
+    """Return the process-wide entitlement engine."""
+    global _engine
+    if _engine is None:
+        _engine = EntitlementEngine()
+    return _engine
+
+
+def rebind_plan(plan_id: Optional[str], plan: Optional[dict]) -> None:
+    """Invalidation bus handler for plans written by another worker."""
+    if plan is not None:
+        get_entitlement_engine().set_plan(plan)
+    else:
+        get_entitlement_engine().expire()
+
+
+def rebind_tenant(tenant_id: Optional[str], tenant: Optional[dict]) -> None:
+    """Invalidation bus handler for tenants written by another worker."""
+    if tenant is not None:
+        get_entitlement_engine().set_tenant(tenant)
+    else:
+        get_entitlement_engine().expire()
@@ -0,0 +1,106 @@
+from typing import Awaitable, Callable, Dict, Optional
+from datetime import datetime
+from time import perf_counter
+import asyncio
+import os
+from shared.utils.cache import TTLCache
+
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "2.0"))
+READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", "2.0"))
+READINESS_MAX_POOL_UTILIZATION = float(os.getenv("READINESS_MAX_POOL_UTILIZATION", "0.9"))
+
+
+async def check_mongodb() -> dict:
+    from shared.database.mongodb import get_mongo_client, pool_tracker
+    client = get_mongo_client()
+    await client.admin.command("ping")
+    return {"pool": pool_tracker.stats(client.options.pool_options.max_pool_size)}
+
+
+async def check_supabase() -> dict:
+    from shared.database.postgrest import get_async_postgrest
+    postgrest = get_async_postgrest()
+    response = await postgrest.request("HEAD", "/")
+    if response.status_code >= 500:
+        raise RuntimeError(f"PostgREST returned {response.status_code}")
+    stats = postgrest.stats()
+    pool = {
+        "in_flight": stats["in_flight"],
+        "max_in_flight": stats["max_in_flight"],
+        "waits": stats["waits"],
+        "utilization": round(stats["in_flight"] / stats["max_in_flight"], 3),
+    }
+    return {"pool": pool}
+
+
+DEFAULT_CHECKS: Dict[str, Callable[[], Awaitable[dict]]] = {
+    "mongodb": check_mongodb,
+    "supabase": check_supabase,
+}
+
+
+class ReadinessProbe:
+    """
+    Runs every dependency check concurrently, each bounded by ``timeout``,
+    and caches the combined result for ``cache_seconds`` so that frequent
+    probes from several load balancers cost one round of checks. Concurrent
+    probes during a check share it.
+
+    A dependency is ``down`` when its check raises or times out, and
+    ``saturated`` when its pool utilization reaches ``max_utilization``;
+    either makes the service not ready, so traffic is shed before a pool
+    is exhausted.
+    """
+
+    def __init__(
+        self,
+        checks: Optional[Dict[str, Callable[[], Awaitable[dict]]]] = None,
+        timeout: float = READINESS_TIMEOUT,
+        cache_seconds: float = READINESS_CACHE_SECONDS,
+        max_utilization: float = READINESS_MAX_POOL_UTILIZATION,
+    ):
+        self.checks = DEFAULT_CHECKS if checks is None else checks
+        self.timeout = timeout
+        self.max_utilization = max_utilization
+        self._cache = TTLCache(maxsize=1, ttl=cache_seconds, name="readiness")
+
+    async def _run_check(self, check: Callable[[], Awaitable[dict]]) -> dict:
+        start = perf_counter()
+        try:
+            details = await asyncio.wait_for(check(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return {"status": "down", "latency_ms": round((perf_counter() - start) * 1000, 3),
+                    "error": f"Timed out after {self.timeout}s"}
+        except Exception as e:
+            return {"status": "down", "latency_ms": round((perf_counter() - start) * 1000, 3),
+                    "error": str(e) or type(e).__name__}
+        status = "up"
+        utilization = (details.get("pool") or {}).get("utilization")
+        if utilization is not None and utilization >= self.max_utilization:
+            status = "saturated"
+        return {"status": status, "latency_ms": round((perf_counter() - start) * 1000, 3), **details}
+
+    async def _check_all(self) -> dict:
+        names = list(self.checks)
+        results = await asyncio.gather(*(self._run_check(self.checks[name]) for name in names))
+        dependencies = dict(zip(names, results))
+        ready = all(result["status"] == "up" for result in results)
+        return {
+            "status": "ready" if ready else "not_ready",
+            "checked_at": datetime.utcnow().isoformat(),
+            "dependencies": dependencies,
+        }
+
+    async def check(self) -> dict:
+        result, _ = await self._cache.get_or_load("ready", self._check_all)
+        return result
+
+
+_probe: Optional[ReadinessProbe] = None
+
+
+def get_readiness_probe() -> ReadinessProbe:
+    global _probe
+    if _probe is None:
+        _probe = ReadinessProbe()
+    return _probe
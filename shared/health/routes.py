@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from .readiness import ReadinessProbe, get_readiness_probe
+
+router = APIRouter()
+
+
+@router.get("/ready")
+async def readiness(probe: ReadinessProbe = Depends(get_readiness_probe)):
+    """
+    Deep readiness check: pings MongoDB and Supabase and reports their
+    latency and pool utilization. Returns 503 unless every dependency is up.
+    """
+    result = await probe.check()
+    return JSONResponse(result, status_code=200 if result["status"] == "ready" else 503)
@@ -0,0 +1,219 @@
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import uuid
+from .store import COMPLETED
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "30"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+logger = logging.getLogger(__name__)
+
+# A stored response: ``{"status": int, "headers": [[name, value], ...], "body": bytes}``.
+Response = dict
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a request with a different fingerprint."""
+
+
+class IdempotencyInProgress(Exception):
+    """Another process is still executing the request holding the key."""
+
+
+class IdempotencyManager:
+    """
+    Runs each idempotency key's request once and replays its response.
+
+    Completed responses are kept in the store for ``ttl`` seconds and the
+    most recent ``cache_size`` of them in an in-process LRU, so a retry that
+    lands on the same worker is answered without a round trip. A duplicate
+    that arrives while the first request is still running awaits it: on the
+    same worker through a shared future, on another worker by polling the
+    store for up to ``wait_seconds``. The key is claimed for ``lock_seconds``
+    and the claim is renewed while the request runs; if the holder dies
+    without finishing, the next duplicate takes it over. Completing or
+    releasing the key only touches the holder's own claim.
+
+    Server errors and exceptions release the key instead of storing a
+    response, so the client's retry runs the request again. If the store is
+    unavailable requests run without cross-worker protection.
+    """
+
+    def __init__(
+        self,
+        store,
+        ttl: float = IDEMPOTENCY_TTL_SECONDS,
+        lock_seconds: float = IDEMPOTENCY_LOCK_SECONDS,
+        wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS,
+        cache_size: int = IDEMPOTENCY_CACHE_SIZE,
+        poll_interval: float = 0.05,
+    ):
+        self.store = store
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.wait_seconds = wait_seconds
+        self.cache_size = cache_size
+        self.poll_interval = poll_interval
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self.executed = 0
+        self.replayed = 0
+
+    def _cached(self, key: str, now: datetime) -> Optional[dict]:
+        record = self._cache.get(key)
+        if record is None:
+            return None
+        if record["expires_at"] <= now:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return record
+
+    def _remember(self, key: str, record: dict) -> None:
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _replay(self, record: dict, fingerprint: str) -> Response:
+        if record["fingerprint"] != fingerprint:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+        self.replayed += 1
+        return record["response"]
+
+    async def execute(
+        self, key: str, fingerprint: str, run: Callable[[], Awaitable[Response]]
+    ) -> Tuple[Response, bool]:
+        """
+        Return ``run()``'s response for the first request with ``key`` and the
+        stored one for its duplicates, with a flag telling which it was.
+        """
+        while True:
+            record = self._cached(key, datetime.utcnow())
+            if record is not None:
+                return self._replay(record, fingerprint), True
+
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                if inflight[0] != fingerprint:
+                    raise IdempotencyConflict("Idempotency-Key is in use by a different request")
+                # Once it finishes its response is cached; if it failed, the
+                # key was released and the next pass claims it.
+                await asyncio.shield(inflight[1])
+                continue
+
+            done = asyncio.get_running_loop().create_future()
+            self._inflight[key] = (fingerprint, done)
+            owner = uuid.uuid4().hex
+            try:
+                existing = await self._claim(key, fingerprint, owner)
+                if existing is not None:
+                    return self._replay(existing, fingerprint), True
+                return await self._run(key, fingerprint, owner, run), False
+            finally:
+                del self._inflight[key]
+                done.set_result(None)
+
+    async def _claim(self, key: str, fingerprint: str, owner: str) -> Optional[dict]:
+        """
+        Claim ``key`` in the store, returning ``None`` once claimed, or the
+        completed record if another worker finished the request first.
+        """
+        deadline = asyncio.get_running_loop().time() + self.wait_seconds
+        interval = self.poll_interval
+        while True:
+            now = datetime.utcnow()
+            try:
+                existing = await self.store.begin(
+                    key, fingerprint, owner, now,
+                    locked_until=now + timedelta(seconds=self.lock_seconds),
+                    expires_at=now + timedelta(seconds=self.ttl),
+                )
+            except Exception:
+                logger.exception("Idempotency store unavailable; running the request unprotected")
+                return None
+            if existing is None:
+                return None
+            if existing["fingerprint"] != fingerprint:
+                raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+            if existing["status"] == COMPLETED:
+                self._remember(key, existing)
+                return existing
+            if asyncio.get_running_loop().time() >= deadline:
+                raise IdempotencyInProgress("A request with this Idempotency-Key is still in progress")
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, 0.5)
+
+    async def _keep_locked(self, key: str, owner: str) -> None:
+        while True:
+            await asyncio.sleep(self.lock_seconds / 3)
+            try:
+                locked_until = datetime.utcnow() + timedelta(seconds=self.lock_seconds)
+                if not await self.store.extend(key, owner, locked_until):
+                    logger.warning("Idempotency key was taken over while its request was running")
+                    return
+            except Exception:
+                logger.exception("Failed to renew idempotency key; it unlocks after %ss", self.lock_seconds)
+
+    async def _run(
+        self, key: str, fingerprint: str, owner: str, run: Callable[[], Awaitable[Response]]
+    ) -> Response:
+        renewing = asyncio.get_running_loop().create_task(self._keep_locked(key, owner))
+        try:
+            response = await run()
+        except BaseException:
+            await self._release(key, owner)
+            raise
+        finally:
+            renewing.cancel()
+        self.executed += 1
+        if response["status"] >= 500:
+            await self._release(key, owner)
+            return response
+        expires_at = datetime.utcnow() + timedelta(seconds=self.ttl)
+        self._remember(key, {"fingerprint": fingerprint, "status": COMPLETED,
+                             "response": response, "expires_at": expires_at})
+        try:
+            if not await self.store.complete(key, owner, response, expires_at):
+                logger.warning("Idempotency key was taken over before its response was stored")
+        except Exception:
+            logger.exception("Failed to store idempotent response; only this worker will replay it")
+        return response
+
+    async def _release(self, key: str, owner: str) -> None:
+        try:
+            await self.store.release(key, owner)
+        except Exception:
+            logger.exception("Failed to release idempotency key; it unlocks after %ss", self.lock_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "cached": len(self._cache),
+            "inflight": len(self._inflight),
+            "executed": self.executed,
+            "replayed": self.replayed,
+        }
+
+
+_manager: Optional[IdempotencyManager] = None
+
+
+def get_idempotency() -> IdempotencyManager:
+    """Return the process-wide manager backed by the ``idempotency_keys`` collection."""
+    global _manager
+    if _manager is None:
+        from shared.database.mongodb import get_database
+        from .store import MongoIdempotencyStore
+        _manager = IdempotencyManager(MongoIdempotencyStore(get_database().idempotency_keys))
+    return _manager
+
+
+def close_idempotency() -> None:
+    global _manager
+    _manager = None
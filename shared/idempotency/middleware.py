@@ -0,0 +1,120 @@
+from typing import Iterable
+import hashlib
+import json
+from shared.auth.dependencies import verify_token
+from .manager import IdempotencyConflict, IdempotencyInProgress, get_idempotency
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+
+def _digest(*parts: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware honouring ``Idempotency-Key`` on POSTs to ``paths``.
+
+    The first request with a key runs normally; a retry with the same key
+    gets the stored response back, marked ``Idempotent-Replayed: true``,
+    without the endpoint running again. Keys are scoped to the verified
+    caller's id and the path, so two users can't collide on a key while a
+    retry with a refreshed token still replays, and reusing a key with a
+    different body is rejected with 422. Requests without the header or
+    without a valid bearer token are passed straight through.
+    """
+
+    def __init__(self, app, paths: Iterable[str]):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await self._error(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        try:
+            if not authorization.startswith("Bearer "):
+                raise ValueError("not a bearer token")
+            caller = verify_token(authorization[len("Bearer "):])["id"]
+        except Exception:
+            # Left to the endpoint to reject; there is nothing to replay.
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        path = scope["path"].encode()
+        scoped_key = _digest(caller.encode(), b"POST", path, key)
+        fingerprint = _digest(path, scope.get("query_string", b""), headers.get(b"content-type", b""), body)
+
+        async def run():
+            response = {"status": 500, "headers": [], "body": b""}
+            delivered = False
+            chunks = []
+
+            async def replay_receive():
+                nonlocal delivered
+                if not delivered:
+                    delivered = True
+                    return {"type": "http.request", "body": body, "more_body": False}
+                return await receive()
+
+            async def capture(message):
+                if message["type"] == "http.response.start":
+                    response["status"] = message["status"]
+                    response["headers"] = [[k.decode("latin-1"), v.decode("latin-1")]
+                                           for k, v in message.get("headers", [])]
+                elif message["type"] == "http.response.body":
+                    chunks.append(message.get("body", b""))
+
+            await self.app(scope, replay_receive, capture)
+            response["body"] = b"".join(chunks)
+            return response
+
+        try:
+            response, replayed = await get_idempotency().execute(scoped_key, fingerprint, run)
+        except IdempotencyConflict as exc:
+            await self._error(send, 422, str(exc))
+            return
+        except IdempotencyInProgress as exc:
+            await self._error(send, 409, str(exc))
+            return
+
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in response["headers"]]
+        if replayed:
+            headers.append((REPLAYED_HEADER, b"true"))
+        await send({"type": "http.response.start", "status": response["status"], "headers": headers})
+        await send({"type": "http.response.body", "body": response["body"]})
+
+    @staticmethod
+    async def _error(send, status: int, detail: str) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,128 @@
+from typing import Dict, Optional
+from datetime import datetime
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import logging
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_INDEXES = [
+    # MongoDB's TTL monitor deletes records once ``expires_at`` has passed.
+    IndexModel([("expires_at", ASCENDING)], name="expires", expireAfterSeconds=0),
+]
+
+# A record is either ``in_progress`` (the request run by ``owner`` holds the
+# key until ``locked_until``) or ``completed`` with the stored ``response``.
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+class InMemoryIdempotencyStore:
+    """Idempotency store for tests and single-process development."""
+
+    def __init__(self):
+        self.records: Dict[str, dict] = {}
+
+    async def ensure_indexes(self) -> None:
+        pass
+
+    async def begin(self, key: str, fingerprint: str, owner: str, now: datetime, locked_until: datetime,
+                    expires_at: datetime) -> Optional[dict]:
+        record = self.records.get(key)
+        if record is not None and record["expires_at"] <= now:
+            record = None
+        if record is not None and not (record["status"] == IN_PROGRESS and record["locked_until"] < now):
+            return dict(record)
+        self.records[key] = {"_id": key, "fingerprint": fingerprint, "owner": owner, "status": IN_PROGRESS,
+                             "locked_until": locked_until, "expires_at": expires_at}
+        return None
+
+    def _held(self, key: str, owner: str) -> Optional[dict]:
+        record = self.records.get(key)
+        if record is None or record["status"] != IN_PROGRESS or record["owner"] != owner:
+            return None
+        return record
+
+    async def get(self, key: str) -> Optional[dict]:
+        record = self.records.get(key)
+        return dict(record) if record is not None else None
+
+    async def extend(self, key: str, owner: str, locked_until: datetime) -> bool:
+        record = self._held(key, owner)
+        if record is not None:
+            record["locked_until"] = locked_until
+        return record is not None
+
+    async def complete(self, key: str, owner: str, response: dict, expires_at: datetime) -> bool:
+        record = self._held(key, owner)
+        if record is not None:
+            record.update(status=COMPLETED, response=response, locked_until=None, expires_at=expires_at)
+        return record is not None
+
+    async def release(self, key: str, owner: str) -> None:
+        if self._held(key, owner) is not None:
+            del self.records[key]
+
+
+class MongoIdempotencyStore:
+    """Idempotency records in a MongoDB collection keyed by ``_id``, expired by a TTL index."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self) -> None:
+        try:
+            await self.collection.create_indexes(IDEMPOTENCY_INDEXES)
+        except Exception:
+            logger.exception("Failed to create idempotency indexes")
+
+    async def begin(self, key: str, fingerprint: str, owner: str, now: datetime, locked_until: datetime,
+                    expires_at: datetime) -> Optional[dict]:
+        """
+        Claim ``key`` for a new execution by ``owner``. Returns ``None`` if
+        claimed, or the record of the request that holds it. A record whose
+        holder's lock has lapsed (the process died mid-request), or that has
+        expired but not yet been reaped by the TTL monitor, is taken over.
+        """
+        record = {"_id": key, "fingerprint": fingerprint, "owner": owner, "status": IN_PROGRESS,
+                  "locked_until": locked_until, "expires_at": expires_at}
+        while True:
+            try:
+                await self.collection.insert_one(record)
+                return None
+            except DuplicateKeyError:
+                pass
+            existing = await self.collection.find_one_and_update(
+                {"_id": key, "$or": [
+                    {"status": IN_PROGRESS, "locked_until": {"$lt": now}},
+                    {"expires_at": {"$lte": now}},
+                ]},
+                {"$set": record, "$unset": {"response": ""}},
+                return_document=ReturnDocument.BEFORE,
+            )
+            if existing is not None:
+                return None
+            existing = await self.collection.find_one({"_id": key})
+            if existing is not None:
+                return existing
+            # Released or reaped since the insert failed; try again.
+
+    async def get(self, key: str) -> Optional[dict]:
+        return await self.collection.find_one({"_id": key})
+
+    async def extend(self, key: str, owner: str, locked_until: datetime) -> bool:
+        """Push back the lock ``owner`` holds. Returns ``False`` if it no longer holds it."""
+        result = await self.collection.update_one(
+            {"_id": key, "owner": owner, "status": IN_PROGRESS}, {"$set": {"locked_until": locked_until}}
+        )
+        return result.matched_count == 1
+
+    async def complete(self, key: str, owner: str, response: dict, expires_at: datetime) -> bool:
+        result = await self.collection.update_one(
+            {"_id": key, "owner": owner, "status": IN_PROGRESS},
+            {"$set": {"status": COMPLETED, "response": response, "locked_until": None, "expires_at": expires_at}},
+        )
+        return result.matched_count == 1
+
+    async def release(self, key: str, owner: str) -> None:
+        await self.collection.delete_one({"_id": key, "owner": owner, "status": IN_PROGRESS})
@@ -0,0 +1,128 @@
+from typing import Callable, Dict, List, Optional
+import asyncio
+import logging
+import os
+import uuid
+from .transport import InMemoryTransport, MongoTransport
+
+CACHE_INVALIDATION_TRANSPORT = os.getenv("CACHE_INVALIDATION_TRANSPORT", "mongo")
+
+# Regions written by the services; "*" reaches every subscriber.
+PLANS = "plans"
+TENANTS = "tenants"
+ALL = "*"
+
+# Called with the changed key and, when the publisher had it, the new row;
+# both are None when the whole region should be dropped.
+Handler = Callable[[Optional[str], Optional[dict]], None]
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationBus:
+    """
+    Tells the other workers that cached data changed.
+
+    A worker that writes applies the change to its own caches as before and
+    then ``publish``es it; every other worker's bus hands it to the
+    handlers ``subscribe``d to that region. Messages carry the row when the
+    publisher has it, so handlers that can apply it do not need to reload.
+    A worker ignores its own messages.
+
+    Delivery is best effort: if publishing fails the write still succeeds,
+    and if the transport may have lost messages every handler is called
+    with ``(None, None)``. The caches' own TTLs and refresh intervals stay
+    in place as the upper bound on staleness.
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.received = 0
+        self.resyncs = 0
+        self.failures = 0
+
+    def subscribe(self, region: str, handler: Handler) -> None:
+        self._handlers.setdefault(region, []).append(handler)
+
+    async def publish(self, region: str, key: Optional[str] = None, row: Optional[dict] = None) -> None:
+        """Announce a change to ``key`` in ``region`` (the whole region if ``None``)."""
+        try:
+            await self.transport.publish({"region": region, "key": key, "row": row, "origin": self.origin})
+            self.published += 1
+        except Exception:
+            self.failures += 1
+            logger.exception("Failed to publish a %s invalidation; other workers catch up on refresh", region)
+
+    def dispatch(self, message: dict) -> None:
+        region = message["region"]
+        if region == ALL:
+            self.resyncs += 1
+            handlers = [handler for region_handlers in self._handlers.values() for handler in region_handlers]
+            key = row = None
+        else:
+            handlers = self._handlers.get(region, [])
+            key, row = message.get("key"), message.get("row")
+        for handler in handlers:
+            try:
+                handler(key, row)
+            except Exception:
+                logger.exception("Cache invalidation handler for %s failed", region)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(self.transport.listen()))
+
+    async def _run(self, messages) -> None:
+        async for message in messages:
+            if message.get("origin") == self.origin:
+                continue
+            self.received += 1
+            self.dispatch(message)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                logger.exception("Cache invalidation listener failed")
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "published": self.published,
+            "received": self.received,
+            "resyncs": self.resyncs,
+            "failures": self.failures,
+        }
+
+
+_bus: Optional[InvalidationBus] = None
+
+
+def get_invalidation_bus() -> InvalidationBus:
+    """
+    Return the process-wide bus, over the ``cache_invalidations`` capped
+    collection unless ``CACHE_INVALIDATION_TRANSPORT`` is ``memory``.
+    """
+    global _bus
+    if _bus is None:
+        if CACHE_INVALIDATION_TRANSPORT == "memory":
+            _bus = InvalidationBus(InMemoryTransport())
+        else:
+            from shared.database.mongodb import get_database
+            _bus = InvalidationBus(MongoTransport(get_database()))
+    return _bus
+
+
+async def close_invalidation_bus() -> None:
+    global _bus
+    if _bus is not None:
+        await _bus.stop()
+        _bus = None
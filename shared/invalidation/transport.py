@@ -0,0 +1,116 @@
+from typing import AsyncIterator, List
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+import asyncio
+import logging
+import os
+
+INVALIDATION_COLLECTION_BYTES = int(os.getenv("INVALIDATION_COLLECTION_BYTES", str(8 * 1024 * 1024)))
+INVALIDATION_RETRY_INTERVAL = float(os.getenv("INVALIDATION_RETRY_INTERVAL", "1.0"))
+INVALIDATION_CLOCK_SKEW = float(os.getenv("INVALIDATION_CLOCK_SKEW", "5"))
+
+# Yielded by ``listen`` when messages may have been lost, so subscribers
+# drop everything instead of trusting what they hold.
+RESYNC = {"region": "*", "key": None, "row": None, "origin": None}
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryTransport:
+    """
+    Delivers every message to every listener of this object. Buses sharing
+    one transport stand in for separate workers in tests and single-process
+    development.
+    """
+
+    def __init__(self):
+        self._queues: List[asyncio.Queue] = []
+
+    async def ensure_collection(self) -> None:
+        pass
+
+    async def publish(self, message: dict) -> None:
+        for queue in self._queues:
+            queue.put_nowait(message)
+
+    def listen(self) -> AsyncIterator[dict]:
+        # Registered now, not on first iteration, so nothing published in
+        # between is missed.
+        queue: asyncio.Queue = asyncio.Queue()
+        self._queues.append(queue)
+        return self._drain(queue)
+
+    async def _drain(self, queue: asyncio.Queue) -> AsyncIterator[dict]:
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._queues.remove(queue)
+
+
+class MongoTransport:
+    """
+    Messages in a capped collection, followed with a tailable cursor, so it
+    works on a standalone server as well as a replica set.
+
+    A cursor dies when it has nothing to return or falls behind the capped
+    collection's oldest entry; it is reopened after ``retry_interval``
+    seconds from the last message seen, less ``clock_skew`` seconds because
+    ``_id`` order across hosts only follows their clocks. Messages seen in
+    that window are skipped by ``_id``. Any error, including losing the
+    cursor's position, yields ``RESYNC``.
+    """
+
+    def __init__(
+        self,
+        database,
+        name: str = "cache_invalidations",
+        size_bytes: int = INVALIDATION_COLLECTION_BYTES,
+        retry_interval: float = INVALIDATION_RETRY_INTERVAL,
+        clock_skew: float = INVALIDATION_CLOCK_SKEW,
+    ):
+        self.database = database
+        self.collection = database[name]
+        self.name = name
+        self.size_bytes = size_bytes
+        self.retry_interval = retry_interval
+        self.clock_skew = clock_skew
+
+    async def ensure_collection(self) -> None:
+        try:
+            await self.database.create_collection(self.name, capped=True, size=self.size_bytes)
+        except CollectionInvalid:
+            pass
+        except Exception:
+            logger.exception("Failed to create the %s collection", self.name)
+
+    async def publish(self, message: dict) -> None:
+        await self.collection.insert_one(dict(message))
+
+    def listen(self) -> AsyncIterator[dict]:
+        return self._tail(datetime.now(timezone.utc))
+
+    async def _tail(self, since: datetime) -> AsyncIterator[dict]:
+        seen: deque = deque(maxlen=10000)
+        seen_ids = set()
+        while True:
+            query = {"_id": {"$gte": ObjectId.from_datetime(since - timedelta(seconds=self.clock_skew))}}
+            try:
+                async for doc in self.collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT):
+                    if doc["_id"] in seen_ids:
+                        continue
+                    if len(seen) == seen.maxlen:
+                        seen_ids.discard(seen[0])
+                    seen.append(doc["_id"])
+                    seen_ids.add(doc["_id"])
+                    since = max(since, doc["_id"].generation_time)
+                    yield doc
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Lost the %s cursor; dropping cached data", self.name)
+                yield RESYNC
+            await asyncio.sleep(self.retry_interval)
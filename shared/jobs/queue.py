@@ -0,0 +1,227 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import random
+import uuid
+from shared.models.job import Job
+
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "2"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobHandler:
+    func: Callable[[Dict, "JobContext"], Awaitable[Optional[Dict]]]
+    max_attempts: int = 3
+    concurrency: Optional[int] = None
+
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str, max_attempts: int = 3, concurrency: Optional[int] = None):
+    """
+    Register ``func(payload, ctx)`` as the handler for jobs of ``kind``.
+    ``concurrency`` caps how many jobs of this kind run at once per process.
+    """
+    def register(func):
+        JOB_HANDLERS[kind] = JobHandler(func, max_attempts, concurrency)
+        return func
+    return register
+
+
+class JobContext:
+    """Handed to job handlers for reporting progress; also renews the job's lease."""
+
+    def __init__(self, queue: "JobQueue", job: Job):
+        self.queue = queue
+        self.job = job
+
+    async def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        await self.queue.store.update(
+            self.job.id,
+            progress=max(0.0, min(1.0, fraction)),
+            progress_message=message,
+            updated_at=now,
+            locked_until=now + timedelta(seconds=self.queue.lease_seconds),
+        )
+
+
+class JobQueue:
+    """
+    Asyncio worker pool that runs registered job handlers off the request path.
+
+    Jobs live in a pluggable store (``MongoJobStore`` in production,
+    ``InMemoryJobStore`` in tests). ``concurrency`` workers poll the store and
+    claim due jobs atomically; per-kind limits are honoured by only claiming
+    kinds that have a free slot. A failed job is requeued with exponential
+    backoff and jitter until it runs out of attempts. A claim holds a lease
+    that progress updates renew, so jobs abandoned by a crashed worker are
+    picked up again once the lease expires.
+    """
+
+    def __init__(
+        self,
+        store,
+        handlers: Optional[Dict[str, JobHandler]] = None,
+        concurrency: int = JOB_CONCURRENCY,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        retry_base: float = JOB_RETRY_BASE_SECONDS,
+        retry_max: float = JOB_RETRY_MAX_SECONDS,
+    ):
+        self.store = store
+        self.handlers = JOB_HANDLERS if handlers is None else handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._running: Dict[str, int] = {}
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._stopping = False
+
+    async def enqueue(self, kind: str, payload: Dict, created_by: Optional[str] = None,
+                      max_attempts: Optional[int] = None) -> Job:
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        now = datetime.utcnow()
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            payload=payload,
+            max_attempts=max_attempts or self.handlers[kind].max_attempts,
+            created_by=created_by,
+            created_at=now,
+            updated_at=now,
+            run_after=now,
+        )
+        await self.store.create(job)
+        self._wakeup.set()
+        return job
+
+    def _claimable_kinds(self) -> List[str]:
+        return [
+            kind for kind, handler in self.handlers.items()
+            if handler.concurrency is None or self._running.get(kind, 0) < handler.concurrency
+        ]
+
+    def retry_delay(self, attempts: int) -> float:
+        delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def run_once(self) -> bool:
+        """Claim and run one due job. Returns False when nothing was claimable."""
+        kinds = self._claimable_kinds()
+        if not kinds:
+            return False
+        # Hold a slot in every candidate kind while the claim is awaited, so
+        # workers polling meanwhile cannot overrun a per-kind limit.
+        for kind in kinds:
+            self._running[kind] = self._running.get(kind, 0) + 1
+        job = None
+        try:
+            now = datetime.utcnow()
+            job = await self.store.claim(kinds, now, now + timedelta(seconds=self.lease_seconds))
+        finally:
+            for kind in kinds:
+                if job is None or kind != job.kind:
+                    self._running[kind] -= 1
+        if job is None:
+            return False
+        try:
+            await self._execute(job)
+        finally:
+            self._running[job.kind] -= 1
+        return True
+
+    async def _execute(self, job: Job) -> None:
+        handler = self.handlers[job.kind]
+        try:
+            result = await handler.func(job.payload, JobContext(self, job))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            now = datetime.utcnow()
+            if job.attempts < job.max_attempts:
+                delay = self.retry_delay(job.attempts)
+                logger.warning("Job %s (%s) failed on attempt %d, retrying in %.1fs: %s",
+                               job.id, job.kind, job.attempts, delay, e)
+                await self.store.update(job.id, status="queued", error=str(e), updated_at=now,
+                                        run_after=now + timedelta(seconds=delay), locked_until=None)
+            else:
+                logger.error("Job %s (%s) failed after %d attempts: %s", job.id, job.kind, job.attempts, e)
+                await self.store.update(job.id, status="failed", error=str(e), updated_at=now, locked_until=None)
+            return
+        await self.store.update(job.id, status="succeeded", progress=1.0, result=result, error=None,
+                                updated_at=datetime.utcnow(), locked_until=None)
+
+    async def _worker(self) -> None:
+        while not self._stopping:
+            try:
+                ran = await self.run_once()
+            except Exception:
+                logger.exception("Job worker failed to claim a job")
+                ran = False
+            if ran:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if not self._workers:
+            self._stopping = False
+            self._workers = [asyncio.get_running_loop().create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self, timeout: float = 10) -> None:
+        """
+        Stop claiming new jobs and give running ones ``timeout`` seconds to
+        finish. Jobs cut short keep their lease and are retried elsewhere.
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._workers:
+            done, pending = await asyncio.wait(self._workers, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._workers),
+            "running": {kind: count for kind, count in self._running.items() if count},
+        }
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue backed by the ``jobs`` collection."""
+    global _queue
+    if _queue is None:
+        from shared.database.mongodb import get_database
+        from .store import MongoJobStore
+        _queue = JobQueue(MongoJobStore(get_database().jobs))
+    return _queue
+
+
+async def close_job_queue() -> None:
+    global _queue
+    if _queue is not None:
+        await _queue.stop()
+        _queue = None
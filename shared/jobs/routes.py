@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from shared.auth.dependencies import get_current_user
+from shared.models.job import Job, JobStatus, JobSummary
+from .queue import get_job_queue
+from shared.metrics.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def get_job_store():
+    return get_job_queue().store
+
+
+@router.get("", response_model=List[JobSummary])
+async def list_jobs(
+    status: Optional[JobStatus] = None,
+    kind: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    user: dict = Depends(get_current_user),
+    store=Depends(get_job_store),
+):
+    """
+    List background jobs, newest first, without their payloads (system admin only).
+    """
+    return await store.list(status=status, kind=kind, limit=limit)
+
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(
+    job_id: str,
+    user: dict = Depends(get_current_user),
+    store=Depends(get_job_store),
+):
+    """
+    Status, progress and result of a background job (system admin only).
+    """
+    job = await store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,153 @@
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+import asyncio
+import logging
+from shared.models.job import Job, JobSummary
+
+logger = logging.getLogger(__name__)
+
+JOB_INDEXES = [
+    IndexModel([("status", ASCENDING), ("kind", ASCENDING), ("run_after", ASCENDING)], name="claim"),
+    IndexModel([("created_at", DESCENDING)], name="created"),
+]
+
+
+# Set on a job whose worker lost its lease during its last attempt.
+LEASE_LOST_ERROR = "Worker lost its lease on the last attempt"
+
+
+def _claim_filter(kinds: Iterable[str], now: datetime) -> dict:
+    """Queued jobs that are due, or running jobs with attempts left whose worker lost its lease."""
+    return {
+        "kind": {"$in": list(kinds)},
+        "$or": [
+            {"status": "queued", "run_after": {"$lte": now}},
+            {"status": "running", "locked_until": {"$lt": now}, "$expr": {"$lt": ["$attempts", "$max_attempts"]}},
+        ],
+    }
+
+
+def _exhausted_filter(kinds: Iterable[str], now: datetime) -> dict:
+    """Running jobs whose worker lost its lease on their last attempt."""
+    return {
+        "kind": {"$in": list(kinds)},
+        "status": "running",
+        "locked_until": {"$lt": now},
+        "$expr": {"$gte": ["$attempts", "$max_attempts"]},
+    }
+
+
+class InMemoryJobStore:
+    """Job store for tests and single-process development."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._lock = asyncio.Lock()
+
+    async def ensure_indexes(self) -> None:
+        pass
+
+    async def create(self, job: Job) -> Job:
+        self._jobs[job.id] = job.model_copy()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        return job.model_copy() if job else None
+
+    async def claim(self, kinds: Iterable[str], now: datetime, locked_until: datetime) -> Optional[Job]:
+        kinds = set(kinds)
+        async with self._lock:
+            due = []
+            for job in self._jobs.values():
+                if job.kind not in kinds:
+                    continue
+                if job.status == "running" and job.locked_until and job.locked_until < now:
+                    if job.attempts >= job.max_attempts:
+                        job.status, job.error, job.locked_until, job.updated_at = "failed", LEASE_LOST_ERROR, None, now
+                    else:
+                        due.append(job)
+                elif job.status == "queued" and job.run_after <= now:
+                    due.append(job)
+            if not due:
+                return None
+            job = min(due, key=lambda j: j.run_after)
+            job.status = "running"
+            job.attempts += 1
+            job.locked_until = locked_until
+            job.updated_at = now
+            return job.model_copy()
+
+    async def update(self, job_id: str, **fields) -> None:
+        job = self._jobs[job_id]
+        for name, value in fields.items():
+            setattr(job, name, value)
+
+    async def list(self, status: Optional[str] = None, kind: Optional[str] = None,
+                   limit: int = 50) -> List[JobSummary]:
+        jobs = [
+            job for job in self._jobs.values()
+            if (status is None or job.status == status) and (kind is None or job.kind == kind)
+        ]
+        jobs.sort(key=lambda j: j.created_at, reverse=True)
+        return [JobSummary(**job.model_dump(exclude={"payload"})) for job in jobs[:limit]]
+
+
+class MongoJobStore:
+    """Job store backed by a MongoDB collection; claims are atomic find-and-modify."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self) -> None:
+        try:
+            await self.collection.create_indexes(JOB_INDEXES)
+        except Exception:
+            logger.exception("Failed to create jobs indexes")
+
+    @staticmethod
+    def _to_job(doc: Optional[dict]) -> Optional[Job]:
+        if doc is None:
+            return None
+        doc["id"] = doc.pop("_id")
+        return Job(**doc)
+
+    async def create(self, job: Job) -> Job:
+        doc = job.dict()
+        doc["_id"] = doc.pop("id")
+        await self.collection.insert_one(doc)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._to_job(await self.collection.find_one({"_id": job_id}))
+
+    async def claim(self, kinds: Iterable[str], now: datetime, locked_until: datetime) -> Optional[Job]:
+        await self.collection.update_many(
+            _exhausted_filter(kinds, now),
+            {"$set": {"status": "failed", "error": LEASE_LOST_ERROR, "locked_until": None, "updated_at": now}},
+        )
+        doc = await self.collection.find_one_and_update(
+            _claim_filter(kinds, now),
+            {
+                "$set": {"status": "running", "locked_until": locked_until, "updated_at": now},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_after", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        return self._to_job(doc)
+
+    async def update(self, job_id: str, **fields) -> None:
+        await self.collection.update_one({"_id": job_id}, {"$set": fields})
+
+    async def list(self, status: Optional[str] = None, kind: Optional[str] = None,
+                   limit: int = 50) -> List[JobSummary]:
+        query = {}
+        if status is not None:
+            query["status"] = status
+        if kind is not None:
+            query["kind"] = kind
+        cursor = self.collection.find(query, {"payload": 0}).sort("created_at", DESCENDING).limit(limit)
+        docs = await cursor.to_list(limit)
+        return [JobSummary(id=doc.pop("_id"), **doc) for doc in docs]
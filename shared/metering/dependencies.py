@@ -0,0 +1,32 @@
+from fastapi import Depends, HTTPException
+from shared.auth.dependencies import get_tenant_id
+from shared.entitlements.dependencies import get_tenant_entitlements
+from .meter import METRICS, QuotaExceeded, get_usage_meter, quota_for
+
+
+def require_quota(metric: str, amount: int = 1):
+    """
+    FastAPI dependency factory: ``Depends(require_quota(USERS))`` counts
+    ``amount`` of ``metric`` against the plan quota of the caller's tenant
+    (see ``get_tenant_id``) before the endpoint runs, rejecting the request
+    with 403 if it would go over. If the endpoint raises, the amount is
+    given back.
+    The check uses in-memory counters and cached plan limits only.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown usage metric {metric!r}")
+
+    async def reserve_quota(tenant_id: str = Depends(get_tenant_id)):
+        entitlements = await get_tenant_entitlements(tenant_id)
+        meter = get_usage_meter()
+        try:
+            meter.consume(tenant_id, metric, amount, quota_for(entitlements, metric))
+        except QuotaExceeded as e:
+            raise HTTPException(status_code=403, detail=str(e))
+        try:
+            yield entitlements
+        except BaseException:
+            meter.record(tenant_id, metric, -amount)
+            raise
+
+    return reserve_quota
@@ -0,0 +1,213 @@
+from typing import Dict, Iterator, Optional
+from contextlib import contextmanager
+import asyncio
+import logging
+import os
+import time
+from .store import Usage
+
+USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "5"))
+USAGE_RELOAD_INTERVAL = float(os.getenv("USAGE_RELOAD_INTERVAL", "60"))
+
+USERS = "users"
+STORAGE_BYTES = "storage_bytes"
+METRICS = (USERS, STORAGE_BYTES)
+MB = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def quota_for(entitlements, metric: str) -> Optional[int]:
+    """The plan's limit for ``metric`` in the metric's own unit, or ``None`` if unlimited."""
+    if metric == USERS:
+        return entitlements.max_users
+    if metric == STORAGE_BYTES:
+        return None if entitlements.max_storage_mb is None else entitlements.max_storage_mb * MB
+    raise ValueError(f"Unknown usage metric {metric!r}")
+
+
+class QuotaExceeded(Exception):
+    """Raised when an operation would take a tenant over its plan's quota."""
+
+    def __init__(self, tenant_id: str, metric: str, used: int, requested: int, limit: int):
+        super().__init__(f"Quota exceeded for {metric}: {used} used, {requested} requested, limit {limit}")
+        self.tenant_id = tenant_id
+        self.metric = metric
+        self.used = used
+        self.requested = requested
+        self.limit = limit
+
+
+class UsageMeter:
+    """
+    Per-tenant usage counters kept in memory and checked against plan quotas.
+
+    Totals are loaded from the store at startup. Every change updates the
+    in-memory total and a pending delta; a background task writes the
+    pending deltas to the store in one batch every ``flush_interval``
+    seconds, keeping them for the next attempt if the write fails. Every
+    ``reload_interval`` seconds the totals are re-read from the store (plus
+    whatever is still pending) to pick up what other processes flushed, so
+    between reloads a quota can be overshot by what other processes used in
+    the meantime.
+
+    Until the first load succeeds only this process's changes are counted.
+    """
+
+    def __init__(
+        self,
+        store,
+        flush_interval: float = USAGE_FLUSH_INTERVAL,
+        reload_interval: float = USAGE_RELOAD_INTERVAL,
+    ):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.reload_interval = reload_interval
+        self.totals: Usage = {}
+        self._pending: Usage = {}
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.loaded_at: Optional[float] = None
+        self.flushes = 0
+        self.failures = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _add(usage: Usage, tenant_id: str, metric: str, amount: int) -> None:
+        counters = usage.setdefault(tenant_id, {})
+        counters[metric] = counters.get(metric, 0) + amount
+
+    def usage(self, tenant_id: str) -> Dict[str, int]:
+        return dict(self.totals.get(tenant_id, {}))
+
+    def used(self, tenant_id: str, metric: str) -> int:
+        return self.totals.get(tenant_id, {}).get(metric, 0)
+
+    def record(self, tenant_id: str, metric: str, amount: int) -> None:
+        """Count ``amount`` (negative to release) without checking the quota."""
+        if amount:
+            self._add(self.totals, tenant_id, metric, amount)
+            self._add(self._pending, tenant_id, metric, amount)
+
+    def consume(self, tenant_id: str, metric: str, amount: int, limit: Optional[int]) -> None:
+        """Count ``amount``, or raise ``QuotaExceeded`` if it would go over ``limit``."""
+        used = self.used(tenant_id, metric)
+        if limit is not None and amount > 0 and used + amount > limit:
+            self.rejected += 1
+            raise QuotaExceeded(tenant_id, metric, used, amount, limit)
+        self.record(tenant_id, metric, amount)
+
+    @contextmanager
+    def reserve(self, tenant_id: str, metric: str, amount: int, limit: Optional[int]) -> Iterator[None]:
+        """``consume`` up front and give the amount back if the block raises."""
+        self.consume(tenant_id, metric, amount, limit)
+        try:
+            yield
+        except BaseException:
+            self.record(tenant_id, metric, -amount)
+            raise
+
+    async def load(self) -> None:
+        async with self._lock:
+            totals = await self.store.load()
+            for tenant_id, counters in self._pending.items():
+                for metric, amount in counters.items():
+                    self._add(totals, tenant_id, metric, amount)
+            self.totals = totals
+            self.loaded_at = time.monotonic()
+
+    async def flush(self) -> int:
+        """Write pending deltas to the store. Returns the number of tenants written."""
+        async with self._lock:
+            deltas = {
+                tenant_id: {metric: amount for metric, amount in counters.items() if amount}
+                for tenant_id, counters in self._pending.items()
+            }
+            deltas = {tenant_id: counters for tenant_id, counters in deltas.items() if counters}
+            self._pending = {}
+            if not deltas:
+                return 0
+            try:
+                await self.store.apply(deltas)
+            except BaseException:
+                self.failures += 1
+                for tenant_id, counters in deltas.items():
+                    for metric, amount in counters.items():
+                        self._add(self._pending, tenant_id, metric, amount)
+                raise
+            self.flushes += 1
+            return len(deltas)
+
+    async def start(self) -> None:
+        """Load persisted totals and start the flusher; a failed load is retried by it."""
+        try:
+            await self.load()
+        except Exception:
+            logger.exception("Failed to load usage totals; retrying in the background")
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            try:
+                await self.flush()
+                if self.loaded_at is None or time.monotonic() - self.loaded_at >= self.reload_interval:
+                    await self.load()
+            except Exception:
+                logger.exception("Failed to sync usage counters; %d tenants pending", len(self._pending))
+
+    async def stop(self) -> None:
+        """Stop the flusher and make one last attempt to write pending deltas."""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Usage deltas for %d tenants were not written", len(self._pending))
+
+    def stats(self) -> dict:
+        return {
+            "tenants": len(self.totals),
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "loaded": self.loaded_at is not None,
+        }
+
+
+_meter: Optional[UsageMeter] = None
+
+
+def get_usage_meter() -> UsageMeter:
+    """Return the process-wide usage meter backed by the ``tenant_usage`` collection."""
+    global _meter
+    if _meter is None:
+        from shared.database.mongodb import get_database
+        from .store import MongoUsageStore
+        _meter = UsageMeter(MongoUsageStore(get_database().tenant_usage))
+    return _meter
+
+
+async def close_usage_meter() -> None:
+    global _meter
+    if _meter is not None:
+        await _meter.stop()
+        _meter = None
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List
+import uuid
+from shared.auth.dependencies import get_current_user
+from shared.database.postgrest import get_async_postgrest
+from shared.entitlements.dependencies import get_tenant_entitlements
+from shared.entitlements.engine import NO_ENTITLEMENTS, get_entitlement_engine
+from shared.models.usage import TenantUsage
+from .meter import MB, STORAGE_BYTES, USERS, get_usage_meter
+from shared.metrics.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def tenant_usage(tenant_id: str, entitlements) -> TenantUsage:
+    meter = get_usage_meter()
+    users = meter.used(tenant_id, USERS)
+    storage = meter.used(tenant_id, STORAGE_BYTES)
+    max_storage = entitlements.max_storage_mb
+    return TenantUsage(
+        tenant_id=tenant_id,
+        plan_id=entitlements.plan_id,
+        users=users,
+        max_users=entitlements.max_users,
+        storage_mb=round(storage / MB, 3),
+        max_storage_mb=max_storage,
+        over_quota=(
+            (entitlements.max_users is not None and users > entitlements.max_users)
+            or (max_storage is not None and storage > max_storage * MB)
+        ),
+    )
+
+
+@router.get("", response_model=List[TenantUsage])
+async def list_usage(
+    over_quota: bool = Query(False, description="Only tenants currently over a quota"),
+    user: dict = Depends(get_current_user),
+):
+    """
+    Every tenant's user count and storage against its plan's quotas, from
+    the in-memory counters (system admin only).
+    """
+    engine = get_entitlement_engine()
+    await engine.ensure_loaded(get_async_postgrest().for_user())
+    tenant_ids = sorted(set(engine.tenant_ids()) | set(get_usage_meter().totals))
+    usage = [tenant_usage(tenant_id, engine.get(tenant_id) or NO_ENTITLEMENTS) for tenant_id in tenant_ids]
+    return [u for u in usage if u.over_quota] if over_quota else usage
+
+
+@router.get("/{tenant_id}", response_model=TenantUsage)
+async def get_usage(
+    tenant_id: uuid.UUID,
+    user: dict = Depends(get_current_user),
+):
+    """
+    One tenant's usage against its plan's quotas (system admin only).
+    """
+    return tenant_usage(str(tenant_id), await get_tenant_entitlements(str(tenant_id)))
@@ -0,0 +1,52 @@
+from typing import Dict
+from datetime import datetime
+from pymongo import UpdateOne
+
+Usage = Dict[str, Dict[str, int]]
+
+
+class InMemoryUsageStore:
+    """Usage store for tests and single-process development."""
+
+    def __init__(self):
+        self.totals: Usage = {}
+        self.writes = 0
+
+    async def load(self) -> Usage:
+        return {tenant_id: dict(counters) for tenant_id, counters in self.totals.items()}
+
+    async def apply(self, deltas: Usage) -> None:
+        for tenant_id, counters in deltas.items():
+            totals = self.totals.setdefault(tenant_id, {})
+            for metric, delta in counters.items():
+                totals[metric] = totals.get(metric, 0) + delta
+        self.writes += 1
+
+
+class MongoUsageStore:
+    """
+    Per-tenant usage totals in a MongoDB collection, one document per tenant
+    (``_id`` is the tenant ID). Deltas are applied with ``$inc`` so several
+    processes can flush into the same documents.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def load(self) -> Usage:
+        usage: Usage = {}
+        async for doc in self.collection.find({}):
+            tenant_id = doc.pop("_id")
+            doc.pop("updated_at", None)
+            usage[tenant_id] = doc
+        return usage
+
+    async def apply(self, deltas: Usage) -> None:
+        now = datetime.utcnow()
+        await self.collection.bulk_write(
+            [
+                UpdateOne({"_id": tenant_id}, {"$inc": counters, "$set": {"updated_at": now}}, upsert=True)
+                for tenant_id, counters in deltas.items()
+            ],
+            ordered=False,
+        )
@@ -0,0 +1,83 @@
+from typing import Optional
+import threading
+from pymongo import monitoring
+from .registry import MONGO_COMMAND_DURATION
+
+
+class CommandTimer(monitoring.CommandListener):
+    """
+    pymongo command listener feeding ``mongo_command_duration_seconds``.
+    Durations come from the driver, so they cover the round trip to the
+    server only, not time spent waiting on Motor's executor.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_DURATION.observe((event.command_name, "ok"), event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_DURATION.observe((event.command_name, "error"), event.duration_micros / 1e6)
+
+
+class PoolTracker(monitoring.ConnectionPoolListener):
+    """
+    Connection pool listener counting open and checked-out connections
+    across all servers, for readiness reporting.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+
+    def stats(self, max_pool_size: Optional[int] = None) -> dict:
+        stats = {
+            "open": self.open,
+            "checked_out": self.checked_out,
+            "checkout_failures": self.checkout_failures,
+        }
+        if max_pool_size:
+            stats["max_pool_size"] = max_pool_size
+            stats["utilization"] = round(self.checked_out / max_pool_size, 3)
+        return stats
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
@@ -0,0 +1,159 @@
+from typing import Deque, Dict, List, Optional, Tuple
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+SLOW_REQUEST_PROFILE_DIR = os.getenv("SLOW_REQUEST_PROFILE_DIR")
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "1000"))
+SLOW_REQUEST_SAMPLE_INTERVAL_MS = float(os.getenv("SLOW_REQUEST_SAMPLE_INTERVAL_MS", "5"))
+SLOW_REQUEST_PROFILE_MAX_FILES = int(os.getenv("SLOW_REQUEST_PROFILE_MAX_FILES", "200"))
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread's stack every ``interval`` seconds while
+    any request is in flight, keeping a bounded window of recent samples.
+    When a request finishes after more than ``threshold`` seconds, the
+    samples taken during it are written to ``directory`` as folded stacks
+    (``frame;frame;frame count``), ready for flamegraph.pl or speedscope.
+
+    All requests share the loop thread, so a profile shows everything the
+    loop did while the slow request was open: its own code, other requests
+    blocking the loop, and time spent idle in the selector waiting on I/O.
+    """
+
+    def __init__(
+        self,
+        directory,
+        threshold: float = SLOW_REQUEST_THRESHOLD_MS / 1000,
+        interval: float = SLOW_REQUEST_SAMPLE_INTERVAL_MS / 1000,
+        max_files: int = SLOW_REQUEST_PROFILE_MAX_FILES,
+        max_samples: int = 100000,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.interval = interval
+        self.max_files = max_files
+        self._samples: Deque[Tuple[float, str]] = deque(maxlen=max_samples)
+        self._frame_names: Dict[Tuple[object, int], str] = {}
+        self._active = 0
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._target: Optional[int] = None
+        self.profiles_written = 0
+
+    def _frame_name(self, frame) -> str:
+        key = (frame.f_code, frame.f_lineno)
+        name = self._frame_names.get(key)
+        if name is None:
+            code = frame.f_code
+            name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+            if len(self._frame_names) < 100000:
+                self._frame_names[key] = name
+        return name
+
+    def _fold(self, frame) -> str:
+        names: List[str] = []
+        while frame is not None:
+            names.append(self._frame_name(frame))
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _run(self) -> None:
+        while not self._stopping:
+            if not self._active:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                self._samples.append((perf_counter(), self._fold(frame)))
+            del frame
+            time.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start sampling the calling thread, which should run the event loop."""
+        if self._thread is None:
+            self._stopping = False
+            self._target = threading.get_ident()
+            self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+            self._thread.start()
+
+    def begin(self) -> None:
+        self.start()
+        self._active += 1
+        self._wakeup.set()
+
+    async def end(self, start: float, label: str, spans: Optional[dict] = None) -> Optional[Path]:
+        """Finish a request that began at ``start``; write a profile if it was slow."""
+        self._active -= 1
+        end = perf_counter()
+        if end - start < self.threshold:
+            return None
+        stacks: Dict[str, int] = {}
+        for taken, stack in list(self._samples):
+            if start <= taken <= end:
+                stacks[stack] = stacks.get(stack, 0) + 1
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._write, label, end - start, stacks, spans or {}
+        )
+
+    def _write(self, label: str, elapsed: float, stacks: Dict[str, int], spans: dict) -> Path:
+        name = "%s-%dms-%s.folded" % (
+            datetime.utcnow().strftime("%Y%m%dT%H%M%S%f"),
+            elapsed * 1000,
+            re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_"),
+        )
+        path = self.directory / name
+        with open(path, "w") as f:
+            f.write(f"# {label} took {elapsed * 1000:.1f}ms; {sum(stacks.values())} samples\n")
+            for span_name, (seconds, calls) in spans.items():
+                f.write(f"# span {span_name}: {seconds * 1000:.1f}ms over {calls} calls\n")
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+        self.profiles_written += 1
+        logger.warning("Slow request %s took %.0fms; profile written to %s", label, elapsed * 1000, path)
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        profiles = sorted(self.directory.glob("*.folded"))
+        for path in profiles[:max(0, len(profiles) - self.max_files)]:
+            path.unlink(missing_ok=True)
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_profiler() -> Optional[SamplingProfiler]:
+    """The process-wide slow-request profiler, or None unless SLOW_REQUEST_PROFILE_DIR is set."""
+    global _profiler
+    if _profiler is None and SLOW_REQUEST_PROFILE_DIR:
+        _profiler = SamplingProfiler(SLOW_REQUEST_PROFILE_DIR)
+    return _profiler
+
+
+def close_profiler() -> None:
+    global _profiler
+    if _profiler is not None:
+        _profiler.stop()
+        _profiler = None
@@ -0,0 +1,135 @@
+from typing import Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+import asyncio
+from fastapi.routing import APIRoute
+from .profiler import get_profiler
+
+SPAN_DESCRIPTIONS = {
+    "auth": "JWT verification",
+    "validation": "request parsing, validation and response serialization",
+    "handler": "route handler",
+    "supabase": "PostgREST calls",
+    "audit": "audit log writes",
+}
+
+# Per-request accumulator: span name -> [seconds, calls]. Tasks spawned while
+# serving a request copy the context and so record into the same dict.
+_spans: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("server_timing_spans", default=None)
+
+
+def record_span(name: str, seconds: float) -> None:
+    spans = _spans.get()
+    if spans is not None:
+        entry = spans.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+def span_total(name: str) -> float:
+    spans = _spans.get()
+    return spans[name][0] if spans and name in spans else 0.0
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block as part of the current request's ``name`` span."""
+    if _spans.get() is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, perf_counter() - start)
+
+
+def format_server_timing(spans: Dict[str, List[float]], total: float) -> str:
+    parts = []
+    for name, (seconds, calls) in spans.items():
+        part = f"{name};dur={seconds * 1000:.3f}"
+        if calls > 1:
+            part += f';desc="{calls} calls"'
+        parts.append(part)
+    parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+class TimedRoute(APIRoute):
+    """
+    Route class recording the endpoint itself as the ``handler`` span and the
+    rest of FastAPI's work for the route (body parsing, validation,
+    dependencies other than auth, response serialization) as ``validation``.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        # include_router() rebuilds routes from the already wrapped endpoint.
+        if getattr(endpoint, "_timed", False):
+            super().__init__(path, endpoint, **kwargs)
+            return
+        if asyncio.iscoroutinefunction(endpoint):
+            @wraps(endpoint)
+            async def timed_endpoint(*args, **kw):
+                with span("handler"):
+                    return await endpoint(*args, **kw)
+        else:
+            @wraps(endpoint)
+            def timed_endpoint(*args, **kw):
+                with span("handler"):
+                    return endpoint(*args, **kw)
+        timed_endpoint._timed = True
+        super().__init__(path, timed_endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            start = perf_counter()
+            before = span_total("handler") + span_total("auth")
+            try:
+                return await handler(request)
+            finally:
+                inner = span_total("handler") + span_total("auth") - before
+                record_span("validation", max(0.0, perf_counter() - start - inner))
+
+        return timed_handler
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware collecting per-request spans and returning them in a
+    ``Server-Timing`` header. Requests slower than the profiler's threshold
+    have the event loop's sampled stacks written to disk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: Dict[str, List[float]] = {}
+        token = _spans.set(spans)
+        start = perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                header = format_server_timing(spans, perf_counter() - start)
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode())]}
+            await send(message)
+
+        profiler = get_profiler()
+        if profiler is not None:
+            profiler.begin()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _spans.reset(token)
+            if profiler is not None:
+                route = scope.get("route")
+                label = f"{scope['method']} {route.path if route is not None else scope['path']}"
+                await profiler.end(start, label, spans)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Dict, Optional, Union
+from typing import Dict, List, Optional, Union
 
 class AuditLog(BaseModel):
     tenant_id: Optional[Union[str, None]] = None
@@ -15,4 +15,17 @@ class AuditLog(BaseModel):
         # JSON encoders for MongoDB compatibility
         json_encoders = {
             datetime: lambda dt: dt.isoformat()
-        }
\ No newline at end of file
+        }
+
+class AuditLogEntry(AuditLog):
+    id: str
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogEntry]
+    next_cursor: Optional[str] = None
+
+class AuditRollup(BaseModel):
+    tenant_id: Optional[str] = None
+    action: str
+    bucket: datetime
+    count: int
\ No newline at end of file
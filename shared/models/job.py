@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, Literal, Optional
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+class JobSummary(BaseModel):
+    """A job without its payload, as listed."""
+
+    id: str
+    kind: str
+    status: JobStatus = "queued"
+    progress: float = 0.0
+    progress_message: Optional[str] = None
+    attempts: int = 0
+    max_attempts: int = 3
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    run_after: datetime
+    locked_until: Optional[datetime] = None
+
+
+class Job(JobSummary):
+    payload: Dict = {}
\ No newline at end of file
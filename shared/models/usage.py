@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class TenantUsage(BaseModel):
+    tenant_id: str
+    plan_id: Optional[str] = None
+    users: int
+    max_users: Optional[int] = None
+    storage_mb: float
+    max_storage_mb: Optional[int] = None
+    over_quota: bool
\ No newline at end of file
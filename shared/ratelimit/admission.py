@@ -0,0 +1,66 @@
+from typing import Optional
+import os
+from shared.config import get_settings
+from shared.database.mongodb import pool_tracker
+from shared.database.postgrest import postgrest_backlog
+
+ADMISSION_MAX_REQUESTS = int(os.getenv("ADMISSION_MAX_REQUESTS", "200"))
+# 0 means twice SUPABASE_MAX_IN_FLIGHT: as many queued as running.
+ADMISSION_SUPABASE_BUDGET = int(os.getenv("ADMISSION_SUPABASE_BUDGET", "0"))
+ADMISSION_MONGO_BUDGET = int(os.getenv("ADMISSION_MONGO_BUDGET", "100"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+
+class AdmissionController:
+    """
+    Global load shedding: new requests are refused while this process is
+    serving ``max_requests`` requests, while PostgREST queries in flight or
+    queued for a slot reach ``supabase_budget``, or while checked-out MongoDB
+    connections reach ``mongo_budget``. Refusing at the door keeps the
+    backlog from timing out inside the connection pools, where each waiter
+    already holds a request's memory and a client's patience. A budget of 0
+    disables that check.
+    """
+
+    def __init__(
+        self,
+        max_requests: int = ADMISSION_MAX_REQUESTS,
+        supabase_budget: Optional[int] = None,
+        mongo_budget: int = ADMISSION_MONGO_BUDGET,
+        retry_after: int = ADMISSION_RETRY_AFTER,
+    ):
+        if supabase_budget is None:
+            supabase_budget = ADMISSION_SUPABASE_BUDGET or get_settings().supabase_max_in_flight * 2
+        self.max_requests = max_requests
+        self.supabase_budget = supabase_budget
+        self.mongo_budget = mongo_budget
+        self.retry_after = retry_after
+        self.in_flight = 0
+
+    def overloaded(self) -> Optional[str]:
+        """The exhausted budget ("requests", "supabase" or "mongo"), or ``None``."""
+        if self.max_requests and self.in_flight >= self.max_requests:
+            return "requests"
+        if self.supabase_budget and postgrest_backlog() >= self.supabase_budget:
+            return "supabase"
+        if self.mongo_budget and pool_tracker.checked_out >= self.mongo_budget:
+            return "mongo"
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_requests": self.max_requests,
+            "supabase_budget": self.supabase_budget,
+            "mongo_budget": self.mongo_budget,
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,153 @@
+from typing import NamedTuple, Optional, Sequence, Tuple
+from collections import OrderedDict
+import asyncio
+import logging
+import os
+import time
+
+RATE_LIMIT_USER_RATE = float(os.getenv("RATE_LIMIT_USER_RATE", "5"))
+RATE_LIMIT_USER_BURST = int(os.getenv("RATE_LIMIT_USER_BURST", "20"))
+RATE_LIMIT_TENANT_RATE = float(os.getenv("RATE_LIMIT_TENANT_RATE", "10"))
+RATE_LIMIT_TENANT_BURST = int(os.getenv("RATE_LIMIT_TENANT_BURST", "40"))
+RATE_LIMIT_LEASE_FRACTION = float(os.getenv("RATE_LIMIT_LEASE_FRACTION", "0.1"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+RATE_LIMIT_STORE_TIMEOUT = float(os.getenv("RATE_LIMIT_STORE_TIMEOUT", "0.05"))
+RATE_LIMIT_BREAKER_SECONDS = float(os.getenv("RATE_LIMIT_BREAKER_SECONDS", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimit(NamedTuple):
+    """Tokens per second and bucket size."""
+
+    rate: float
+    burst: int
+
+
+USER_LIMIT = RateLimit(RATE_LIMIT_USER_RATE, RATE_LIMIT_USER_BURST)
+TENANT_LIMIT = RateLimit(RATE_LIMIT_TENANT_RATE, RATE_LIMIT_TENANT_BURST)
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiting with per-key buckets held by a shared store.
+
+    Each worker leases tokens from the store in batches of
+    ``lease_fraction`` of the bucket size and spends them locally, so only
+    one request in a batch waits on the store. Tokens leased but not yet
+    spent are invisible to other workers, so a burst can exceed the bucket
+    size by up to one lease per worker. After a refusal the key is refused
+    locally until a token is due, without asking the store again.
+
+    If the store fails or takes longer than ``store_timeout`` seconds,
+    requests are let through rather than refused, and the store is not
+    asked again for ``breaker_seconds``, so an outage costs one timeout per
+    worker rather than one per request.
+    """
+
+    def __init__(
+        self,
+        store,
+        lease_fraction: float = RATE_LIMIT_LEASE_FRACTION,
+        max_keys: int = RATE_LIMIT_MAX_KEYS,
+        store_timeout: float = RATE_LIMIT_STORE_TIMEOUT,
+        breaker_seconds: float = RATE_LIMIT_BREAKER_SECONDS,
+    ):
+        self.store = store
+        self.lease_fraction = lease_fraction
+        self.max_keys = max_keys
+        self.store_timeout = store_timeout
+        self.breaker_seconds = breaker_seconds
+        self._open_until = 0.0
+        # key -> (leased tokens left, refused until)
+        self._local: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+        self.leases = 0
+        self.errors = 0
+
+    def _set(self, key: str, tokens: int, refused_until: float) -> None:
+        self._local[key] = (tokens, refused_until)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_keys:
+            self._local.popitem(last=False)
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        """Spend one of ``key``'s tokens. Returns 0 if allowed, else seconds until a token is due."""
+        now = time.time()
+        tokens, refused_until = self._local.get(key, (0, 0.0))
+        if tokens > 0:
+            self._set(key, tokens - 1, 0.0)
+            return 0.0
+        if refused_until > now:
+            return refused_until - now
+        if self._open_until > now:
+            return 0.0
+        lease = max(1, int(limit.burst * self.lease_fraction))
+        try:
+            granted, retry_after = await asyncio.wait_for(
+                self.store.take(key, lease, limit.rate, limit.burst, now), timeout=self.store_timeout
+            )
+        except Exception:
+            self.errors += 1
+            self._open_until = time.time() + self.breaker_seconds
+            logger.exception(
+                "Rate limit store unavailable; letting requests through for %ss", self.breaker_seconds
+            )
+            return 0.0
+        self.leases += 1
+        if granted == 0:
+            self._set(key, 0, now + retry_after)
+            return retry_after
+        tokens, _ = self._local.get(key, (0, 0.0))
+        self._set(key, tokens + granted - 1, 0.0)
+        return 0.0
+
+    def refund(self, key: str) -> None:
+        tokens, _ = self._local.get(key, (0, 0.0))
+        self._set(key, tokens + 1, 0.0)
+
+    async def check(self, buckets: Sequence[Tuple[str, RateLimit]]) -> Tuple[Optional[str], float]:
+        """
+        Spend a token from every bucket, or from none of them. Returns
+        ``(None, 0)`` if allowed, else the key that refused and the seconds
+        until it has a token.
+        """
+        spent = []
+        for key, limit in buckets:
+            retry_after = await self.acquire(key, limit)
+            if retry_after:
+                for earlier in spent:
+                    self.refund(earlier)
+                self.rejected += 1
+                return key, retry_after
+            spent.append(key)
+        self.allowed += 1
+        return None, 0.0
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._local),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "leases": self.leases,
+            "errors": self.errors,
+        }
+
+
+_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide limiter backed by the ``rate_limits`` collection."""
+    global _limiter
+    if _limiter is None:
+        from shared.database.mongodb import get_database
+        from .store import MongoRateLimitStore
+        _limiter = RateLimiter(MongoRateLimitStore(get_database().rate_limits))
+    return _limiter
+
+
+def close_rate_limiter() -> None:
+    global _limiter
+    _limiter = None
@@ -0,0 +1,121 @@
+from typing import Iterable, List, Tuple
+import json
+import math
+import uuid
+from shared.auth.dependencies import verify_token
+from shared.database.postgrest import PoolExhaustedError
+from shared.metrics.registry import HTTP_REQUESTS_REJECTED
+from .admission import get_admission_controller
+from .limiter import TENANT_LIMIT, USER_LIMIT, RateLimit, get_rate_limiter
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+UNLIMITED_PATHS = ("/health", "/ready", "/metrics")
+
+
+async def reject(send, status: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def rate_limit_keys(scope) -> List[Tuple[str, RateLimit]]:
+    """
+    The buckets a request draws from: the caller's (by user id for a valid
+    bearer token, otherwise by client address) and, for authenticated
+    callers sending a well-formed ``X-Tenant-ID``, the tenant's. Anonymous
+    callers cannot drain a tenant's bucket or create new ones.
+    """
+    headers = dict(scope["headers"])
+    caller = None
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if authorization.startswith("Bearer "):
+        try:
+            caller = "user:" + verify_token(authorization[len("Bearer "):])["id"]
+        except Exception:
+            pass
+    if caller is None:
+        client = scope.get("client")
+        return [("client:" + (client[0] if client else "unknown"), USER_LIMIT)]
+    keys = [(caller, USER_LIMIT)]
+    tenant_id = headers.get(b"x-tenant-id")
+    if tenant_id:
+        try:
+            keys.append(("tenant:" + str(uuid.UUID(tenant_id.decode("latin-1"))), TENANT_LIMIT))
+        except ValueError:
+            pass
+    return keys
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware refusing writes (``methods``) with 429 and
+    ``Retry-After`` once the caller or the tenant has used up its token
+    bucket. Reads are left to admission control.
+    """
+
+    def __init__(self, app, methods: Iterable[str] = WRITE_METHODS):
+        self.app = app
+        self.methods = frozenset(methods)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+        refused, retry_after = await get_rate_limiter().check(rate_limit_keys(scope))
+        if refused is not None:
+            scope_name = refused.split(":", 1)[0]
+            HTTP_REQUESTS_REJECTED.inc(("tenant_rate" if scope_name == "tenant" else "caller_rate",))
+            await reject(send, 429, "Too many requests", retry_after)
+            return
+        await self.app(scope, receive, send)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware shedding load with 503 and ``Retry-After`` while the
+    process is over one of its admission budgets, and when a request gave
+    up waiting for a PostgREST slot before responding. Health and metrics
+    endpoints are never refused.
+    """
+
+    def __init__(self, app, unlimited_paths: Iterable[str] = UNLIMITED_PATHS):
+        self.app = app
+        self.unlimited_paths = frozenset(unlimited_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.unlimited_paths:
+            await self.app(scope, receive, send)
+            return
+        controller = get_admission_controller()
+        reason = controller.overloaded()
+        if reason is not None:
+            HTTP_REQUESTS_REJECTED.inc((reason,))
+            await reject(send, 503, "Service overloaded, retry later", controller.retry_after)
+            return
+
+        started = False
+
+        async def send_wrapper(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        controller.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except PoolExhaustedError:
+            if started:
+                raise
+            HTTP_REQUESTS_REJECTED.inc(("pool_exhausted",))
+            await reject(send, 503, "Service overloaded, retry later", controller.retry_after)
+        finally:
+            controller.in_flight -= 1
@@ -0,0 +1,93 @@
+from typing import Dict, Optional, Tuple
+from datetime import datetime
+import logging
+import math
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_INDEXES = [
+    # A bucket that has been idle long enough to refill is the same as no bucket.
+    IndexModel([("expires_at", ASCENDING)], name="expires", expireAfterSeconds=0),
+]
+
+
+def refill(tokens: float, updated: float, now: float, rate: float, burst: float) -> float:
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+def grant(tokens: float, amount: int, rate: float) -> Tuple[int, float]:
+    """Whole tokens granted out of ``amount``, and seconds until one is available if none were."""
+    granted = min(amount, int(math.floor(tokens)))
+    if granted > 0:
+        return granted, 0.0
+    return 0, (1 - tokens) / rate
+
+
+class InMemoryRateLimitStore:
+    """Token buckets for tests and single-process deployments."""
+
+    def __init__(self, max_buckets: int = 100000):
+        self.max_buckets = max_buckets
+        # key -> (tokens, updated, time the bucket is full again)
+        self.buckets: Dict[str, Tuple[float, float, float]] = {}
+
+    async def ensure_indexes(self) -> None:
+        pass
+
+    async def take(self, key: str, amount: int, rate: float, burst: float, now: float) -> Tuple[int, float]:
+        """
+        Take up to ``amount`` tokens from ``key``'s bucket. Returns the number
+        taken and, if that is zero, how many seconds until a token refills.
+        """
+        tokens, updated, _ = self.buckets.get(key, (burst, now, now))
+        tokens = refill(tokens, updated, now, rate, burst)
+        granted, retry_after = grant(tokens, amount, rate)
+        if len(self.buckets) >= self.max_buckets and key not in self.buckets:
+            # Buckets that have refilled carry no state.
+            self.buckets = {k: v for k, v in self.buckets.items() if v[2] > now}
+        remaining = tokens - granted
+        self.buckets[key] = (remaining, now, now + (burst - remaining) / rate)
+        return granted, retry_after
+
+
+class MongoRateLimitStore:
+    """
+    Token buckets shared by every worker, one document per key, updated with
+    compare-and-set on the bucket's last update time.
+    """
+
+    def __init__(self, collection, max_attempts: int = 5):
+        self.collection = collection
+        self.max_attempts = max_attempts
+
+    async def ensure_indexes(self) -> None:
+        try:
+            await self.collection.create_indexes(RATE_LIMIT_INDEXES)
+        except Exception:
+            logger.exception("Failed to create rate limit indexes")
+
+    async def take(self, key: str, amount: int, rate: float, burst: float, now: float) -> Tuple[int, float]:
+        for _ in range(self.max_attempts):
+            doc: Optional[dict] = await self.collection.find_one({"_id": key})
+            tokens = burst if doc is None else refill(doc["tokens"], doc["updated"], now, rate, burst)
+            granted, retry_after = grant(tokens, amount, rate)
+            remaining = tokens - granted
+            state = {
+                "tokens": remaining,
+                "updated": now,
+                "expires_at": datetime.utcfromtimestamp(now + (burst - remaining) / rate),
+            }
+            if doc is None:
+                try:
+                    await self.collection.insert_one({"_id": key, **state})
+                except DuplicateKeyError:
+                    continue
+                return granted, retry_after
+            result = await self.collection.update_one(
+                {"_id": key, "updated": doc["updated"], "tokens": doc["tokens"]}, {"$set": state}
+            )
+            if result.matched_count:
+                return granted, retry_after
+        raise RuntimeError(f"Rate limit bucket {key!r} is too contended")
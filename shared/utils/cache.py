@@ -0,0 +1,123 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import time
+
+
+def etag_for(value: Any) -> str:
+    """Strong ETag over the JSON form of ``value``."""
+    body = json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+    return '"%s"' % hashlib.sha1(body.encode()).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header value matches ``etag``."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class TTLCache:
+    """
+    In-process LRU cache whose entries expire ``ttl`` seconds after loading.
+
+    ``get_or_load`` coalesces concurrent misses for the same key into a
+    single call to the loader (single-flight); if that call is cancelled,
+    a waiting caller starts the load again. Each entry carries an ETag of
+    its value so HTTP handlers can answer conditional requests without
+    re-serializing. ``invalidate`` bumps a generation counter, so a load that
+    was already in flight when the data changed is not cached.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, str]]" = OrderedDict()
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, str]]:
+        """Return ``(value, etag)`` if cached and fresh, else ``None``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value, etag = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value, etag
+
+    def set(self, key: Hashable, value: Any) -> Tuple[Any, str]:
+        etag = etag_for(value)
+        self._entries[key] = (time.monotonic() + self.ttl, value, etag)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value, etag
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        while True:
+            cached = self.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            inflight = self._loading.get(key)
+            if inflight is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The leader was cancelled (say, its client went away), not
+                # us: take over the load.
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        generation = self._generation
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters see the exception; don't warn about it going unretrieved.
+            future.exception()
+            raise
+        else:
+            if generation == self._generation:
+                result = self.set(key, value)
+            else:
+                result = (value, etag_for(value))
+            future.set_result(result)
+            return result
+        finally:
+            self._loading.pop(key, None)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop ``key``, or every entry when no key is given."""
+        self._generation += 1
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
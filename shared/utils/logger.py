@@ -0,0 +1,309 @@
+from typing import Any, Dict, List, Optional, Tuple
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from pathlib import Path
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_TO_STDOUT = os.getenv("LOG_TO_STDOUT", "true").lower() == "true"
+LOG_ROTATION = os.getenv("LOG_ROTATION", "size")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "midnight")
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "7"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_DEDUP_WINDOW = float(os.getenv("LOG_DEDUP_WINDOW", "10"))
+
+APP_LOGGER_NAME = "zubaschool"
+AUDIT_LOGGER_NAME = "zubaschool_audit"
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through ``extra``.
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, request ID and any extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request ID, in the caller's context before queueing."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DuplicateFilter(logging.Filter):
+    """
+    Rate-limits repeated warnings and errors. A record with the same logger,
+    level, formatted message and exception type as one let through less than
+    ``window`` seconds ago is dropped; the next one let through carries a
+    ``suppressed`` count. Records below WARNING always pass.
+    """
+
+    def __init__(self, window: float = LOG_DEDUP_WINDOW, max_keys: int = 10000):
+        super().__init__()
+        self.window = window
+        self.max_keys = max_keys
+        self._seen: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.window <= 0:
+            return True
+        exc_type = record.exc_info[0] if record.exc_info else None
+        try:
+            message = record.getMessage()
+        except Exception:
+            # Left for the handler to report; don't raise into the caller.
+            message = str(record.msg)
+        key = (record.name, record.levelno, message, exc_type)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                self.suppressed += 1
+                return False
+            if entry is not None and entry[1]:
+                record.suppressed = entry[1]
+            if len(self._seen) >= self.max_keys:
+                self._seen.clear()
+            self._seen[key] = [now, 0]
+        return True
+
+
+class NameFilter(logging.Filter):
+    """Pass records from the ``audit`` logger only, or everything else."""
+
+    def __init__(self, audit: bool):
+        super().__init__()
+        self.audit = audit
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return (record.name == AUDIT_LOGGER_NAME) == self.audit
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller: once ``queue_size`` records
+    are waiting, new ones are dropped and counted. ``prepare`` only merges
+    the message arguments; JSON
+    formatting and traceback rendering happen on the listener thread.
+    The listener is started on the first record, so importing this module
+    starts no threads.
+    """
+
+    def __init__(self, pipeline: "LogPipeline"):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, while they still hold their current
+        # values; other handlers would render the same message anyway.
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.queue.qsize() >= self.pipeline.queue_size:
+            self.dropped += 1
+        else:
+            self.queue.put_nowait(record)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not self.pipeline.started:
+            self.pipeline.start()
+        super().emit(record)
+
+
+class LogPipeline:
+    """
+    Bounded queue between the loggers and the handlers that do I/O. Callers
+    pay for filtering and one ``put_nowait``; a ``QueueListener`` thread
+    formats records and writes them to ``handlers``.
+    """
+
+    def __init__(self, handlers: List[logging.Handler], queue_size: int = LOG_QUEUE_SIZE,
+                 dedup_window: float = LOG_DEDUP_WINDOW):
+        # SimpleQueue is lock-free for producers; the bound is enforced by the handler.
+        self.queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self.queue_size = queue_size
+        self.handlers = handlers
+        self.handler = NonBlockingQueueHandler(self)
+        self.handler.addFilter(RequestIdFilter())
+        self.duplicates = DuplicateFilter(dedup_window)
+        self.handler.addFilter(self.duplicates)
+        self._listener: Optional[QueueListener] = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._listener is not None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._listener is None:
+                self._listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+                self._listener.start()
+
+    def stop(self) -> None:
+        """Write out everything queued and stop the listener thread."""
+        with self._lock:
+            if self._listener is None:
+                return
+            self._listener.stop()
+            self._listener = None
+        for handler in self.handlers:
+            handler.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "suppressed": self.duplicates.suppressed,
+        }
+
+
+def _file_handler(path: Path) -> logging.Handler:
+    if LOG_ROTATION == "time":
+        return TimedRotatingFileHandler(path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, delay=True, utc=True)
+    return RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True)
+
+
+def default_handlers(log_dir=LOG_DIR) -> List[logging.Handler]:
+    """``app.log`` and ``audit.log`` under ``log_dir``, plus stdout unless disabled."""
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    formatter = JsonFormatter()
+    app_file = _file_handler(log_dir / "app.log")
+    app_file.addFilter(NameFilter(audit=False))
+    audit_file = _file_handler(log_dir / "audit.log")
+    audit_file.addFilter(NameFilter(audit=True))
+    handlers = [app_file, audit_file]
+    if LOG_TO_STDOUT:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+class _LazyHandlers(list):
+    """Defers creating ``logs/`` and opening handlers until the listener starts."""
+
+    def __iter__(self):
+        if not self:
+            self.extend(default_handlers())
+        return super().__iter__()
+
+
+pipeline = LogPipeline(_LazyHandlers())
+atexit.register(pipeline.stop)
+
+
+def _install(logger: logging.Logger, propagate: bool) -> logging.Logger:
+    if pipeline.handler not in logger.handlers:
+        logger.addHandler(pipeline.handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = propagate
+    return logger
+
+
+def get_app_logger(name: Optional[str] = None) -> logging.Logger:
+    """The application logger, or a named child of it (``zubaschool.<name>``)."""
+    if name is None:
+        return _install(logging.getLogger(APP_LOGGER_NAME), propagate=False)
+    get_app_logger()
+    return logging.getLogger(f"{APP_LOGGER_NAME}.{name}")
+
+
+app_logger = get_app_logger()
+audit_logger = _install(logging.getLogger(AUDIT_LOGGER_NAME), propagate=False)
+
+# Module loggers under shared/ and services/ go through the same pipeline.
+for _name in ("shared", "services"):
+    logging.getLogger(_name).addHandler(pipeline.handler)
+
+
+def log_user_action(user_id: str, action: str, details: Optional[Dict[str, Any]] = None) -> None:
+    audit_logger.info("User %s performed %s", user_id, action,
+                      extra={"event": "user_action", "user_id": user_id, "action": action, "details": details or {}})
+
+
+def log_system_event(event_type: str, message: str, details: Optional[Dict[str, Any]] = None) -> None:
+    app_logger.info(message, extra={"event": "system_event", "event_type": event_type, "details": details or {}})
+
+
+def log_error(error: BaseException, context: Optional[str] = None, details: Optional[Dict[str, Any]] = None) -> None:
+    app_logger.error("%s: %s", type(error).__name__, error, exc_info=error,
+                     extra={"event": "error", "context": context, "details": details or {}})
+
+
+def stop_logging() -> None:
+    pipeline.stop()
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware binding a request ID to the logging context: the
+    caller's ``X-Request-ID`` if present, otherwise a new one. The ID is
+    echoed back in the response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (REQUEST_ID_HEADER.encode(), request_id.encode())]}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,45 @@
+from typing import Any, Mapping, Optional
+from functools import lru_cache
+import os
+from fastapi import Response
+from pydantic import TypeAdapter
+
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "false").lower() in ("1", "true", "yes")
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+class PydanticJSONResponse(Response):
+    """JSON response whose body was already rendered by pydantic-core."""
+
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+def respond(
+    response_type: Any,
+    data: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Any:
+    """
+    Return ``data`` (rows as dicts) from an endpoint declared with
+    ``response_model=response_type``.
+
+    By default ``data`` is returned as is and FastAPI validates and
+    serializes it through the response model. With ``FAST_SERIALIZATION``
+    on, it is validated once against ``response_type`` and rendered
+    straight to bytes by pydantic-core's Rust JSON serializer, and the
+    resulting ``Response`` bypasses FastAPI's response-model pass and the
+    stdlib ``json`` encoder. The bytes are equivalent JSON either way.
+    """
+    if not FAST_SERIALIZATION:
+        return data
+    adapter = _adapter(response_type)
+    body = adapter.dump_json(adapter.validate_python(data))
+    return PydanticJSONResponse(body, status_code=status_code, headers=headers)
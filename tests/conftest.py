@@ -0,0 +1,344 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Make `shared` and `services` importable and give the import-time clients
+# something well-formed to build against; nothing here talks to a real backend.
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.anon.key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret-for-the-test-suite")
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="zubaschool-test-logs-"))
+os.environ.setdefault("LOG_TO_STDOUT", "false")
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+
+class StubPostgrestHandler(BaseHTTPRequestHandler):
+    """
+    In-memory PostgREST lookalike: inserts are stored per table and echoed
+    back (return=representation), GET and PATCH honour ``eq``/``lt``/``gt``/``in``
+    filters and ``or=(...)`` trees; GET also honours ``order`` and ``limit``.
+    Every request is delayed by ``server.delay`` seconds.
+    """
+
+    OPERATORS = {"eq": str.__eq__, "lt": str.__lt__, "gt": str.__gt__,
+                 "in": lambda value, operand: value in operand[1:-1].split(",")}
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _begin(self):
+        # postgrest-py sends a JSON body even with GET; always drain it.
+        self.body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"[]")
+        time.sleep(self.server.delay)
+        self.server.requests.append((self.path, self.headers.get("Authorization")))
+        url = urlsplit(self.path)
+        table = self.server.tables.setdefault(url.path.rsplit("/", 1)[-1], [])
+        self.query = parse_qsl(url.query)
+        filters = [self._condition(k, v) for k, v in self.query if k not in ("select", "order", "limit")]
+        return table, filters
+
+    @classmethod
+    def _condition(cls, column, value):
+        if column in ("or", "and"):
+            conditions = [cls._condition(*cls._split_term(term)) for term in cls._split_list(value[1:-1])]
+            return (any if column == "or" else all), conditions
+        operator, operand = value.split(".", 1)
+        return column, operator, operand.strip('"')
+
+    @staticmethod
+    def _split_term(term):
+        if term.startswith(("or(", "and(")):
+            name, rest = term.split("(", 1)
+            return name, "(" + rest
+        column, value = term.split(".", 1)
+        return column, value
+
+    @staticmethod
+    def _split_list(text):
+        """Split on commas outside parentheses and double quotes."""
+        parts, depth, quoted, start = [], 0, False, 0
+        for i, c in enumerate(text):
+            if c == '"':
+                quoted = not quoted
+            elif not quoted and c in "()":
+                depth += 1 if c == "(" else -1
+            elif not quoted and c == "," and depth == 0:
+                parts.append(text[start:i])
+                start = i + 1
+        return parts + [text[start:]]
+
+    @classmethod
+    def _matches(cls, row, filters):
+        for condition in filters:
+            if len(condition) == 2:
+                combine, conditions = condition
+                if not combine(cls._matches(row, [c]) for c in conditions):
+                    return False
+                continue
+            column, operator, operand = condition
+            if operator not in cls.OPERATORS or row.get(column) is None:
+                return False
+            if not cls.OPERATORS[operator](str(row[column]), operand):
+                return False
+        return True
+
+    def do_POST(self):
+        table, _ = self._begin()
+        rows = self.body if isinstance(self.body, list) else [self.body]
+        if any(self.server.reject(row) for row in rows):
+            return self._reply(409, {"message": "duplicate key value violates unique constraint", "code": "23505"})
+        table.extend(rows)
+        self._reply(201, rows)
+
+    def do_GET(self):
+        table, filters = self._begin()
+        rows = [row for row in table if self._matches(row, filters)]
+        params = dict(self.query)
+        for key in reversed(params.get("order", "").split(",") if params.get("order") else []):
+            column, *flags = key.split(".")
+            rows.sort(key=lambda row: str(row.get(column)), reverse="desc" in flags)
+        if "limit" in params:
+            rows = rows[:int(params["limit"])]
+        if params.get("select", "*") != "*":
+            rows = [{column: row.get(column) for column in params["select"].split(",")} for row in rows]
+        self._reply(200, rows)
+
+    def do_PATCH(self):
+        table, filters = self._begin()
+        updated = [row for row in table if self._matches(row, filters)]
+        for row in updated:
+            row.update(self.body)
+        self._reply(200, updated)
+
+    def do_HEAD(self):
+        self._begin()
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def postgrest_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubPostgrestHandler)
+    server.daemon_threads = True
+    server.delay = 0.0
+    server.tables = {}
+    server.reject = lambda row: False
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class FakeCollection:
+    """Just enough of a Motor collection to record writes, with a unique ``_id``."""
+
+    def __init__(self, fail=False):
+        self.docs = []
+        self.calls = []
+        self.fail = fail
+
+    async def insert_many(self, docs, ordered=True):
+        from types import SimpleNamespace
+
+        from bson import ObjectId
+        from pymongo.errors import BulkWriteError
+
+        if self.fail:
+            raise ConnectionError("mongo unavailable")
+        self.calls.append(("insert_many", len(docs)))
+        seen = {d["_id"] for d in self.docs}
+        inserted, errors = [], []
+        for index, doc in enumerate(docs):
+            doc.setdefault("_id", ObjectId())
+            if doc["_id"] in seen:
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+                if ordered:
+                    break
+                continue
+            seen.add(doc["_id"])
+            self.docs.append(doc)
+            inserted.append(doc["_id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return SimpleNamespace(inserted_ids=inserted)
+
+    async def create_indexes(self, indexes):
+        self.calls.append(("create_indexes", len(indexes)))
+
+    async def insert_one(self, doc):
+        from types import SimpleNamespace
+
+        result = await self.insert_many([doc])
+        return SimpleNamespace(inserted_id=result.inserted_ids[0])
+
+
+class FakeDatabase:
+    def __init__(self, **collections):
+        self.__dict__.update(collections)
+
+    def __getattr__(self, name):
+        collection = self.__dict__[name] = FakeCollection()
+        return collection
+
+    __getitem__ = __getattr__
+
+
+@pytest.fixture
+def audit_collection():
+    return FakeCollection()
+
+
+class AsyncMongomockCursor:
+    """Motor-style cursor over a mongomock cursor."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self.cursor = self.cursor.limit(n)
+        return self
+
+    def skip(self, n):
+        self.cursor = self.cursor.skip(n)
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    async def to_list(self, length=None):
+        docs = []
+        for doc in self.cursor:
+            docs.append(doc)
+            if length is not None and len(docs) >= length:
+                break
+        return docs
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class AsyncMongomockCollection:
+    """Motor-style async facade over a mongomock collection."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncMongomockCursor(self.collection.find(*args, **kwargs))
+
+    def aggregate(self, pipeline, **kwargs):
+        return AsyncMongomockCursor(iter(self.collection.aggregate(pipeline, **kwargs)))
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+class AsyncMongomockDatabase:
+    def __init__(self, database):
+        self.database = database
+
+    def __getattr__(self, name):
+        return AsyncMongomockCollection(self.database[name])
+
+    __getitem__ = __getattr__
+
+
+@pytest.fixture
+def mongo_db():
+    mongomock = pytest.importorskip("mongomock")
+    return AsyncMongomockDatabase(mongomock.MongoClient().zubaschool)
+
+
+@pytest.fixture
+def admin_token():
+    import uuid
+
+    import jwt
+
+    return jwt.encode({"sub": str(uuid.uuid4()), "role": "sysadmin", "email": "admin@zuba.school"}, "test-jwt-secret-for-the-test-suite")
+
+
+@pytest.fixture
+def api_backends(monkeypatch, postgrest_stub, audit_collection):
+    """Point the lazily created PostgREST client and audit sink at test doubles."""
+    import dataclasses
+
+    import services.user_management.search
+    import shared.audit.chain
+    import shared.audit.rollup
+    import shared.audit.sink
+    import shared.audit.verify
+    import shared.config
+    import shared.database.mongodb
+    import shared.database.postgrest
+    import shared.entitlements.engine
+    import shared.idempotency.manager
+    import shared.invalidation.bus
+    import shared.jobs.queue
+    import shared.metering.meter
+    import shared.ratelimit.admission
+    import shared.ratelimit.limiter
+    from shared.idempotency.store import InMemoryIdempotencyStore
+    from shared.invalidation.transport import InMemoryTransport
+    from shared.jobs.store import InMemoryJobStore
+    from shared.metering.store import InMemoryUsageStore
+    from shared.ratelimit.store import InMemoryRateLimitStore
+
+    settings = dataclasses.replace(shared.config.get_settings(), supabase_url=postgrest_stub.url)
+    monkeypatch.setattr(shared.config, "_settings", settings)
+    monkeypatch.setattr(shared.database.postgrest, "_postgrest", None)
+    monkeypatch.setattr(shared.audit.sink, "_sink", shared.audit.sink.AuditSink(audit_collection))
+    monkeypatch.setattr(shared.database.mongodb, "_db", FakeDatabase(audit_logs=audit_collection))
+    monkeypatch.setattr(shared.jobs.queue, "_queue", shared.jobs.queue.JobQueue(InMemoryJobStore(), poll_interval=0.01))
+    monkeypatch.setattr(services.user_management.search, "_index", None)
+    monkeypatch.setattr(shared.entitlements.engine, "_engine", None)
+    monkeypatch.setattr(shared.metering.meter, "_meter", shared.metering.meter.UsageMeter(InMemoryUsageStore()))
+    monkeypatch.setattr(shared.idempotency.manager, "_manager",
+                        shared.idempotency.manager.IdempotencyManager(InMemoryIdempotencyStore()))
+    monkeypatch.setattr(shared.ratelimit.limiter, "_limiter", shared.ratelimit.limiter.RateLimiter(InMemoryRateLimitStore()))
+    monkeypatch.setattr(shared.ratelimit.admission, "_controller", None)
+    monkeypatch.setattr(shared.invalidation.bus, "_bus", shared.invalidation.bus.InvalidationBus(InMemoryTransport()))
+    monkeypatch.setattr(shared.audit.rollup, "_rollup",
+                        shared.audit.rollup.AuditRollup(audit_collection, FakeCollection(), FakeCollection(), interval=0))
+    monkeypatch.setattr(shared.audit.chain, "_chain", shared.audit.chain.AuditChain(audit_collection, FakeCollection(), interval=0))
+    monkeypatch.setattr(shared.audit.verify, "_verifier",
+                        shared.audit.verify.AuditVerifier(audit_collection, FakeCollection(), FakeCollection(), interval=0))
+    return postgrest_stub, audit_collection
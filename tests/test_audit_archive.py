@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from services.user_management.main import app
+from shared.audit.archive import AuditArchive, LocalArchiveStorage, get_audit_archive
+from shared.audit.query import query_audit_logs
+from shared.audit.rollup import ROLLUP_PENDING
+from shared.audit.routes import get_audit_collection
+from shared.models.audit_log import AuditLog
+
+NOW = datetime(2026, 6, 1)
+
+
+def log(tenant_id, day, hour=9, month=1, action="CreateTenant", user_id="u1"):
+    return AuditLog(tenant_id=tenant_id, user_id=user_id, action=action, details={},
+                    created_at=datetime(2026, month, day, hour)).dict()
+
+
+class CountingStorage(LocalArchiveStorage):
+    def __init__(self, root):
+        super().__init__(root)
+        self.reads = []
+
+    def get(self, key):
+        self.reads.append(key)
+        return super().get(key)
+
+
+def make_archive(mongo_db, tmp_path, **kwargs):
+    return AuditArchive(mongo_db.audit_logs, CountingStorage(tmp_path), mongo_db.audit_archive_state,
+                        after_days=90, **kwargs)
+
+
+def insert(mongo_db, docs):
+    asyncio.run(mongo_db.audit_logs.insert_many(docs))
+
+
+def test_old_counted_logs_move_to_day_and_tenant_partitions(mongo_db, tmp_path):
+    pending = {**log("t1", 2), ROLLUP_PENDING: True}
+    insert(mongo_db, [log("t1", 1), log("t1", 1, 10), log("t2", 1), log(None, 2), pending, log("t1", 20, month=5)])
+    archive = make_archive(mongo_db, tmp_path, part_size=1)
+
+    assert asyncio.run(archive.archive(NOW)) == 4
+    left = asyncio.run(mongo_db.audit_logs.find({}).to_list(None))
+    assert sorted(doc["created_at"].month for doc in left) == [1, 5]
+    assert left[0].get(ROLLUP_PENDING) or left[1].get(ROLLUP_PENDING)
+    assert archive.storage.list() == ["date=2026-01-01", "date=2026-01-02"]
+    assert archive.storage.list("date=2026-01-01") == ["tenant=t1", "tenant=t2"]
+    assert archive.storage.list("date=2026-01-02") == ["tenant=_none"]
+    assert len(archive.storage.list("date=2026-01-01/tenant=t1/")) == 4  # two parts, data and index each
+    assert asyncio.run(archive.archive(NOW)) == 0
+
+
+def test_pages_run_from_mongo_into_the_archive(mongo_db, tmp_path):
+    insert(mongo_db, [log("t1", day) for day in range(1, 6)] + [log("t1", 1, month=5), log("t1", 2, month=5)])
+    archive = make_archive(mongo_db, tmp_path)
+    asyncio.run(archive.archive(NOW))
+    # A part stored but not yet deleted from Mongo shows up once.
+    asyncio.run(mongo_db.audit_logs.insert_one(log("t2", 5)))
+    asyncio.run(archive.archive(NOW))
+    asyncio.run(mongo_db.audit_logs.insert_one(asyncio.run(archive.query(tenant_id="t2", limit=1))[0]))
+
+    async def all_pages():
+        days, cursor = [], None
+        while True:
+            docs, cursor = await query_audit_logs(mongo_db.audit_logs, cursor=cursor, limit=3, archive=archive)
+            days += [(doc["created_at"].month, doc["created_at"].day) for doc in docs]
+            if cursor is None:
+                return days
+    assert asyncio.run(all_pages()) == [(5, 2), (5, 1), (1, 5), (1, 5), (1, 4), (1, 3), (1, 2), (1, 1)]
+
+
+def test_queries_read_only_matching_partitions(mongo_db, tmp_path):
+    insert(mongo_db, [log("t1", 1), log("t2", 1), log("t1", 2, action="UpdateTenant"), log("t1", 3, user_id="u2")])
+    archive = make_archive(mongo_db, tmp_path)
+    asyncio.run(archive.archive(NOW))
+
+    docs = asyncio.run(archive.query(tenant_id="t1", action="UpdateTenant"))
+    assert [doc["created_at"].day for doc in docs] == [2]
+    data = [key for key in archive.storage.reads if key.endswith(".ndjson.gz")]
+    assert len(data) == 1 and data[0].startswith("date=2026-01-02/tenant=t1/part-")
+    assert not any("tenant=t2" in key for key in archive.storage.reads)
+
+    archive.storage.reads.clear()
+    recent = asyncio.run(archive.query(since=datetime(2026, 1, 3)))
+    assert [doc["user_id"] for doc in recent] == ["u2"]
+    assert all(key.startswith("date=2026-01-03/") for key in archive.storage.reads)
+
+
+def test_list_endpoint_includes_archived_logs(api_backends, admin_token, mongo_db, tmp_path):
+    insert(mongo_db, [log("t1", 1), log("t1", 1, month=5)])
+    archive = make_archive(mongo_db, tmp_path)
+    asyncio.run(archive.archive(NOW))
+    app.dependency_overrides[get_audit_collection] = lambda: mongo_db.audit_logs
+    app.dependency_overrides[get_audit_archive] = lambda: archive
+    try:
+        with TestClient(app) as client:
+            response = client.get("/audit-logs", params={"tenant_id": "t1"},
+                                  headers={"Authorization": f"Bearer {admin_token}"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert [item["created_at"] for item in response.json()["items"]] == ["2026-05-01T09:00:00", "2026-01-01T09:00:00"]
+
+
+def test_aware_bounds_are_compared_as_utc(mongo_db, tmp_path):
+    insert(mongo_db, [log("t1", 1, hour=9), log("t1", 1, hour=11), log("t1", 1, month=5)])
+    archive = make_archive(mongo_db, tmp_path)
+    asyncio.run(archive.archive(NOW))
+
+    nairobi = timezone(timedelta(hours=3))
+    docs, _ = asyncio.run(query_audit_logs(mongo_db.audit_logs, since=datetime(2026, 1, 1, 13, tzinfo=nairobi),
+                                           until=datetime(2026, 6, 1, tzinfo=timezone.utc), archive=archive))
+    assert [(doc["created_at"].month, doc["created_at"].hour) for doc in docs] == [(5, 9), (1, 11)]
@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime
+
+from shared.audit.archive import AuditArchive, LocalArchiveStorage
+from shared.audit.chain import CHAIN_PENDING, GENESIS, AuditChain
+from shared.audit.rollup import ROLLUP_PENDING
+from shared.audit.sink import AuditSink
+from shared.audit.verify import AuditVerifier
+from shared.models.audit_log import AuditLog
+
+
+def log(tenant_id, minute, action="CreateTenant"):
+    return AuditLog(tenant_id=tenant_id, user_id="u1", action=action, details={"minute": minute, "tags": ["a"]},
+                    created_at=datetime(2026, 3, 1, 9, minute))
+
+
+def write(mongo_db, logs):
+    async def main():
+        sink = AuditSink(mongo_db.audit_logs)
+        await sink.enqueue_many(logs)
+        await sink.stop()
+        await AuditChain(mongo_db.audit_logs, mongo_db.audit_chain_state, batch_size=3, lease_seconds=0).catch_up()
+    asyncio.run(main())
+
+
+def verify(mongo_db, key="k1"):
+    async def main():
+        verifier = AuditVerifier(mongo_db.audit_logs, mongo_db.audit_checkpoints, mongo_db.audit_chain_state,
+                                 key=key, processes=2, chunk_size=2, lease_seconds=0)
+        try:
+            results = await verifier.verify()
+        finally:
+            await verifier.stop()
+        return {result["tenant_id"]: result for result in results}
+    return asyncio.run(main())
+
+
+def chain_of(mongo_db, tenant_id):
+    return asyncio.run(mongo_db.audit_logs.find({"tenant_id": tenant_id}).sort([("seq", 1)]).to_list(None))
+
+
+def test_logs_are_linked_per_tenant_in_order(mongo_db):
+    asyncio.run(mongo_db.audit_logs.insert_one(log("t1", 0).dict()))  # written before chaining
+    write(mongo_db, [log("t1", 1), log("t2", 2), log("t1", 3), log(None, 4)])
+    write(mongo_db, [log("t1", 5)])
+
+    t1 = chain_of(mongo_db, "t1")
+    assert [doc["seq"] for doc in t1] == [1, 2, 3, 4]
+    assert [doc["details"]["minute"] for doc in t1] == [0, 1, 3, 5]
+    assert t1[0]["prev_hash"] == GENESIS
+    assert all(doc["prev_hash"] == prev["hash"] for prev, doc in zip(t1, t1[1:]))
+    assert [doc["seq"] for doc in chain_of(mongo_db, "t2")] == [1]
+    assert asyncio.run(mongo_db.audit_logs.count_documents({CHAIN_PENDING: True})) == 0
+
+
+def test_verification_resumes_from_signed_checkpoints(mongo_db):
+    write(mongo_db, [log("t1", minute) for minute in range(5)] + [log("t2", 10)])
+    first = verify(mongo_db)
+    assert {tenant: (r["verified"], r["seq"], r["error"]) for tenant, r in first.items()} == {
+        "t1": (5, 5, None), "t2": (1, 1, None),
+    }
+
+    write(mongo_db, [log("t1", 20)])
+    second = verify(mongo_db)
+    assert (second["t1"]["verified"], second["t1"]["seq"]) == (1, 6)
+    assert second["t2"]["verified"] == 0
+    assert asyncio.run(mongo_db.audit_checkpoints.count_documents({"tenant_id": "t1"})) == 2
+
+
+def test_tampering_after_the_checkpoint_is_reported(mongo_db):
+    write(mongo_db, [log("t1", minute) for minute in range(2)] + [log("t2", 0)])
+    verify(mongo_db)
+    write(mongo_db, [log("t1", minute) for minute in range(2, 7)] + [log("t2", 1), log("t2", 2)])
+
+    async def tamper():
+        await mongo_db.audit_logs.update_one({"tenant_id": "t1", "seq": 5}, {"$set": {"details.minute": 99}})
+        await mongo_db.audit_logs.delete_one({"tenant_id": "t2", "seq": 2})
+    asyncio.run(tamper())
+
+    results = verify(mongo_db)
+    assert (results["t1"]["error"], results["t1"]["seq"]) == ("seq 5 was modified", 4)
+    assert results["t2"]["error"] == "seq 2 is missing"
+    # The intact prefix was checkpointed; the break is reported again.
+    assert verify(mongo_db)["t1"]["error"] == "seq 5 was modified"
+
+
+def test_checkpoints_signed_with_another_key_are_rejected(mongo_db):
+    write(mongo_db, [log("t1", 0)])
+    verify(mongo_db, key="k1")
+    write(mongo_db, [log("t1", 1)])
+    assert verify(mongo_db, key="k2")["t1"]["error"] == "checkpoint at seq 1 has a bad signature"
+
+
+def test_chain_continues_after_the_archiver_removes_it(mongo_db, tmp_path):
+    write(mongo_db, [log("t1", minute) for minute in range(3)])
+    verify(mongo_db)
+    asyncio.run(mongo_db.audit_logs.update_many({}, {"$unset": {ROLLUP_PENDING: ""}}))
+    archive = AuditArchive(mongo_db.audit_logs, LocalArchiveStorage(tmp_path), mongo_db.audit_archive_state, after_days=0)
+    assert asyncio.run(archive.archive(datetime(2026, 3, 2))) == 3
+
+    write(mongo_db, [log("t1", 30)])
+    assert [doc["seq"] for doc in chain_of(mongo_db, "t1")] == [4]
+    result = verify(mongo_db)["t1"]
+    assert (result["verified"], result["seq"], result["error"]) == (1, 4, None)
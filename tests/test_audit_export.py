@@ -0,0 +1,85 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from shared.audit.export import content_disposition, render_export
+
+
+def make_docs(count, tenant_id="t1"):
+    return [
+        {
+            "_id": ObjectId(),
+            "tenant_id": tenant_id,
+            "user_id": "u1",
+            "action": "CreateTenant",
+            "details": {"n": n, "note": 'quoted, "comma"'},
+            "created_at": datetime(2026, 1, 1) + timedelta(seconds=n),
+        }
+        for n in range(count)
+    ]
+
+
+async def aiter(docs):
+    for doc in docs:
+        yield doc
+
+
+def render(docs, format, compress=False):
+    async def main():
+        return [chunk async for chunk in render_export(aiter(docs), format, compress)]
+
+    return asyncio.run(main())
+
+
+def test_ndjson_round_trips():
+    chunks = render(make_docs(3), "ndjson")
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert [r["details"]["n"] for r in rows] == [0, 1, 2]
+    assert rows[0]["created_at"] == "2026-01-01T00:00:00"
+
+
+def test_csv_quotes_details():
+    chunks = render(make_docs(2), "csv")
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert len(rows) == 2
+    assert json.loads(rows[1]["details"]) == {"n": 1, "note": 'quoted, "comma"'}
+
+
+def test_gzip_output_is_chunked_and_valid():
+    chunks = render(make_docs(5000), "ndjson", compress=True)
+    assert len(chunks) > 1
+    lines = gzip.decompress(b"".join(chunks)).decode().splitlines()
+    assert len(lines) == 5000
+
+
+def test_export_endpoint_streams_one_tenant(monkeypatch, mongo_db, api_backends, admin_token):
+    import shared.database.mongodb
+    from services.user_management.main import app
+
+    monkeypatch.setattr(shared.database.mongodb, "_db", mongo_db)
+    asyncio.run(mongo_db.audit_logs.insert_many(make_docs(3, "t1") + make_docs(2, "t2")))
+    with TestClient(app) as client:
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        ndjson = client.get("/audit-logs/export", params={"tenant_id": "t1"}, headers=headers)
+        packed = client.get("/audit-logs/export", params={"tenant_id": "t2", "format": "csv", "gzip": True}, headers=headers)
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(l)["tenant_id"] for l in ndjson.text.splitlines()] == ["t1"] * 3
+    assert packed.headers["content-type"] == "application/gzip"
+    assert len(gzip.decompress(packed.content).decode().splitlines()) == 3
+
+
+def test_content_disposition_escapes_the_filename():
+    header = content_disposition('audit-a"; filename=evil.exe\r\nX: y.csv')
+    assert header == (
+        "attachment; filename=\"audit-a___filename_evil.exe__X__y.csv\"; "
+        "filename*=UTF-8''audit-a%22%3B%20filename%3Devil.exe%0D%0AX%3A%20y.csv"
+    )
+    assert content_disposition("audit-t1.ndjson") == (
+        "attachment; filename=\"audit-t1.ndjson\"; filename*=UTF-8''audit-t1.ndjson"
+    )
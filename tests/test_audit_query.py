@@ -0,0 +1,98 @@
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from shared.audit.query import InvalidCursor, ensure_audit_indexes, query_audit_logs
+
+START = datetime(2026, 1, 1)
+
+
+def seed(collection, count=25):
+    docs = [
+        {
+            "tenant_id": f"t{n % 2}",
+            "user_id": f"u{n % 3}",
+            "action": "CreateTenant" if n % 5 else "CreateSubscriptionPlan",
+            "details": {"n": n},
+            # Pairs of records share a timestamp so the _id tiebreak matters.
+            "created_at": START + timedelta(minutes=n // 2),
+        }
+        for n in range(count)
+    ]
+    asyncio.run(collection.insert_many(docs))
+    return docs
+
+
+def all_pages(collection, limit, **filters):
+    async def main():
+        pages, cursor = [], None
+        while True:
+            docs, cursor = await query_audit_logs(collection, cursor=cursor, limit=limit, **filters)
+            pages.append([d["details"]["n"] for d in docs])
+            if cursor is None:
+                return pages
+
+    return asyncio.run(main())
+
+
+def test_pages_cover_everything_once_newest_first(mongo_db):
+    seed(mongo_db.audit_logs)
+    pages = all_pages(mongo_db.audit_logs, limit=7)
+    assert [len(p) for p in pages] == [7, 7, 7, 4]
+    seen = [n for page in pages for n in page]
+    assert sorted(seen) == list(range(25))
+    created = [START + timedelta(minutes=n // 2) for n in seen]
+    assert created == sorted(created, reverse=True)
+
+
+def test_filters_and_range(mongo_db):
+    seed(mongo_db.audit_logs)
+    pages = all_pages(
+        mongo_db.audit_logs,
+        limit=3,
+        tenant_id="t0",
+        action="CreateTenant",
+        since=START + timedelta(minutes=2),
+        until=START + timedelta(minutes=10),
+    )
+    expected = [n for n in range(25) if n % 2 == 0 and n % 5 and 2 <= n // 2 < 10]
+    assert sorted(n for page in pages for n in page) == expected
+
+
+@pytest.mark.parametrize("position", [
+    None,
+    {"t": {"$gt": ""}, "id": {"$ne": None}},
+    {"t": "2026-01-01T00:00:00", "id": "0" * 24},
+    {"t": {"$date": "2026-01-01T00:00:00Z"}, "id": 1},
+])
+def test_invalid_cursor(mongo_db, position):
+    cursor = "not-a-cursor" if position is None else base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+    with pytest.raises(InvalidCursor):
+        asyncio.run(query_audit_logs(mongo_db.audit_logs, cursor=cursor))
+
+
+def test_indexes_created(mongo_db):
+    asyncio.run(ensure_audit_indexes(mongo_db.audit_logs))
+    names = set(asyncio.run(mongo_db.audit_logs.index_information()))
+    assert {"tenant_created", "user_created", "action_created", "created"} <= names
+
+
+def test_audit_log_endpoint(monkeypatch, mongo_db, api_backends, admin_token):
+    import shared.database.mongodb
+    from services.user_management.main import app
+
+    monkeypatch.setattr(shared.database.mongodb, "_db", mongo_db)
+    seed(mongo_db.audit_logs, count=5)
+    with TestClient(app) as client:
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        first = client.get("/audit-logs", params={"limit": 3}, headers=headers).json()
+        second = client.get("/audit-logs", params={"limit": 3, "cursor": first["next_cursor"]}, headers=headers).json()
+        bad = client.get("/audit-logs", params={"cursor": "bogus"}, headers=headers)
+    assert [item["details"]["n"] for item in first["items"]] == [4, 3, 2]
+    assert len(second["items"]) == 2 and second["next_cursor"] is None
+    assert {i["id"] for i in first["items"]}.isdisjoint(i["id"] for i in second["items"])
+    assert bad.status_code == 400
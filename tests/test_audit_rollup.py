@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from services.user_management.main import app
+from shared.audit.lease import claim_lease
+from shared.audit.rollup import ROLLUP_PENDING, STATE_ID, AuditRollup
+from shared.audit.routes import get_rollup_collection
+from shared.audit.sink import AuditSink
+from shared.models.audit_log import AuditLog
+
+
+def log(tenant_id, action, hour, minute=0, day=1):
+    return AuditLog(tenant_id=tenant_id, user_id="u1", action=action, details={},
+                    created_at=datetime(2026, 3, day, hour, minute))
+
+
+def counts(mongo_db, granularity):
+    async def read():
+        docs = await mongo_db.audit_rollups.find({"granularity": granularity}).to_list(None)
+        return {(d["tenant_id"], d["action"], d["bucket"]): d["count"] for d in docs}
+    return asyncio.run(read())
+
+
+def make_rollup(mongo_db, **kwargs):
+    return AuditRollup(mongo_db.audit_logs, mongo_db.audit_rollups, mongo_db.audit_rollup_state, **kwargs)
+
+
+def write(mongo_db, logs):
+    async def main():
+        sink = AuditSink(mongo_db.audit_logs)
+        await sink.enqueue_many(logs)
+        await sink.stop()
+    asyncio.run(main())
+
+
+def test_catch_up_counts_hourly_and_daily_buckets_and_backfills(mongo_db):
+    asyncio.run(mongo_db.audit_logs.insert_one({**log("t1", "CreateTenant", 8).dict()}))  # written before rollups
+    write(mongo_db, [log("t1", "CreateTenant", 9), log("t1", "CreateTenant", 9, 30),
+                     log("t2", "CreateTenant", 10), log(None, "CreateSubscriptionPlan", 10, day=2)])
+    rollup = make_rollup(mongo_db, batch_size=2)
+    assert asyncio.run(rollup.catch_up()) == 5
+
+    hourly = counts(mongo_db, "hour")
+    assert hourly[("t1", "CreateTenant", datetime(2026, 3, 1, 9))] == 2
+    assert hourly[("t1", "CreateTenant", datetime(2026, 3, 1, 8))] == 1
+    assert counts(mongo_db, "day") == {
+        ("t1", "CreateTenant", datetime(2026, 3, 1)): 3,
+        ("t2", "CreateTenant", datetime(2026, 3, 1)): 1,
+        (None, "CreateSubscriptionPlan", datetime(2026, 3, 2)): 1,
+    }
+    assert asyncio.run(mongo_db.audit_logs.count_documents({ROLLUP_PENDING: True})) == 0
+    assert asyncio.run(rollup.catch_up()) == 0
+
+
+def test_resumed_batch_is_not_counted_twice(mongo_db):
+    write(mongo_db, [log("t1", "CreateTenant", 9), log("t1", "UpdateTenant", 9)])
+    crashed = make_rollup(mongo_db, lease_seconds=0)
+
+    async def crash_after_counting():
+        # Counters written, marks and checkpoint left behind.
+        update_many = crashed.logs.update_many
+
+        async def fail_on_unmark(query, update):
+            if "$unset" in update:
+                raise ConnectionError("worker died")
+            return await update_many(query, update)
+        crashed.logs.update_many = fail_on_unmark
+        try:
+            await crashed.run_once()
+        except ConnectionError:
+            pass
+
+    asyncio.run(crash_after_counting())
+    assert counts(mongo_db, "day")[("t1", "CreateTenant", datetime(2026, 3, 1))] == 1
+    write(mongo_db, [log("t1", "CreateTenant", 11)])
+
+    survivor = make_rollup(mongo_db)
+    assert asyncio.run(survivor.catch_up()) == 3
+    assert counts(mongo_db, "day") == {
+        ("t1", "CreateTenant", datetime(2026, 3, 1)): 2,
+        ("t1", "UpdateTenant", datetime(2026, 3, 1)): 1,
+    }
+
+
+def test_only_the_lease_holder_runs(mongo_db):
+    write(mongo_db, [log("t1", "CreateTenant", 9)])
+    first, second = make_rollup(mongo_db), make_rollup(mongo_db)
+    asyncio.run(claim_lease(first.state, STATE_ID, first.owner, first.lease_seconds))
+    assert asyncio.run(second.run_once()) == 0
+    assert asyncio.run(first.run_once()) == 1
+
+
+def test_rollups_endpoint_filters_by_tenant_and_range(api_backends, admin_token, mongo_db):
+    write(mongo_db, [log("t1", "CreateTenant", 9, day=1), log("t1", "CreateTenant", 9, day=2),
+                     log("t1", "CreateTenant", 9, day=3), log("t2", "CreateTenant", 9, day=2)])
+    asyncio.run(make_rollup(mongo_db).catch_up())
+    app.dependency_overrides[get_rollup_collection] = lambda: mongo_db.audit_rollups
+    try:
+        with TestClient(app) as client:
+            response = client.get(
+                "/audit-logs/rollups",
+                params={"tenant_id": "t1", "since": "2026-03-02T12:00:00", "until": "2026-03-04T00:00:00"},
+                headers={"Authorization": f"Bearer {admin_token}"},
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"tenant_id": "t1", "action": "CreateTenant", "bucket": "2026-03-02T00:00:00", "count": 1},
+        {"tenant_id": "t1", "action": "CreateTenant", "bucket": "2026-03-03T00:00:00", "count": 1},
+    ]
@@ -0,0 +1,189 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from conftest import FakeCollection
+from shared.audit.sink import AuditQueueFull, AuditSink
+from shared.models.audit_log import AuditLog
+
+
+def make_log(n):
+    return AuditLog(user_id="u1", action="CreateTenant", details={"n": n}, created_at=datetime.utcnow())
+
+
+def test_flushes_in_batches_on_size(audit_collection):
+    async def main():
+        sink = AuditSink(audit_collection, batch_size=10, flush_interval=60)
+        for n in range(25):
+            await sink.enqueue(make_log(n))
+        await asyncio.sleep(0.01)
+        written_before_stop = len(audit_collection.docs)
+        await sink.stop()
+        return written_before_stop, sink.stats()
+
+    written_before_stop, stats = asyncio.run(main())
+    # The size threshold woke the flusher long before the 60s interval.
+    assert written_before_stop == 25
+    assert audit_collection.calls == [("insert_many", 10), ("insert_many", 10), ("insert_many", 5)]
+    assert [d["details"]["n"] for d in audit_collection.docs] == list(range(25))
+    assert stats["written"] == 25 and stats["queued"] == 0
+
+
+def test_flushes_on_interval(audit_collection):
+    async def main():
+        sink = AuditSink(audit_collection, batch_size=100, flush_interval=0.02)
+        await sink.enqueue(make_log(0))
+        await asyncio.sleep(0.1)
+        written = len(audit_collection.docs)
+        await sink.stop()
+        return written
+
+    assert asyncio.run(main()) == 1
+
+
+@pytest.mark.parametrize("policy, kept", [("drop_newest", [0, 1]), ("drop_oldest", [1, 2])])
+def test_drop_policies(policy, kept):
+    collection = FakeCollection(fail=True)
+
+    async def main():
+        sink = AuditSink(collection, batch_size=100, flush_interval=60, max_queue=2, overflow=policy)
+        for n in range(3):
+            await sink.enqueue(make_log(n))
+        queued = [d["details"]["n"] for d in sink._queue]
+        collection.fail = False
+        await sink.stop()
+        return queued, sink.stats()["dropped"]
+
+    assert asyncio.run(main()) == (kept, 1)
+
+
+def test_raise_policy():
+    async def main():
+        sink = AuditSink(FakeCollection(), batch_size=100, flush_interval=60, max_queue=1, overflow="raise")
+        await sink.enqueue(make_log(0))
+        with pytest.raises(AuditQueueFull):
+            await sink.enqueue(make_log(1))
+        await sink.stop()
+
+    asyncio.run(main())
+
+
+def test_block_policy_waits_for_flush(audit_collection):
+    async def main():
+        sink = AuditSink(audit_collection, batch_size=100, flush_interval=60, max_queue=2, overflow="block")
+        for n in range(5):
+            await asyncio.wait_for(sink.enqueue(make_log(n)), timeout=1)
+        await sink.stop()
+
+    asyncio.run(main())
+    assert len(audit_collection.docs) == 5
+
+
+def test_failed_batch_is_requeued():
+    collection = FakeCollection(fail=True)
+
+    async def main():
+        sink = AuditSink(collection, batch_size=2, flush_interval=60)
+        await sink.enqueue(make_log(0))
+        with pytest.raises(ConnectionError):
+            await sink.flush()
+        collection.fail = False
+        await sink.stop()
+        return sink.stats()
+
+    stats = asyncio.run(main())
+    assert stats["failures"] == 1
+    assert stats["written"] == 1
+
+
+def test_partly_written_batch_is_retried_without_duplicates(audit_collection):
+    class FailsAfterFirstDoc(FakeCollection):
+        async def insert_many(self, docs, ordered=True):
+            if self.fail:
+                self.fail = False
+                await super().insert_many(docs[:1], ordered=ordered)
+                raise ConnectionError("connection reset")
+            return await super().insert_many(docs, ordered=ordered)
+
+    collection = FailsAfterFirstDoc(fail=True)
+
+    async def main():
+        sink = AuditSink(collection, batch_size=3, flush_interval=60)
+        for n in range(3):
+            await sink.enqueue(make_log(n))
+        with pytest.raises(ConnectionError):
+            await sink.flush()
+        await sink.stop()
+        return sink.stats()
+
+    stats = asyncio.run(main())
+    assert sorted(d["details"]["n"] for d in collection.docs) == [0, 1, 2]
+    assert stats["queued"] == 0
+
+
+def test_requeued_batch_respects_max_queue():
+    class SlowFailingCollection(FakeCollection):
+        async def insert_many(self, docs, ordered=True):
+            await asyncio.sleep(0.05)
+            return await super().insert_many(docs, ordered=ordered)
+
+    async def main(policy):
+        sink = AuditSink(SlowFailingCollection(fail=True), batch_size=10, flush_interval=60, max_queue=2,
+                         overflow=policy)
+        for n in range(2):
+            await sink.enqueue(make_log(n))
+        flushing = asyncio.create_task(sink.flush())
+        await asyncio.sleep(0.01)
+        for n in range(2, 4):
+            await sink.enqueue(make_log(n))
+        with pytest.raises(ConnectionError):
+            await flushing
+        queued = [d["details"]["n"] for d in sink._queue]
+        sink.collection.fail = False
+        await sink.stop()
+        return queued, sink.stats()["dropped"]
+
+    assert asyncio.run(main("drop_oldest")) == ([2, 3], 2)
+    assert asyncio.run(main("drop_newest")) == ([0, 1], 2)
+
+
+def test_stop_during_a_slow_write_loses_nothing():
+    class SlowCollection(FakeCollection):
+        async def insert_many(self, docs, ordered=True):
+            await asyncio.sleep(0.05)
+            return await super().insert_many(docs, ordered=ordered)
+
+    collection = SlowCollection()
+
+    async def main():
+        sink = AuditSink(collection, batch_size=5, flush_interval=60)
+        for n in range(5):
+            await sink.enqueue(make_log(n))
+        await asyncio.sleep(0.01)
+        await sink.stop()
+        return sink.stats()
+
+    stats = asyncio.run(main())
+    assert stats["written"] == 5 and stats["queued"] == 0 and stats["dropped"] == 0
+    assert len(collection.docs) == 5
+
+
+def test_cancelled_write_is_requeued():
+    class HangingCollection(FakeCollection):
+        async def insert_many(self, docs, ordered=True):
+            await asyncio.Event().wait()
+
+    async def main():
+        sink = AuditSink(HangingCollection(), batch_size=100, flush_interval=60)
+        for n in range(3):
+            await sink.enqueue(make_log(n))
+        flushing = asyncio.create_task(sink.flush())
+        await asyncio.sleep(0.01)
+        flushing.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flushing
+        return sink.stats()
+
+    stats = asyncio.run(main())
+    assert stats["queued"] == 3 and stats["failures"] == 0
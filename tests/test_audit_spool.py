@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from conftest import FakeCollection
+from shared.audit.spool import AuditSpool, SpoolLocked, SpooledAuditSink, open_worker_spool
+from shared.models.audit_log import AuditLog
+
+
+def make_log(n):
+    return AuditLog(user_id="u1", action="CreateTenant", details={"n": n}, created_at=datetime.utcnow())
+
+
+def append_all(spool, count, start=0):
+    async def main():
+        await asyncio.gather(*[spool.append({"n": n}) for n in range(start, start + count)])
+
+    asyncio.run(main())
+
+
+def crash(spool):
+    # A process that dies without closing its spool still drops the lock.
+    spool._lock.close()
+
+
+def test_appends_are_group_committed(tmp_path):
+    spool = AuditSpool(tmp_path, fsync_interval=0.01)
+    append_all(spool, 50)
+    assert spool.synced_seq == 50
+    assert spool.fsyncs < 5
+
+
+def test_recovers_unacked_records_after_crash(tmp_path):
+    spool = AuditSpool(tmp_path)
+    append_all(spool, 10)
+    spool.ack(4)
+    # Simulate a crash: the spool is never closed.
+    crash(spool)
+    recovered = AuditSpool(tmp_path)
+    assert recovered.pending == 6
+    assert [doc["n"] for _, doc in recovered.read_batch(100)] == [4, 5, 6, 7, 8, 9]
+    append_all(recovered, 1, start=10)
+    assert recovered.next_seq == 12
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    spool = AuditSpool(tmp_path)
+    append_all(spool, 3)
+    spool._file.write(b'4\t{"n": ')
+    spool._file.flush()
+    crash(spool)
+    recovered = AuditSpool(tmp_path)
+    assert recovered.next_seq == 4
+    append_all(recovered, 1, start=3)
+    assert [doc["n"] for _, doc in recovered.read_batch(100)] == [0, 1, 2, 3]
+
+
+def test_segments_roll_over_and_are_deleted_once_drained(tmp_path):
+    spool = AuditSpool(tmp_path, segment_bytes=20, fsync_interval=0)
+    for n in range(10):
+        append_all(spool, 1, start=n)
+    assert len(spool._segments()) > 2
+    records = spool.read_batch(100)
+    assert [doc["n"] for _, doc in records] == list(range(10))
+    spool.ack(records[-1][0])
+    assert len(spool._segments()) == 1
+    spool.close()
+    assert AuditSpool(tmp_path).pending == 0
+
+
+def test_drain_replays_into_mongo(tmp_path, audit_collection):
+    async def main():
+        sink = SpooledAuditSink(AuditSpool(tmp_path), audit_collection, batch_size=4, drain_interval=60)
+        for n in range(10):
+            await sink.enqueue(make_log(n))
+        await sink.stop()
+        return sink.stats()
+
+    stats = asyncio.run(main())
+    assert [d["details"]["n"] for d in audit_collection.docs] == list(range(10))
+    assert stats["pending"] == 0
+    assert max(size for _, size in audit_collection.calls) <= 4
+
+
+def test_enqueue_survives_mongo_outage(tmp_path):
+    collection = FakeCollection(fail=True)
+
+    async def main():
+        sink = SpooledAuditSink(AuditSpool(tmp_path), collection, drain_interval=0.01, max_backoff=0.02)
+        for n in range(5):
+            await asyncio.wait_for(sink.enqueue(make_log(n)), timeout=1)
+        await asyncio.sleep(0.05)
+        pending_during_outage = sink.spool.pending
+        collection.fail = False
+        await asyncio.sleep(0.1)
+        await sink.stop()
+        return pending_during_outage, sink.stats()
+
+    pending_during_outage, stats = asyncio.run(main())
+    assert pending_during_outage == 5
+    assert stats["failures"] > 0 and stats["pending"] == 0
+    assert len(collection.docs) == 5
+
+
+def test_replay_after_crash_before_ack_is_idempotent(tmp_path, audit_collection):
+    async def main():
+        sink = SpooledAuditSink(AuditSpool(tmp_path), audit_collection, drain_interval=60)
+        for n in range(3):
+            await sink.enqueue(make_log(n))
+        sink._task.cancel()
+        # Written to Mongo, then "crash" before the checkpoint is updated.
+        batch = sink.spool.read_batch(100)
+        await audit_collection.insert_many([doc for _, doc in batch])
+        crash(sink.spool)
+
+        restarted = SpooledAuditSink(AuditSpool(tmp_path), audit_collection, drain_interval=60)
+        drained = await restarted.drain()
+        await restarted.stop()
+        return drained
+
+    assert asyncio.run(main()) == 3
+    assert len(audit_collection.docs) == 3
+
+
+def test_workers_sharing_a_directory_get_their_own_spool(tmp_path):
+    first = open_worker_spool(tmp_path)
+    second = open_worker_spool(tmp_path)
+    assert first.directory != second.directory
+    with pytest.raises(SpoolLocked):
+        AuditSpool(first.directory)
+    append_all(first, 2)
+    first.close()
+    # A restarted worker takes over the spool the first one left.
+    assert open_worker_spool(tmp_path).pending == 2
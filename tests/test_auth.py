@@ -0,0 +1,81 @@
+import asyncio
+import time
+import uuid
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from shared.auth import dependencies
+from shared.auth.token_cache import TokenCache
+
+SECRET = "test-jwt-secret-for-the-test-suite"
+
+
+def make_token(role="sysadmin", **claims):
+    return jwt.encode({"sub": str(uuid.uuid4()), "role": role, "email": "a@zuba.school", **claims}, SECRET)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TokenCache(maxsize=2, ttl=60)
+    monkeypatch.setattr(dependencies, "token_cache", cache)
+    return cache
+
+
+def authenticate(token):
+    return asyncio.run(dependencies.get_current_user(f"Bearer {token}"))
+
+
+def test_repeat_requests_hit_the_cache(cache, monkeypatch):
+    token = make_token()
+    first = authenticate(token)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("token was verified again")
+
+    monkeypatch.setattr(dependencies.jwt, "decode", fail)
+    second = authenticate(token)
+    assert first == second and first["role"] == "sysadmin"
+    assert cache.stats() == {"size": 1, "maxsize": 2, "hits": 1, "misses": 1}
+    # Callers get their own copy of the principal.
+    second["role"] = "changed"
+    assert authenticate(token)["role"] == "sysadmin"
+
+
+def test_entry_expires_with_the_token(cache):
+    token = make_token(exp=int(time.time()) + 1)
+    authenticate(token)
+    assert cache.get(token) is not None
+    time.sleep(1.1)
+    with pytest.raises(HTTPException) as e:
+        authenticate(token)
+    assert e.value.status_code == 401 and e.value.detail == "Token expired"
+    assert cache.stats()["size"] == 0
+
+
+def test_cache_is_bounded_lru(cache):
+    a, b, c = make_token(), make_token(), make_token()
+    authenticate(a)
+    authenticate(b)
+    authenticate(a)
+    authenticate(c)
+    assert cache.get(a) is not None
+    assert cache.get(b) is None
+
+
+def test_invalid_tokens_are_not_cached(cache):
+    for token in ("garbage", jwt.encode({"sub": "x", "role": "sysadmin"}, "wrong-secret"), jwt.encode({"sub": "x"}, SECRET)):
+        with pytest.raises(HTTPException) as e:
+            authenticate(token)
+        assert e.value.status_code == 401
+    assert cache.stats()["size"] == 0
+
+
+def test_cached_non_admin_is_still_forbidden(cache):
+    token = make_token(role="teacher")
+    for _ in range(2):
+        with pytest.raises(HTTPException) as e:
+            authenticate(token)
+        assert e.value.status_code == 403
+    assert cache.hits == 1
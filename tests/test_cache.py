@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from shared.utils.cache import TTLCache, etag_matches
+
+
+def test_concurrent_misses_load_once():
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"plans": [1, 2]}
+
+    async def main():
+        cache = TTLCache()
+        results = await asyncio.gather(*[cache.get_or_load("all", load) for _ in range(20)])
+        return cache, results
+
+    cache, results = asyncio.run(main())
+    assert calls == 1
+    assert len({etag for _, etag in results}) == 1
+    assert cache.stats()["coalesced"] == 19
+
+
+def test_loader_errors_reach_every_waiter():
+    async def load():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("supabase down")
+
+    async def main():
+        cache = TTLCache()
+        return await asyncio.gather(*[cache.get_or_load("all", load) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(r, ConnectionError) for r in asyncio.run(main()))
+
+
+def test_cancelled_leader_hands_the_load_to_a_waiter():
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def main():
+        cache = TTLCache()
+        leader = asyncio.create_task(cache.get_or_load("all", load))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_load("all", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader, follower = asyncio.run(main())
+    assert isinstance(leader, asyncio.CancelledError)
+    assert follower[0] == 2
+    assert calls == 2
+
+
+def test_ttl_and_lru_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("shared.utils.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a")[0] == 1
+    now[0] += 11
+    assert cache.get("a") is None
+
+
+def test_invalidation_during_load_is_not_cached():
+    async def main():
+        cache = TTLCache()
+
+        async def load():
+            cache.invalidate()
+            return "stale"
+
+        value, _ = await cache.get_or_load("k", load)
+        return value, cache.get("k")
+
+    assert asyncio.run(main()) == ("stale", None)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False), ('"abc"', True), ('W/"abc"', True), ('"x", "abc"', True), ("*", True), ('"x"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
@@ -0,0 +1,128 @@
+import uuid
+
+import jwt
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from services.user_management.main import app as user_app
+from shared.entitlements.dependencies import require_feature
+from shared.entitlements.engine import EntitlementEngine, compile_plan
+
+
+def plan(*features, max_users=100, max_storage_mb=1024, disabled=()):
+    return {
+        "plan_id": str(uuid.uuid4()),
+        "features": [{"name": f} for f in features] + [{"name": f, "enabled": False} for f in disabled],
+        "max_users": max_users,
+        "max_storage_mb": max_storage_mb,
+    }
+
+
+def tenant(plan_row, status="Active"):
+    return {"tenant_id": str(uuid.uuid4()), "subscription_plan_id": plan_row["plan_id"], "status": status}
+
+
+def test_compiled_plan_checks_enabled_features_only():
+    compiled = compile_plan(plan("gradebook", "timetable", disabled=("sms_alerts",)))
+    assert compiled.has("gradebook") and compiled.has("timetable")
+    assert not compiled.has("sms_alerts") and not compiled.has("never_declared")
+    assert compiled.feature_names == {"gradebook", "timetable"}
+
+
+def test_plan_changes_rebind_tenants_and_inactive_tenants_lose_features():
+    basic, pro = plan("gradebook"), plan("gradebook", "analytics", max_users=500)
+    active, suspended = tenant(basic), tenant(basic, status="Suspended")
+    engine = EntitlementEngine()
+    engine.sync([basic, pro], [active, suspended])
+
+    assert not engine.get(active["tenant_id"]).has("analytics")
+    assert not engine.get(suspended["tenant_id"]).has("gradebook")
+    assert engine.get(suspended["tenant_id"]).max_users == 100
+
+    engine.set_plan({**basic, "features": [{"name": "analytics"}]})
+    assert engine.get(active["tenant_id"]).has("analytics")
+    assert not engine.get(active["tenant_id"]).has("gradebook")
+
+    engine.set_tenant({**active, "subscription_plan_id": pro["plan_id"]})
+    engine.set_plan({**basic, "features": []})
+    assert engine.get(active["tenant_id"]).max_users == 500
+    assert engine.get(active["tenant_id"]).has("gradebook")
+
+
+def test_require_feature_reads_the_database_once(api_backends, admin_token):
+    postgrest_stub, _ = api_backends
+    pro, basic = plan("analytics"), plan("gradebook")
+    on_pro, on_basic = tenant(pro), tenant(basic)
+    postgrest_stub.tables["subscription_plans"] = [pro, basic]
+    postgrest_stub.tables["tenants"] = [on_pro, on_basic]
+
+    app = FastAPI()
+
+    @app.get("/reports")
+    async def reports(entitlements=Depends(require_feature("analytics"))):
+        return {"plan_id": entitlements.plan_id}
+
+    auth = {"Authorization": f"Bearer {admin_token}"}
+    with TestClient(app) as client:
+        allowed = [client.get("/reports", headers={**auth, "X-Tenant-ID": on_pro["tenant_id"]}) for _ in range(3)]
+        denied = client.get("/reports", headers={**auth, "X-Tenant-ID": on_basic["tenant_id"]})
+        loads = len(postgrest_stub.requests)
+        unknown = str(uuid.uuid4())
+        missing = [client.get("/reports", headers={**auth, "X-Tenant-ID": unknown}) for _ in range(3)]
+        malformed = client.get("/reports", headers={**auth, "X-Tenant-ID": "nope"})
+
+    assert [r.status_code for r in allowed] == [200, 200, 200]
+    assert allowed[0].json() == {"plan_id": pro["plan_id"]}
+    assert denied.status_code == 403 and "analytics" in denied.json()["detail"]
+    assert loads == 2  # plans and tenants, once
+    assert [r.status_code for r in missing] == [404, 404, 404]
+    assert len(postgrest_stub.requests) == loads + 1  # unknown tenant looked up once
+    assert malformed.status_code == 422
+
+
+def test_new_tenant_is_entitled_without_a_reload(api_backends, admin_token):
+    postgrest_stub, _ = api_backends
+    pro = plan("analytics", max_storage_mb=2048)
+    postgrest_stub.tables["subscription_plans"] = [pro]
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    payload = {
+        "school_name": "Kisumu Girls", "address": None, "contact_email": "head@kisumu.school",
+        "contact_phone": None, "principal_name": None, "subscription_plan_id": pro["plan_id"],
+    }
+    with TestClient(user_app) as client:
+        tenant_id = client.post("/tenants", json=payload, headers=headers).json()["tenant_id"]
+        body = client.get(f"/tenants/{tenant_id}/entitlements", headers=headers).json()
+
+    assert body == {"tenant_id": tenant_id, "plan_id": pro["plan_id"], "features": ["analytics"],
+                    "max_users": 100, "max_storage_mb": 2048}
+
+
+def test_tenant_comes_from_the_token_and_loads_use_the_service_session(api_backends):
+    postgrest_stub, _ = api_backends
+    pro, basic = plan("analytics"), plan("gradebook")
+    on_pro, on_basic = tenant(pro), tenant(basic)
+    postgrest_stub.tables["subscription_plans"] = [pro, basic]
+    postgrest_stub.tables["tenants"] = [on_pro, on_basic]
+
+    def token(**claims):
+        claims = {"sub": str(uuid.uuid4()), "role": "teacher", **claims}
+        return {"Authorization": f"Bearer {jwt.encode(claims, 'test-jwt-secret-for-the-test-suite')}"}
+
+    app = FastAPI()
+
+    @app.get("/reports")
+    async def reports(entitlements=Depends(require_feature("analytics"))):
+        return {"plan_id": entitlements.plan_id}
+
+    member = token(app_metadata={"tenant_id": on_pro["tenant_id"]})
+    with TestClient(app) as client:
+        own = client.get("/reports", headers=member)
+        same = client.get("/reports", headers={**member, "X-Tenant-ID": on_pro["tenant_id"]})
+        other = client.get("/reports", headers={**member, "X-Tenant-ID": on_basic["tenant_id"]})
+        unbound = client.get("/reports", headers={**token(), "X-Tenant-ID": on_pro["tenant_id"]})
+
+    assert own.status_code == same.status_code == 200
+    assert other.status_code == 403 and "does not match" in other.json()["detail"]
+    assert unbound.status_code == 403
+    assert postgrest_stub.requests
+    assert member["Authorization"] not in {auth for _, auth in postgrest_stub.requests}
@@ -0,0 +1,165 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import jwt
+from fastapi.testclient import TestClient
+
+from services.subscription_management.main import app as subscription_app
+from services.user_management.main import app as user_app
+from shared.idempotency.manager import IdempotencyConflict, IdempotencyManager
+from shared.idempotency.store import COMPLETED, InMemoryIdempotencyStore, MongoIdempotencyStore
+from test_plans_api import plan_payload
+from test_tenants_api import tenant_payload
+
+import pytest
+
+
+def handler(status=201, delay=0.0):
+    calls = []
+
+    async def run():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"status": status, "headers": [["content-type", "application/json"]], "body": b"{}"}
+
+    return run, calls
+
+
+def test_concurrent_duplicates_run_once_and_share_the_response():
+    async def main():
+        manager = IdempotencyManager(InMemoryIdempotencyStore())
+        run, calls = handler(delay=0.05)
+        results = await asyncio.gather(*(manager.execute("k", "fp", run) for _ in range(5)))
+        with pytest.raises(IdempotencyConflict):
+            await manager.execute("k", "other", run)
+        return results, calls
+
+    results, calls = asyncio.run(main())
+    assert len(calls) == 1
+    assert [replayed for _, replayed in results] == [False, True, True, True, True]
+    assert all(response["status"] == 201 for response, _ in results)
+
+
+def test_server_errors_and_exceptions_release_the_key():
+    async def main():
+        store = InMemoryIdempotencyStore()
+        manager = IdempotencyManager(store)
+        failing, failed_calls = handler(status=503)
+        assert (await manager.execute("k", "fp", failing))[0]["status"] == 503
+
+        async def broken():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await manager.execute("k", "fp", broken)
+        ok, ok_calls = handler()
+        first = await manager.execute("k", "fp", ok)
+        second = await manager.execute("k", "fp", ok)
+        return store, first, second, ok_calls
+
+    store, first, second, ok_calls = asyncio.run(main())
+    assert (first[1], second[1], len(ok_calls)) == (False, True, 1)
+    assert store.records["k"]["status"] == COMPLETED
+
+
+def test_other_worker_waits_for_the_first_and_replays_from_the_store():
+    async def main():
+        store = InMemoryIdempotencyStore()
+        first, second = IdempotencyManager(store), IdempotencyManager(store, poll_interval=0.01)
+        run, calls = handler(delay=0.1)
+        results = await asyncio.gather(first.execute("k", "fp", run), second.execute("k", "fp", run))
+        return results, calls
+
+    results, calls = asyncio.run(main())
+    assert len(calls) == 1
+    assert [replayed for _, replayed in results] == [False, True]
+
+
+def test_mongo_store_claims_completes_and_takes_over_lapsed_locks(mongo_db):
+    async def main():
+        store = MongoIdempotencyStore(mongo_db.idempotency_keys)
+        now = datetime.utcnow()
+        later = now + timedelta(hours=1)
+        claimed = await store.begin("k", "fp", "a", now, locked_until=now + timedelta(seconds=30), expires_at=later)
+        held = await store.begin("k", "fp", "b", now, locked_until=now + timedelta(seconds=30), expires_at=later)
+        lapsed = await store.begin("k", "fp", "b", now + timedelta(minutes=1), locked_until=later, expires_at=later)
+        # The first holder's lock lapsed: it can neither renew, store nor release the key.
+        renewed = await store.extend("k", "a", later)
+        stale = await store.complete("k", "a", {"status": 201, "headers": [], "body": b"stale"}, later)
+        await store.release("k", "a")
+        stored = await store.complete("k", "b", {"status": 201, "headers": [], "body": b"{}"}, later)
+        done = await store.begin("k", "fp", "c", now, locked_until=later, expires_at=later)
+        return claimed, held, lapsed, renewed, stale, stored, done
+
+    claimed, held, lapsed, renewed, stale, stored, done = asyncio.run(main())
+    assert claimed is None and lapsed is None
+    assert held["status"] == "in_progress"
+    assert (renewed, stale, stored) == (False, False, True)
+    assert done["status"] == COMPLETED and done["response"]["body"] == b"{}"
+
+
+def test_long_request_keeps_its_key():
+    async def main():
+        store = InMemoryIdempotencyStore()
+        first = IdempotencyManager(store, lock_seconds=0.06)
+        second = IdempotencyManager(store, lock_seconds=0.06, wait_seconds=1, poll_interval=0.01)
+        run, calls = handler(delay=0.2)
+        return await asyncio.gather(first.execute("k", "fp", run), second.execute("k", "fp", run)), calls
+
+    results, calls = asyncio.run(main())
+    assert len(calls) == 1
+    assert [replayed for _, replayed in results] == [False, True]
+
+
+def test_retried_create_tenant_inserts_once(api_backends, admin_token):
+    postgrest_stub, audit_collection = api_backends
+    headers = {"Authorization": f"Bearer {admin_token}", "Idempotency-Key": "create-1"}
+    payload = tenant_payload()
+    with TestClient(user_app) as client:
+        first = client.post("/tenants", json=payload, headers=headers)
+        retry = client.post("/tenants", json=payload, headers=headers)
+        changed = client.post("/tenants", json=tenant_payload(school_name="Other"), headers=headers)
+        unkeyed = client.post("/tenants", json=payload, headers={"Authorization": headers["Authorization"]})
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert changed.status_code == 422
+    assert unkeyed.json()["tenant_id"] != first.json()["tenant_id"]
+    assert len(postgrest_stub.tables["tenants"]) == 2
+    assert len(audit_collection.docs) == 2
+
+
+def test_keys_are_scoped_to_the_user_not_the_token(api_backends, admin_token):
+    postgrest_stub, _ = api_backends
+    claims = jwt.decode(admin_token, options={"verify_signature": False})
+    refreshed = jwt.encode({**claims, "email": "renewed@zuba.school"}, "test-jwt-secret-for-the-test-suite")
+    other = jwt.encode({**claims, "sub": str(uuid.uuid4())}, "test-jwt-secret-for-the-test-suite")
+    payload = tenant_payload()
+    with TestClient(user_app) as client:
+        def post(token):
+            auth = {"Authorization": f"Bearer {token}"} if token else {}
+            return client.post("/tenants", json=payload, headers={**auth, "Idempotency-Key": "k"})
+
+        first, retry, other_user, anonymous = post(admin_token), post(refreshed), post(other), post(None)
+
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert "idempotent-replayed" not in other_user.headers
+    assert anonymous.status_code >= 400 and "idempotent-replayed" not in anonymous.headers
+    assert len(postgrest_stub.tables["tenants"]) == 2
+
+
+def test_retried_create_plan_inserts_once(api_backends, admin_token):
+    postgrest_stub, _ = api_backends
+    headers = {"Authorization": f"Bearer {admin_token}", "Idempotency-Key": "plan-1"}
+    with TestClient(subscription_app) as client:
+        first = client.post("/plans", json=plan_payload(), headers=headers)
+        retry = client.post("/plans", json=plan_payload(), headers=headers)
+        too_long = client.post("/plans", json=plan_payload(), headers={**headers, "Idempotency-Key": "x" * 256})
+
+    assert retry.json()["plan_id"] == first.json()["plan_id"]
+    assert too_long.status_code == 400
+    assert len(postgrest_stub.tables["subscription_plans"]) == 1
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPS = ["services.user_management.main", "services.subscription_management.main"]
+
+# Only needed once a client is actually created.
+LAZY_MODULES = ["supabase", "gotrue", "storage3", "realtime", "motor", "dotenv"]
+
+# Generous so that slow CI machines pass; a regression to import-time
+# clients or eager heavy imports shows up in the module checks first.
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "3.0"))
+
+
+def run_python(code, env, *options):
+    result = subprocess.run([sys.executable, *options, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return result
+
+
+def import_profile(module):
+    """
+    Import ``module`` in a fresh interpreter under ``-X importtime`` with no
+    Supabase or MongoDB settings in the environment. Returns
+    ``{module name: (self seconds, cumulative seconds)}`` and the number of
+    threads running after the import.
+    """
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("SUPABASE_", "MONGODB_"))}
+    result = run_python(f"import threading, {module}; print(threading.active_count())", env, "-X", "importtime")
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return modules, int(result.stdout.strip())
+
+
+@pytest.mark.parametrize("app", APPS)
+def test_app_import_is_cheap_and_side_effect_free(app):
+    modules, threads = import_profile(app)
+    assert threads == 1, "importing the app started background threads (a database client?)"
+    assert [m for m in LAZY_MODULES if m in modules] == []
+    assert modules[app][1] < IMPORT_BUDGET_SECONDS
+
+
+def test_env_file_reaches_import_time_tunables(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("AUDIT_BATCH_SIZE=7\nTENANT_SEARCH_REFRESH_SECONDS=5\n")
+    env = {k: v for k, v in os.environ.items() if k not in ("AUDIT_BATCH_SIZE", "TENANT_SEARCH_REFRESH_SECONDS")}
+    code = ("import services.user_management.main, shared.audit.sink as sink, services.user_management.search as search; "
+            "print(sink.AUDIT_BATCH_SIZE, search.TENANT_SEARCH_REFRESH_SECONDS)")
+    result = run_python(code, {**env, "ENV_FILE": str(env_file)})
+    assert result.stdout.split() == ["7", "5.0"]
@@ -0,0 +1,68 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from services.subscription_management.cache import ALL_PLANS, plan_cache
+from services.subscription_management.main import app as subscription_app
+from shared.entitlements.engine import get_entitlement_engine
+from shared.invalidation import bus as invalidation
+from shared.invalidation.bus import PLANS, TENANTS, InvalidationBus
+from shared.invalidation.transport import RESYNC, InMemoryTransport, MongoTransport
+
+
+def test_other_workers_receive_changes_but_not_the_publisher():
+    async def main():
+        transport = InMemoryTransport()
+        first, second = InvalidationBus(transport), InvalidationBus(transport)
+        seen = {"first": [], "second": []}
+        first.subscribe(PLANS, lambda key, row: seen["first"].append((key, row)))
+        second.subscribe(PLANS, lambda key, row: seen["second"].append((key, row)))
+        second.subscribe(TENANTS, lambda key, row: seen["second"].append(("tenant", key)))
+        first.start()
+        second.start()
+        await first.publish(PLANS, "p1", {"plan_id": "p1"})
+        await first.publish(TENANTS)
+        await asyncio.sleep(0.01)
+        second.dispatch(RESYNC)
+        await first.stop()
+        await second.stop()
+        return seen, second.stats()
+
+    seen, stats = asyncio.run(main())
+    assert seen["first"] == []
+    assert seen["second"] == [("p1", {"plan_id": "p1"}), ("tenant", None), (None, None), ("tenant", None)]
+    assert stats["received"] == 2 and stats["resyncs"] == 1
+
+
+def test_plan_written_elsewhere_drops_cached_plans(api_backends, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    plan = {"plan_id": "5f1e8d0c-0000-4000-8000-000000000001", "features": [{"name": "sms", "enabled": True}],
+            "max_users": 10, "max_storage_mb": 100}
+    with TestClient(subscription_app) as client:
+        client.get("/plans", headers=headers)
+        assert plan_cache.get(ALL_PLANS) is not None
+        elsewhere = InvalidationBus(invalidation.get_invalidation_bus().transport)
+        client.portal.call(elsewhere.publish, PLANS, plan["plan_id"], plan)
+        client.portal.call(asyncio.sleep, 0.01)
+        assert plan_cache.get(ALL_PLANS) is None
+        assert get_entitlement_engine().stats()["plans"] == 1
+
+
+def test_mongo_transport_tails_new_messages(mongo_db):
+    async def main():
+        listener = MongoTransport(mongo_db, retry_interval=0.01)
+        publisher = MongoTransport(mongo_db)
+        messages = listener.listen()
+        await publisher.publish({"region": PLANS, "key": "p1", "row": None, "origin": "a"})
+        first = await asyncio.wait_for(messages.__anext__(), 1)
+        await publisher.publish({"region": PLANS, "key": "p2", "row": None, "origin": "a"})
+        second = await asyncio.wait_for(messages.__anext__(), 1)
+
+        def lost(*args, **kwargs):
+            raise ConnectionError("cursor killed")
+        listener.collection.find = lost
+        third = await asyncio.wait_for(messages.__anext__(), 1)
+        await messages.aclose()
+        return first["key"], second["key"], third
+
+    assert asyncio.run(main()) == ("p1", "p2", RESYNC)
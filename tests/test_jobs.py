@@ -0,0 +1,259 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from services.user_management.main import app
+from shared.jobs.queue import JobHandler, JobQueue
+from shared.jobs.store import InMemoryJobStore, MongoJobStore
+
+
+def make_queue(handlers, **kwargs):
+    kwargs.setdefault("poll_interval", 0.01)
+    return JobQueue(InMemoryJobStore(), handlers=handlers, **kwargs)
+
+
+async def wait_for_status(store, job_id, statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await store.get(job_id)
+        if job.status in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {job.status}")
+
+
+def test_failed_job_is_retried_with_backoff_then_succeeds():
+    calls = []
+
+    async def flaky(payload, ctx):
+        calls.append(time.monotonic())
+        if len(calls) < 3:
+            raise RuntimeError("upstream unavailable")
+        return {"ok": payload["n"]}
+
+    async def main():
+        queue = make_queue({"flaky": JobHandler(flaky, max_attempts=3)}, retry_base=0.05)
+        queue.start()
+        job = await queue.enqueue("flaky", {"n": 7})
+        job = await wait_for_status(queue.store, job.id, {"succeeded", "failed"})
+        await queue.stop()
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == "succeeded" and job.attempts == 3
+    assert job.result == {"ok": 7} and job.error is None
+    # Second retry waits at least half of base * 2 (jittered backoff).
+    assert calls[2] - calls[1] >= 0.05
+
+
+def test_job_fails_after_max_attempts():
+    async def broken(payload, ctx):
+        raise ValueError("bad payload")
+
+    async def main():
+        queue = make_queue({"broken": JobHandler(broken, max_attempts=2)}, retry_base=0.01)
+        queue.start()
+        job = await queue.enqueue("broken", {})
+        job = await wait_for_status(queue.store, job.id, {"succeeded", "failed"})
+        await queue.stop()
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == "failed" and job.attempts == 2
+    assert job.error == "bad payload"
+
+
+def test_per_kind_concurrency_limit():
+    active = peak = 0
+
+    async def slow(payload, ctx):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+
+    async def main():
+        queue = make_queue({"slow": JobHandler(slow, concurrency=2)}, concurrency=6)
+        queue.start()
+        jobs = [await queue.enqueue("slow", {}) for _ in range(6)]
+        for job in jobs:
+            await wait_for_status(queue.store, job.id, {"succeeded"})
+        await queue.stop()
+
+    asyncio.run(main())
+    assert peak == 2
+
+
+def test_concurrency_limit_holds_while_claims_are_awaited():
+    active = peak = 0
+
+    class SlowClaimStore(InMemoryJobStore):
+        async def claim(self, kinds, now, locked_until):
+            await asyncio.sleep(0.01)
+            return await super().claim(kinds, now, locked_until)
+
+    async def slow(payload, ctx):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+
+    async def main():
+        queue = JobQueue(SlowClaimStore(), handlers={"slow": JobHandler(slow, concurrency=1)},
+                         concurrency=4, poll_interval=0.01)
+        jobs = [await queue.enqueue("slow", {}) for _ in range(4)]
+        queue.start()
+        for job in jobs:
+            await wait_for_status(queue.store, job.id, {"succeeded"})
+        await queue.stop()
+
+    asyncio.run(main())
+    assert peak == 1
+
+
+def test_progress_is_recorded():
+    seen = []
+
+    async def steps(payload, ctx):
+        for i in range(1, 4):
+            await ctx.progress(i / 4, f"step {i}")
+            seen.append((await ctx.queue.store.get(ctx.job.id)).progress)
+        return {}
+
+    async def main():
+        queue = make_queue({"steps": JobHandler(steps)})
+        job = await queue.enqueue("steps", {})
+        assert await queue.run_once()
+        return await queue.store.get(job.id)
+
+    job = asyncio.run(main())
+    assert seen == [0.25, 0.5, 0.75]
+    assert job.status == "succeeded" and job.progress == 1.0
+
+
+def test_expired_lease_is_reclaimed():
+    async def noop(payload, ctx):
+        return {"done": True}
+
+    async def main():
+        queue = make_queue({"noop": JobHandler(noop)})
+        job = await queue.enqueue("noop", {})
+        # Simulate a worker that claimed the job and then died.
+        now = datetime.utcnow()
+        await queue.store.claim(["noop"], now, now - timedelta(seconds=1))
+        assert await queue.run_once()
+        return await queue.store.get(job.id)
+
+    job = asyncio.run(main())
+    assert job.status == "succeeded" and job.attempts == 2
+
+
+def test_lease_lost_on_the_last_attempt_fails_the_job():
+    async def noop(payload, ctx):
+        return {"done": True}
+
+    async def main():
+        queue = make_queue({"noop": JobHandler(noop, max_attempts=1)})
+        job = await queue.enqueue("noop", {})
+        now = datetime.utcnow()
+        await queue.store.claim(["noop"], now, now - timedelta(seconds=1))
+        assert not await queue.run_once()
+        return await queue.store.get(job.id)
+
+    job = asyncio.run(main())
+    assert job.status == "failed" and job.attempts == 1 and job.locked_until is None
+
+
+def test_mongo_store_lists_without_payloads_and_fails_exhausted_leases(mongo_db):
+    async def main():
+        store = MongoJobStore(mongo_db.jobs)
+        queue = JobQueue(store, handlers={"noop": JobHandler(lambda payload, ctx: None, max_attempts=1)})
+        job = await queue.enqueue("noop", {"items": [1, 2, 3]})
+        now = datetime.utcnow()
+        await store.claim(["noop"], now, now - timedelta(seconds=1))
+        reclaimed = await store.claim(["noop"], now, now + timedelta(seconds=30))
+        return reclaimed, await store.get(job.id), await store.list()
+
+    reclaimed, job, listed = asyncio.run(main())
+    assert reclaimed is None
+    assert job.status == "failed" and job.payload == {"items": [1, 2, 3]}
+    assert [j.id for j in listed] == [job.id] and not hasattr(listed[0], "payload")
+
+
+def test_tenant_import_runs_in_background(api_backends, admin_token, monkeypatch):
+    import services.user_management.routes.tenants as tenants
+
+    postgrest_stub, audit_collection = api_backends
+    monkeypatch.setattr(tenants, "TENANT_BULK_CHUNK_SIZE", 2)
+    items = [
+        {"school_name": f"School {n}", "address": None, "contact_email": f"s{n}@example.com",
+         "contact_phone": None, "principal_name": None, "subscription_plan_id": str(uuid.uuid4()),
+         "branding_config": None}
+        for n in range(5)
+    ] + [{"school_name": "No email"}]
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with TestClient(app) as client:
+        response = client.post("/tenants/import", json=items, headers=headers)
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            job = client.get(f"/jobs/{job_id}", headers=headers).json()
+            if job["status"] == "succeeded":
+                break
+            time.sleep(0.02)
+        listed = client.get("/jobs", params={"kind": "tenants.import"}, headers=headers).json()
+        missing = client.get("/jobs/nope", headers=headers)
+
+    assert job["status"] == "succeeded"
+    assert job["progress"] == 1.0
+    assert job["result"]["created"] == 5 and job["result"]["failed"] == 1
+    assert job["result"]["errors"][0]["index"] == 5
+    assert len(postgrest_stub.tables["tenants"]) == 5
+    assert [j["id"] for j in listed] == [job_id]
+    assert "payload" not in listed[0]
+    assert missing.status_code == 404
+    assert len(audit_collection.docs) == 5
+
+
+def test_retried_tenant_import_skips_tenants_already_inserted(api_backends, monkeypatch):
+    import services.user_management.routes.tenants as tenants
+
+    postgrest_stub, _ = api_backends
+    monkeypatch.setattr(tenants, "TENANT_BULK_CHUNK_SIZE", 2)
+    items = [
+        {"school_name": f"School {n}", "address": None, "contact_email": f"s{n}@example.com",
+         "contact_phone": None, "principal_name": None, "subscription_plan_id": str(uuid.uuid4()),
+         "branding_config": None}
+        for n in range(3)
+    ]
+    tenant_ids = [str(uuid.uuid4()) for _ in items]
+    postgrest_stub.tables["tenants"] = [{"tenant_id": tenant_ids[0], "school_name": "School 0"}]
+
+    class Context:
+        job = SimpleNamespace(attempts=2)
+
+        async def progress(self, fraction, message=None):
+            pass
+
+    payload = {"items": items, "tenant_ids": tenant_ids, "user": {"id": str(uuid.uuid4())}}
+    result = asyncio.run(tenants.run_tenant_import(payload, Context()))
+
+    assert result["created"] == 3 and result["failed"] == 0
+    assert sorted(row["tenant_id"] for row in postgrest_stub.tables["tenants"]) == sorted(tenant_ids)
+
+
+def test_tenant_import_is_capped_like_bulk(api_backends, admin_token, monkeypatch):
+    import services.user_management.routes.tenants as tenants
+
+    monkeypatch.setattr(tenants, "TENANT_BULK_MAX_ITEMS", 2)
+    with TestClient(app) as client:
+        response = client.post("/tenants/import", json=[{"school_name": "A"}] * 3,
+                               headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 413
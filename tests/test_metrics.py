@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from services.subscription_management.main import app
+from shared.metrics.mongo import CommandTimer
+from shared.metrics.registry import (
+    HTTP_REQUEST_DURATION,
+    MONGO_COMMAND_DURATION,
+    SUPABASE_REQUEST_DURATION,
+    Counter,
+    Histogram,
+)
+from test_plans_api import plan_payload
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(('/a"b',), value)
+    assert histogram.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a\\"b",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a\\"b"} 3.65',
+        'latency_seconds_count{route="/a\\"b"} 4',
+    ]
+
+
+def test_counter_renders_per_label_set():
+    counter = Counter("events_total", "Events.", ("kind",))
+    counter.inc(("b",))
+    counter.inc(("a",), 2)
+    assert counter.render().splitlines()[2:] == ['events_total{kind="a"} 2', 'events_total{kind="b"} 1']
+
+
+def test_requests_and_supabase_calls_are_timed(api_backends, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    route = ("GET", "/plans/{plan_id}", "200")
+    table = ("GET", "subscription_plans", "200")
+    before = HTTP_REQUEST_DURATION.count(route), SUPABASE_REQUEST_DURATION.count(table)
+    unmatched = HTTP_REQUEST_DURATION.count(("GET", "unmatched", "404"))
+    with TestClient(app) as client:
+        plan = client.post("/plans", json=plan_payload(), headers=headers).json()
+        client.get(f"/plans/{plan['plan_id']}", headers=headers)
+        client.get("/no-such-route")
+        response = client.get("/metrics")
+
+    assert HTTP_REQUEST_DURATION.count(route) == before[0] + 1
+    assert SUPABASE_REQUEST_DURATION.count(table) == before[1] + 1
+    assert HTTP_REQUEST_DURATION.count(("GET", "unmatched", "404")) == unmatched + 1
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/plans/{plan_id}",status="200"}' in body
+    assert 'supabase_request_duration_seconds_bucket{method="POST",table="subscription_plans",status="201",le="+Inf"}' in body
+    assert "http_requests_in_flight 1" in body  # the scrape itself
+
+
+def test_mongo_commands_are_timed():
+    timer = CommandTimer()
+    before = MONGO_COMMAND_DURATION.count(("insert", "ok")), MONGO_COMMAND_DURATION.count(("find", "error"))
+    timer.succeeded(SimpleNamespace(command_name="insert", duration_micros=1500))
+    timer.failed(SimpleNamespace(command_name="find", duration_micros=20))
+    assert MONGO_COMMAND_DURATION.count(("insert", "ok")) == before[0] + 1
+    assert MONGO_COMMAND_DURATION.count(("find", "error")) == before[1] + 1
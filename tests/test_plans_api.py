@@ -0,0 +1,67 @@
+from fastapi.testclient import TestClient
+
+from services.subscription_management.main import app
+
+
+def plan_payload(**overrides):
+    payload = {
+        "name": "Pro",
+        "description": "For growing schools",
+        "price_monthly": 49.0,
+        "price_yearly": 490.0,
+        "features": [{"name": "gradebook"}, {"name": "sms_alerts", "enabled": False}],
+        "max_users": 500,
+        "max_storage_mb": 10240,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_create_plan_inserts_and_audits(api_backends, admin_token):
+    postgrest_stub, audit_collection = api_backends
+    with TestClient(app) as client:
+        response = client.post("/plans", json=plan_payload(), headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["name"] == "Pro"
+        assert [f["name"] for f in body["features"]] == ["gradebook", "sms_alerts"]
+    assert [d["action"] for d in audit_collection.docs] == ["CreateSubscriptionPlan"]
+    assert audit_collection.docs[0]["details"]["plan_id"] == body["plan_id"]
+
+
+def test_plan_reads_are_cached_and_conditional(api_backends, admin_token):
+    from services.subscription_management.cache import plan_cache
+
+    postgrest_stub, _ = api_backends
+    plan_cache.invalidate()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with TestClient(app) as client:
+        created = client.post("/plans", json=plan_payload(), headers=headers).json()
+        first = client.get("/plans", headers=headers)
+        second = client.get("/plans", headers=headers)
+        not_modified = client.get("/plans", headers={**headers, "If-None-Match": first.headers["etag"]})
+        one = client.get(f"/plans/{created['plan_id']}", headers=headers)
+        client.get(f"/plans/{created['plan_id']}", headers=headers)
+    reads = [path for path, _ in postgrest_stub.requests if "select" in path]
+    assert len(reads) == 2
+    assert first.json() == second.json() and [p["name"] for p in first.json()] == ["Pro"]
+    assert not_modified.status_code == 304
+    assert one.json()["plan_id"] == created["plan_id"]
+
+
+def test_update_invalidates_cache(api_backends, admin_token):
+    from services.subscription_management.cache import plan_cache
+
+    plan_cache.invalidate()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with TestClient(app) as client:
+        created = client.post("/plans", json=plan_payload(), headers=headers).json()
+        before = client.get(f"/plans/{created['plan_id']}", headers=headers)
+        updated = client.patch(f"/plans/{created['plan_id']}", json={"max_users": 900}, headers=headers)
+        after = client.get(f"/plans/{created['plan_id']}", headers=headers)
+        stale = client.get(f"/plans/{created['plan_id']}", headers={**headers, "If-None-Match": before.headers["etag"]})
+        missing = client.get("/plans/00000000-0000-4000-8000-000000000000", headers=headers)
+    assert updated.json()["max_users"] == 900
+    assert after.json()["max_users"] == 900
+    assert stale.status_code == 200
+    assert missing.status_code == 404
@@ -0,0 +1,139 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.subscription_management.main import app as subscription_app
+from shared.database.postgrest import PoolExhaustedError
+from shared.ratelimit import admission, middleware
+from shared.ratelimit.limiter import RateLimit, RateLimiter
+from shared.ratelimit.middleware import AdmissionMiddleware
+from shared.ratelimit.store import InMemoryRateLimitStore, MongoRateLimitStore
+from test_plans_api import plan_payload
+
+
+def test_store_refills_at_the_configured_rate():
+    async def main():
+        store = InMemoryRateLimitStore()
+        taken = [await store.take("k", 1, rate=2, burst=3, now=100.0) for _ in range(4)]
+        later = await store.take("k", 5, rate=2, burst=3, now=101.0)
+        return taken, later
+
+    taken, later = asyncio.run(main())
+    assert [granted for granted, _ in taken] == [1, 1, 1, 0]
+    assert taken[-1][1] == 0.5
+    assert later == (2, 0.0)
+
+
+def test_refusal_by_one_bucket_refunds_the_others():
+    async def main():
+        limiter = RateLimiter(InMemoryRateLimitStore())
+        user, tenant = RateLimit(1, 5), RateLimit(1, 2)
+        results = [await limiter.check([("user:a", user), ("tenant:t", tenant)]) for _ in range(3)]
+        # The user still has the token the tenant's refusal gave back.
+        results += [await limiter.check([("user:a", user)]) for _ in range(4)]
+        return [key for key, _ in results]
+
+    assert asyncio.run(main()) == [None, None, "tenant:t", None, None, None, "user:a"]
+
+
+def test_workers_share_buckets_within_one_lease_each():
+    async def main():
+        store = InMemoryRateLimitStore()
+        workers = [RateLimiter(store, lease_fraction=0.2) for _ in range(4)]
+        limit = RateLimit(0.001, 20)
+        allowed = 0
+        for _ in range(20):
+            for worker in workers:
+                allowed += (await worker.acquire("user:a", limit)) == 0
+        return allowed, sum(worker.leases for worker in workers)
+
+    allowed, leases = asyncio.run(main())
+    assert allowed == 20
+    assert leases < 20
+
+
+def test_slow_store_fails_open_and_is_skipped_for_a_while():
+    class HangingStore(InMemoryRateLimitStore):
+        calls = 0
+
+        async def take(self, *args):
+            self.calls += 1
+            await asyncio.Event().wait()
+
+    async def main():
+        store = HangingStore()
+        limiter = RateLimiter(store, store_timeout=0.01, breaker_seconds=60)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = [await limiter.check([(f"user:{n}", RateLimit(1, 1))]) for n in range(20)]
+        return results, loop.time() - started, store.calls, limiter.stats()["errors"]
+
+    results, elapsed, calls, errors = asyncio.run(main())
+    assert results == [(None, 0.0)] * 20
+    assert elapsed < 1
+    assert calls == errors == 1
+
+
+def test_mongo_store_shares_buckets(mongo_db):
+    async def main():
+        store = MongoRateLimitStore(mongo_db.rate_limits)
+        first = await store.take("k", 3, rate=1, burst=4, now=10.0)
+        second = await store.take("k", 3, rate=1, burst=4, now=10.0)
+        third = await store.take("k", 1, rate=1, burst=4, now=10.0)
+        refilled = await store.take("k", 3, rate=1, burst=4, now=12.0)
+        return first, second, third, refilled
+
+    assert asyncio.run(main()) == ((3, 0.0), (1, 0.0), (0, 1.0), (2, 0.0))
+
+
+def test_tenant_bucket_needs_an_authenticated_caller(admin_token):
+    tenant_id = "5f1e8d0c-0000-4000-8000-000000000001"
+
+    def keys(headers):
+        scope = {"headers": [(k.encode(), v.encode()) for k, v in headers.items()], "client": ("10.0.0.1", 1)}
+        return [key for key, _ in middleware.rate_limit_keys(scope)]
+
+    assert keys({"x-tenant-id": tenant_id}) == ["client:10.0.0.1"]
+    authenticated = keys({"authorization": f"Bearer {admin_token}", "x-tenant-id": tenant_id.upper()})
+    assert authenticated[0].startswith("user:") and authenticated[1] == f"tenant:{tenant_id}"
+    assert len(keys({"authorization": f"Bearer {admin_token}", "x-tenant-id": "not-a-tenant"})) == 1
+
+
+def test_writes_over_the_rate_get_429(api_backends, admin_token, monkeypatch):
+    monkeypatch.setattr(middleware, "USER_LIMIT", RateLimit(0.01, 2))
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with TestClient(subscription_app) as client:
+        statuses = [client.post("/plans", json=plan_payload(), headers=headers).status_code for _ in range(3)]
+        refused = client.post("/plans", json=plan_payload(), headers=headers)
+        read = client.get("/plans", headers=headers)
+
+    assert statuses == [200, 200, 429]
+    assert int(refused.headers["retry-after"]) >= 1
+    assert read.status_code == 200
+
+
+def test_admission_sheds_load_over_budget(api_backends, admin_token, monkeypatch):
+    monkeypatch.setattr(admission, "postgrest_backlog", lambda: 10000)
+    with TestClient(subscription_app) as client:
+        shed = client.get("/plans", headers={"Authorization": f"Bearer {admin_token}"})
+        ready = client.get("/health")
+
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "1"
+    assert ready.status_code == 200
+
+
+def test_pool_exhaustion_becomes_503(api_backends):
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware)
+
+    @app.get("/slow")
+    async def slow():
+        raise PoolExhaustedError("Timed out waiting for a PostgREST slot")
+
+    with TestClient(app) as client:
+        response = client.get("/slow")
+
+    assert response.status_code == 503
+    assert admission.get_admission_controller().in_flight == 0
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from services.user_management.main import app
+from shared.health import readiness
+from shared.health.readiness import ReadinessProbe
+
+
+def sleeper(seconds, details=None, calls=None):
+    async def check():
+        if calls is not None:
+            calls.append(1)
+        await asyncio.sleep(seconds)
+        return details or {}
+    return check
+
+
+def test_checks_run_concurrently_and_report_latency():
+    probe = ReadinessProbe({"a": sleeper(0.1), "b": sleeper(0.1)}, timeout=1)
+    start = time.perf_counter()
+    result = asyncio.run(probe.check())
+    assert time.perf_counter() - start < 0.18
+    assert result["status"] == "ready"
+    assert {d["status"] for d in result["dependencies"].values()} == {"up"}
+    assert all(d["latency_ms"] >= 100 for d in result["dependencies"].values())
+
+
+def test_timeouts_and_errors_mark_dependencies_down():
+    async def broken():
+        raise ConnectionError("connection refused")
+
+    probe = ReadinessProbe({"slow": sleeper(5), "broken": broken, "ok": sleeper(0)}, timeout=0.05)
+    result = asyncio.run(probe.check())
+    deps = result["dependencies"]
+    assert result["status"] == "not_ready"
+    assert deps["slow"]["status"] == "down" and "Timed out" in deps["slow"]["error"]
+    assert deps["broken"] == {"status": "down", "latency_ms": deps["broken"]["latency_ms"], "error": "connection refused"}
+    assert deps["ok"]["status"] == "up"
+
+
+def test_saturated_pool_is_not_ready():
+    probe = ReadinessProbe({"db": sleeper(0, {"pool": {"utilization": 0.95}})}, max_utilization=0.9)
+    result = asyncio.run(probe.check())
+    assert result["status"] == "not_ready"
+    assert result["dependencies"]["db"]["status"] == "saturated"
+    assert result["dependencies"]["db"]["pool"] == {"utilization": 0.95}
+
+
+def test_results_are_cached_and_shared():
+    calls = []
+    probe = ReadinessProbe({"db": sleeper(0.05, calls=calls)}, cache_seconds=60)
+
+    async def main():
+        first = await asyncio.gather(*(probe.check() for _ in range(5)))
+        return first, await probe.check()
+
+    first, again = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is first[0] for result in first) and again is first[0]
+
+
+def test_ready_endpoint(api_backends, monkeypatch):
+    import shared.database.mongodb as mongodb
+
+    pings = []
+
+    async def command(name):
+        pings.append(name)
+        return {"ok": 1}
+
+    fake_client = SimpleNamespace(
+        admin=SimpleNamespace(command=command),
+        options=SimpleNamespace(pool_options=SimpleNamespace(max_pool_size=100)),
+        close=lambda: None,
+    )
+    monkeypatch.setattr(mongodb, "_client", fake_client)
+    monkeypatch.setattr(readiness, "_probe", None)
+    postgrest_stub, _ = api_backends
+    with TestClient(app) as client:
+        ok = client.get("/ready")
+        monkeypatch.setattr(readiness, "_probe", ReadinessProbe(timeout=0.05))
+        postgrest_stub.delay = 0.2
+        down = client.get("/ready")
+
+    assert ok.status_code == 200
+    body = ok.json()
+    assert body["status"] == "ready" and pings[0] == "ping"
+    assert body["dependencies"]["mongodb"]["pool"]["max_pool_size"] == 100
+    assert body["dependencies"]["supabase"]["pool"]["max_in_flight"] > 0
+    assert postgrest_stub.requests[0][0] == "/rest/v1/"
+    assert down.status_code == 503
+    assert down.json()["dependencies"]["supabase"]["status"] == "down"
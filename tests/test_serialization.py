@@ -0,0 +1,64 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.subscription_management.main import app as subscription_app
+from services.user_management.main import app as user_app
+from shared.utils import serialization
+from test_plans_api import plan_payload
+from test_tenants_api import tenant_payload
+
+
+def exercise(admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    branding = {"theme": {"colors": [f"#{n:06x}" for n in range(200)]}, "motto": "Elimu ni ufunguo"}
+    with TestClient(user_app) as client:
+        created = client.post("/tenants", json=tenant_payload(branding_config=branding), headers=headers)
+        page = client.get("/tenants", headers=headers)
+    with TestClient(subscription_app) as client:
+        plan = client.post("/plans", json=plan_payload(), headers=headers)
+        updated = client.patch(f"/plans/{plan.json()['plan_id']}", json={"max_users": 900}, headers=headers)
+        listed = client.get("/plans", headers=headers)
+        fetched = client.get(f"/plans/{plan.json()['plan_id']}", headers=headers)
+        revalidated = client.get("/plans", headers={**headers, "If-None-Match": listed.headers["etag"]})
+    return created, page, plan, updated, listed, fetched, revalidated
+
+
+def normalize(result):
+    """Drop the generated ids and timestamps so two runs can be compared."""
+    created, page, plan, updated, listed, fetched, revalidated = result
+    bodies = [r.json() for r in (created, page, plan, updated, listed, fetched)]
+    text = json.dumps(bodies, sort_keys=True)
+    for value in (created.json()["tenant_id"], created.json()["created_at"], plan.json()["plan_id"],
+                  plan.json()["created_at"], created.json()["subscription_plan_id"]):
+        text = text.replace(value, "<generated>")
+    return json.loads(text), [r.status_code for r in result], bool(listed.headers.get("etag"))
+
+
+@pytest.fixture
+def run(api_backends, admin_token, monkeypatch):
+    def run_with(fast):
+        monkeypatch.setattr(serialization, "FAST_SERIALIZATION", fast)
+        api_backends[0].tables.clear()
+        from services.subscription_management.cache import plan_cache
+        plan_cache.invalidate()
+        return exercise(admin_token)
+    return run_with
+
+
+def test_fast_serialization_renders_the_same_json(run):
+    slow = normalize(run(False))
+    fast = run(True)
+    assert normalize(fast) == slow
+    assert slow[1] == [200, 200, 200, 200, 200, 200, 304]
+    assert fast[0].headers["content-type"] == "application/json"
+    assert fast[4].headers["etag"] and fast[5].headers["etag"]
+
+
+def test_fast_serialization_validates_rows(monkeypatch):
+    from services.user_management.models.tenant import TenantResponse
+
+    monkeypatch.setattr(serialization, "FAST_SERIALIZATION", True)
+    with pytest.raises(ValueError):
+        serialization.respond(TenantResponse, {"tenant_id": "not-a-uuid"})
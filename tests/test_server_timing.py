@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from services.user_management.main import app
+from shared.metrics import profiler as profiler_module
+from shared.metrics.profiler import SamplingProfiler
+from shared.metrics.timing import format_server_timing
+from test_tenants_api import tenant_payload
+
+
+def parse_server_timing(header):
+    spans = {}
+    for part in header.split(", "):
+        name, *params = part.split(";")
+        spans[name] = dict(p.split("=", 1) for p in params)
+    return spans
+
+
+def test_format_server_timing():
+    header = format_server_timing({"auth": [0.0012, 1], "supabase": [0.5, 3]}, 0.75)
+    assert header == 'auth;dur=1.200, supabase;dur=500.000;desc="3 calls", total;dur=750.000'
+
+
+def test_create_tenant_reports_phase_breakdown(api_backends, admin_token):
+    postgrest_stub, _ = api_backends
+    postgrest_stub.delay = 0.05
+    with TestClient(app) as client:
+        response = client.post("/tenants", json=tenant_payload(), headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    spans = parse_server_timing(response.headers["server-timing"])
+    assert list(spans) == ["auth", "supabase", "audit", "handler", "validation", "total"]
+    durations = {name: float(params["dur"]) for name, params in spans.items()}
+    assert durations["supabase"] >= 50
+    assert "desc" not in spans["handler"]
+    assert durations["handler"] >= durations["supabase"]
+    assert durations["total"] >= durations["handler"] + durations["auth"]
+
+
+def test_unrouted_requests_still_get_a_total(api_backends):
+    with TestClient(app) as client:
+        response = client.get("/health")
+    assert list(parse_server_timing(response.headers["server-timing"])) == ["total"]
+
+
+def test_slow_requests_are_profiled(api_backends, admin_token, monkeypatch, tmp_path):
+    postgrest_stub, _ = api_backends
+    postgrest_stub.delay = 0.05
+    profiler = SamplingProfiler(tmp_path, threshold=0.04, interval=0.001)
+    monkeypatch.setattr(profiler_module, "_profiler", profiler)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with TestClient(app) as client:
+        client.get("/health")
+        client.post("/tenants", json=tenant_payload(), headers=headers)
+    profiler.stop()
+
+    profiles = list(tmp_path.glob("*.folded"))
+    assert len(profiles) == 1 and "POST_tenants" in profiles[0].name
+    lines = profiles[0].read_text().splitlines()
+    assert lines[0].startswith("# POST /tenants took")
+    assert any(line.startswith("# span supabase:") for line in lines)
+    stacks = [line for line in lines if not line.startswith("#")]
+    assert stacks and all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+
+
+def test_profiler_captures_loop_blocking_code(tmp_path):
+    def block_the_loop():
+        time.sleep(0.05)
+
+    async def main():
+        profiler = SamplingProfiler(tmp_path, threshold=0.01, interval=0.001, max_files=1)
+        for _ in range(2):
+            start = time.perf_counter()
+            profiler.begin()
+            block_the_loop()
+            path = await profiler.end(start, "GET /slow")
+        profiler.stop()
+        return path
+
+    path = asyncio.run(main())
+    assert list(tmp_path.glob("*.folded")) == [path]
+    assert "block_the_loop (test_server_timing.py" in path.read_text()
@@ -0,0 +1,160 @@
+import json
+import logging
+import threading
+import time
+
+from shared.utils import logger as log_module
+from shared.utils.logger import JsonFormatter, LogPipeline, request_id_var
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+        self.lines = []
+        self.threads = set()
+        self.setFormatter(JsonFormatter())
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.threads.add(threading.get_ident())
+        self.lines.append(json.loads(self.format(record)))
+
+
+def make_logger(pipeline, name):
+    logger = logging.getLogger(f"test_structured_logger.{name}")
+    logger.handlers = [pipeline.handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_records_are_json_with_request_id_and_extras():
+    handler = ListHandler()
+    pipeline = LogPipeline([handler])
+    logger = make_logger(pipeline, "json")
+    token = request_id_var.set("req-123")
+    try:
+        logger.info("created %s", "tenant", extra={"tenant_id": "t1"})
+    finally:
+        request_id_var.reset(token)
+    try:
+        1 / 0
+    except ZeroDivisionError as e:
+        logger.error("boom", exc_info=e)
+    pipeline.stop()
+
+    first, second = handler.lines
+    assert first["message"] == "created tenant" and first["level"] == "INFO"
+    assert first["request_id"] == "req-123" and first["tenant_id"] == "t1"
+    assert "request_id" not in second
+    assert "ZeroDivisionError" in second["exception"]
+    assert handler.threads != {threading.get_ident()}
+
+
+def test_callers_do_not_wait_for_slow_handlers():
+    handler = ListHandler(delay=0.05)
+    pipeline = LogPipeline([handler])
+    logger = make_logger(pipeline, "slow")
+    start = time.perf_counter()
+    for n in range(20):
+        logger.info("message %d", n)
+    elapsed = time.perf_counter() - start
+    pipeline.stop()
+    assert elapsed < 0.05
+    assert [line["message"] for line in handler.lines] == [f"message {n}" for n in range(20)]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+
+    class BlockedHandler(ListHandler):
+        def emit(self, record):
+            release.wait()
+            super().emit(record)
+
+    handler = BlockedHandler()
+    pipeline = LogPipeline([handler], queue_size=5)
+    logger = make_logger(pipeline, "full")
+    for n in range(50):
+        logger.info("message %d", n)
+    dropped = pipeline.stats()["dropped"]
+    release.set()
+    pipeline.stop()
+    assert dropped >= 40
+    assert len(handler.lines) == 50 - dropped
+
+
+def test_error_storms_are_suppressed_and_counted():
+    handler = ListHandler()
+    pipeline = LogPipeline([handler], dedup_window=0.1)
+    logger = make_logger(pipeline, "storm")
+    for _ in range(100):
+        logger.error("Upstream failed for %s", "mongo")
+        logger.info("info is never suppressed")
+    logger.error("Upstream failed for %s", "postgrest")
+    time.sleep(0.12)
+    logger.error("Upstream failed for %s", "mongo")
+    pipeline.stop()
+
+    errors = [line for line in handler.lines if line["level"] == "ERROR"]
+    assert [e["message"] for e in errors] == [
+        "Upstream failed for mongo", "Upstream failed for postgrest", "Upstream failed for mongo"
+    ]
+    assert errors[2]["suppressed"] == 99
+    assert sum(line["level"] == "INFO" for line in handler.lines) == 100
+
+
+def test_distinct_errors_of_one_type_are_not_suppressed():
+    handler = ListHandler()
+    pipeline = LogPipeline([handler], dedup_window=60)
+    logger = make_logger(pipeline, "distinct")
+    for error in (ValueError("bad plan id"), ValueError("bad tenant id"), ValueError("bad plan id")):
+        logger.error("%s: %s", type(error).__name__, error, exc_info=error)
+    pipeline.stop()
+
+    assert [line["message"] for line in handler.lines] == ["ValueError: bad plan id", "ValueError: bad tenant id"]
+
+
+def test_module_helpers_write_app_and_audit_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_module, "LOG_TO_STDOUT", False)
+    monkeypatch.setattr(log_module, "LOG_MAX_BYTES", 2000)
+    pipeline = LogPipeline(log_module.default_handlers(tmp_path))
+    monkeypatch.setattr(log_module, "pipeline", pipeline)
+    for logger in (log_module.app_logger, log_module.audit_logger):
+        monkeypatch.setattr(logger, "handlers", [pipeline.handler])
+
+    log_module.log_user_action("user123", "login", {"ip": "192.168.1.1"})
+    log_module.log_system_event("STARTUP", "Application started successfully")
+    log_module.get_app_logger("test_service").info("Custom logger test message")
+    try:
+        1 / 0
+    except ZeroDivisionError as e:
+        log_module.log_error(e, "test_logger function")
+    for n in range(50):
+        log_module.app_logger.debug("filler %d", n)
+        log_module.app_logger.info("filler %d", n)
+    pipeline.stop()
+
+    audit = [json.loads(line) for line in (tmp_path / "audit.log").read_text().splitlines()]
+    assert audit == [{**audit[0], "event": "user_action", "user_id": "user123", "action": "login",
+                      "details": {"ip": "192.168.1.1"}, "logger": "zubaschool_audit"}]
+    app_lines = [json.loads(line) for path in sorted(tmp_path.glob("app.log*")) for line in path.read_text().splitlines()]
+    assert {"STARTUP", None} >= {line.get("event_type") for line in app_lines}
+    assert any(line["logger"] == "zubaschool.test_service" for line in app_lines)
+    assert any(line.get("context") == "test_logger function" and "exception" in line for line in app_lines)
+    # Size-based rotation kicked in and debug records were filtered by level.
+    assert len(list(tmp_path.glob("app.log.*"))) >= 1
+    assert not any(line["message"].startswith("filler") and line["level"] == "DEBUG" for line in app_lines)
+
+
+def test_request_id_is_propagated_and_echoed(api_backends):
+    from fastapi.testclient import TestClient
+
+    from services.subscription_management.main import app
+
+    with TestClient(app) as client:
+        given = client.get("/health", headers={"X-Request-ID": "abc-123"})
+        generated = client.get("/health")
+    assert given.headers["x-request-id"] == "abc-123"
+    assert len(generated.headers["x-request-id"]) == 32
@@ -0,0 +1,136 @@
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from services.user_management.main import app
+from services.user_management.search import TenantSearchIndex
+
+
+def tenant(school_name, principal_name=None, contact_email="office@example.com", **fields):
+    row = {
+        "tenant_id": str(uuid.uuid4()),
+        "school_name": school_name,
+        "principal_name": principal_name,
+        "contact_email": contact_email,
+        "subscription_plan_id": str(uuid.uuid4()),
+        "status": "Active",
+        "created_at": datetime(2026, 1, 1).isoformat(),
+    }
+    row.update(fields)
+    return row
+
+
+def names(results):
+    return [r["school_name"] for r in results]
+
+
+def test_prefix_infix_and_accent_insensitive_matches():
+    index = TenantSearchIndex()
+    index.sync([
+        tenant("Kibera Primary", "A. Otieno"),
+        tenant("École Sainte-Marie", "B. Wanjiru"),
+        tenant("Mombasa Academy", "C. Kibet", "head@mombasa.ac.ke"),
+    ])
+
+    assert names(index.search("kib")) == ["Kibera Primary", "Mombasa Academy"]
+    assert names(index.search("bera")) == ["Kibera Primary"]
+    assert names(index.search("ecole marie")) == ["École Sainte-Marie"]
+    assert names(index.search("mombasa.ac")) == ["Mombasa Academy"]
+    assert index.search("kibera wanjiru") == []
+    assert index.search("  ") == []
+
+
+def test_ranking_prefers_exact_then_school_name():
+    index = TenantSearchIndex()
+    index.sync([
+        tenant("Hill View", "Jane Otieno"),
+        tenant("Otieno Memorial"),
+        tenant("Otienoville Academy"),
+        tenant("Green Park", contact_email="otieno@example.com"),
+    ])
+
+    assert names(index.search("otieno")) == ["Otieno Memorial", "Otienoville Academy", "Hill View", "Green Park"]
+    assert names(index.search("otieno", limit=2)) == ["Otieno Memorial", "Otienoville Academy"]
+
+
+def test_upsert_reindexes_and_remove_forgets():
+    index = TenantSearchIndex()
+    row = tenant("Kibera Primary")
+    index.upsert(row)
+    index.upsert({**row, "school_name": "Nakuru Primary"})
+
+    assert index.search("kibera") == []
+    assert names(index.search("nak")) == ["Nakuru Primary"]
+    assert index.stats()["tokens"] == 5  # nakuru, primary, office, example, com
+
+    index.remove(row["tenant_id"])
+    assert index.search("primary") == []
+    assert index.stats()["tokens"] == 0 and index.stats()["trigrams"] == 0
+
+
+def test_sync_diffs_snapshot_but_keeps_newer_local_writes():
+    index = TenantSearchIndex()
+    kept, dropped = tenant("Kept School"), tenant("Closed School")
+    index.sync([kept, dropped])
+    since = index.version
+    created_meanwhile = tenant("Brand New School")
+    index.upsert(created_meanwhile)
+
+    upserted, removed = index.sync([kept], since)
+
+    assert (upserted, removed) == (0, 1)
+    assert names(index.search("school")) == ["Brand New School", "Kept School"]
+
+
+def test_list_tenants_pages_with_filters(api_backends, admin_token):
+    postgrest_stub, _ = api_backends
+    plan = str(uuid.uuid4())
+    start = datetime(2026, 3, 1)
+    rows = [
+        tenant(f"School {n}", subscription_plan_id=plan if n % 2 else str(uuid.uuid4()),
+               created_at=(start + timedelta(minutes=n // 2)).isoformat(), address=None,
+               contact_phone=None, branding_config={})
+        for n in range(9)
+    ]
+    postgrest_stub.tables["tenants"] = rows
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with TestClient(app) as client:
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            page = client.get("/tenants", params=params, headers=headers).json()
+            seen += [item["tenant_id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        filtered = client.get("/tenants", params={"subscription_plan_id": plan}, headers=headers).json()
+        bad = client.get("/tenants", params={"cursor": "garbage"}, headers=headers)
+
+    expected = sorted(rows, key=lambda r: (r["created_at"], r["tenant_id"]), reverse=True)
+    assert seen == [r["tenant_id"] for r in expected]
+    assert [item["school_name"] for item in filtered["items"]] == ["School 7", "School 5", "School 3", "School 1"]
+    assert filtered["next_cursor"] is None
+    assert bad.status_code == 400
+
+
+def test_search_loads_from_supabase_and_sees_new_tenants(api_backends, admin_token):
+    postgrest_stub, _ = api_backends
+    postgrest_stub.tables["tenants"] = [tenant("Kibera Primary"), tenant("Nakuru Academy")]
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    payload = {
+        "school_name": "Kisumu Girls", "address": None, "contact_email": "head@kisumu.school",
+        "contact_phone": None, "principal_name": "D. Achieng", "subscription_plan_id": str(uuid.uuid4()),
+    }
+    with TestClient(app) as client:
+        first = client.get("/tenants/search", params={"q": "ki"}, headers=headers).json()
+        assert client.post("/tenants", json=payload, headers=headers).status_code == 200
+        second = client.get("/tenants/search", params={"q": "ki"}, headers=headers).json()
+        by_principal = client.get("/tenants/search", params={"q": "achieng"}, headers=headers).json()
+
+    assert names(first["items"]) == ["Kibera Primary"]
+    assert names(second["items"]) == ["Kibera Primary", "Kisumu Girls"]
+    assert names(by_principal["items"]) == ["Kisumu Girls"]
+    # One load, through the caller's session; later searches hit memory.
+    loads = [path for path, _ in postgrest_stub.requests if path.startswith("/rest/v1/tenants?select")]
+    assert len(loads) == 1
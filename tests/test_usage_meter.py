@@ -0,0 +1,142 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from services.user_management.main import app as user_app
+from shared.metering.dependencies import require_quota
+from shared.metering.meter import MB, STORAGE_BYTES, USERS, QuotaExceeded, UsageMeter
+from shared.metering.store import InMemoryUsageStore, MongoUsageStore
+
+
+class FailingStore(InMemoryUsageStore):
+    fail = True
+
+    async def apply(self, deltas):
+        if self.fail:
+            raise ConnectionError("mongo unavailable")
+        await super().apply(deltas)
+
+
+def test_consume_enforces_limit_and_reserve_gives_back_on_error():
+    meter = UsageMeter(InMemoryUsageStore())
+    meter.consume("t1", USERS, 2, limit=3)
+    with pytest.raises(QuotaExceeded) as exc:
+        meter.consume("t1", USERS, 2, limit=3)
+    assert (exc.value.used, exc.value.limit) == (2, 3)
+
+    with pytest.raises(RuntimeError):
+        with meter.reserve("t1", USERS, 1, limit=3):
+            raise RuntimeError("insert failed")
+    assert meter.used("t1", USERS) == 2
+
+    meter.consume("t1", USERS, 1, limit=None)
+    meter.record("t1", USERS, -2)
+    assert meter.used("t1", USERS) == 1 and meter.rejected == 1
+
+
+def test_flush_batches_deltas_and_keeps_them_when_the_store_fails():
+    async def main():
+        store = FailingStore()
+        meter = UsageMeter(store)
+        meter.record("t1", USERS, 3)
+        meter.record("t2", STORAGE_BYTES, 5 * MB)
+        with pytest.raises(ConnectionError):
+            await meter.flush()
+        meter.record("t1", USERS, -1)
+        store.fail = False
+        written = await meter.flush()
+        return store, meter, written
+
+    store, meter, written = asyncio.run(main())
+    assert written == 2 and store.writes == 1
+    assert store.totals == {"t1": {USERS: 2}, "t2": {STORAGE_BYTES: 5 * MB}}
+    assert meter.stats()["failures"] == 1 and meter.stats()["pending"] == 0
+
+
+def test_restart_recovers_persisted_totals_plus_unflushed_changes():
+    async def main():
+        store = InMemoryUsageStore()
+        first = UsageMeter(store)
+        first.record("t1", USERS, 4)
+        await first.stop()
+
+        second = UsageMeter(store)
+        second.record("t1", USERS, 1)  # counted before the load finished
+        await second.start()
+        await second.stop()
+        return second, store
+
+    second, store = asyncio.run(main())
+    assert second.used("t1", USERS) == 5
+    assert store.totals["t1"][USERS] == 5
+
+
+def test_mongo_store_increments_per_tenant_documents(mongo_db):
+    async def main():
+        store = MongoUsageStore(mongo_db.tenant_usage)
+        await store.apply({"t1": {USERS: 2}, "t2": {STORAGE_BYTES: MB}})
+        await store.apply({"t1": {USERS: 1, STORAGE_BYTES: 10}})
+        return await store.load()
+
+    assert asyncio.run(main()) == {"t1": {USERS: 3, STORAGE_BYTES: 10}, "t2": {STORAGE_BYTES: MB}}
+
+
+def seed_plan(postgrest_stub, max_users):
+    plan = {"plan_id": str(uuid.uuid4()), "features": [], "max_users": max_users, "max_storage_mb": 1}
+    tenant = {"tenant_id": str(uuid.uuid4()), "subscription_plan_id": plan["plan_id"], "status": "Active"}
+    postgrest_stub.tables.setdefault("subscription_plans", []).append(plan)
+    postgrest_stub.tables.setdefault("tenants", []).append(tenant)
+    return tenant["tenant_id"]
+
+
+def test_require_quota_rejects_over_quota_and_releases_on_failure(api_backends, admin_token):
+    from shared.metering.meter import get_usage_meter
+
+    postgrest_stub, _ = api_backends
+    tenant_id = seed_plan(postgrest_stub, max_users=2)
+    app = FastAPI()
+
+    @app.post("/users")
+    async def add_user(fail: bool = False, entitlements=Depends(require_quota(USERS))):
+        if fail:
+            raise HTTPException(status_code=400, detail="invalid user")
+        return {}
+
+    headers = {"Authorization": f"Bearer {admin_token}", "X-Tenant-ID": tenant_id}
+    with TestClient(app) as client:
+        failed = client.post("/users", params={"fail": True}, headers=headers)
+        statuses = [client.post("/users", headers=headers).status_code for _ in range(3)]
+
+    assert failed.status_code == 400
+    assert statuses == [200, 200, 403]
+    assert get_usage_meter().used(tenant_id, USERS) == 2
+
+
+def test_usage_endpoint_reports_against_quotas(api_backends, admin_token):
+    from shared.metering.meter import get_usage_meter
+
+    postgrest_stub, _ = api_backends
+    within, over = seed_plan(postgrest_stub, max_users=10), seed_plan(postgrest_stub, max_users=1)
+    meter = get_usage_meter()
+    meter.record(within, USERS, 3)
+    meter.record(over, USERS, 2)
+    meter.record(over, STORAGE_BYTES, MB // 2)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with TestClient(user_app) as client:
+        listed = client.get("/usage", headers=headers).json()
+        flagged = client.get("/usage", params={"over_quota": True}, headers=headers).json()
+        one = client.get(f"/usage/{over}", headers=headers).json()
+        missing = client.get(f"/usage/{uuid.uuid4()}", headers=headers)
+        malformed = client.get("/usage/nope", headers=headers)
+
+    assert {u["tenant_id"]: u["users"] for u in listed} == {within: 3, over: 2}
+    assert [u["tenant_id"] for u in flagged] == [over]
+    assert one == {"tenant_id": over, "plan_id": one["plan_id"], "users": 2, "max_users": 1,
+                   "storage_mb": 0.5, "max_storage_mb": 1, "over_quota": True}
+    assert missing.status_code == 404
+    assert malformed.status_code == 422
+    # Shutdown flushed the counters.
+    assert meter.store.totals[over] == {USERS: 2, STORAGE_BYTES: MB // 2}